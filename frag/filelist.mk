@@ -0,0 +1,25 @@
+## DO NOT MODIFY ANYTHING IN THIS FILE WITHOUT PERMISSION FROM THE INSTRUCTOR OR TAs
+
+# Path to the repository root
+REPO_ROOT ?= $(shell git rev-parse --show-toplevel)
+
+# filelist.json (and the filelists it includes, see util/filelist.py)
+# is resolved once into filelist.mk, which sets FILELIST_TOP,
+# FILELIST_FILES and FILELIST_DEPS. make regenerates it, and restarts,
+# only when one of those filelists changes. simulate.mk and synth.mk
+# both include this file, so it is guarded.
+ifndef FILELIST_MK_INCLUDED
+FILELIST_MK_INCLUDED := 1
+
+filelist.mk: filelist.json $(REPO_ROOT)/util/filelist.py
+	python3 $(REPO_ROOT)/util/filelist.py --mk $@
+
+-include filelist.mk
+
+filelist-clean:
+	rm -f filelist.mk
+
+clean: filelist-clean
+
+.PHONY: filelist-clean clean
+endif
@@ -8,14 +8,14 @@ REPO_ROOT ?= $(shell git rev-parse --show-toplevel)
 IVERILOG ?= iverilog
 VERILATOR ?= verilator
 
-# This is a little bit hacky, but sufficient. In order to make sure
-# that students can edit the filelist, that make knows about updates
-# to that filelist *and* the files themselves, and that pytest can
-# read the filelist, we store the listlist in a json file. We then
-# read the json file while checking dependencies.
-SIM_SOURCES = $(shell python3 $(REPO_ROOT)/util/get_filelist.py)
-SIM_SOURCES := $(addprefix $(REPO_ROOT)/,$(SIM_SOURCES))
-SIM_TOP = $(shell python3 $(REPO_ROOT)/util/get_top.py)
+# In order to make sure that students can edit the filelist, that make
+# knows about updates to that filelist *and* the files themselves, and
+# that pytest can read the filelist, we store the filelist in a json
+# file. frag/filelist.mk resolves it (with its includes) into a cached
+# make fragment, so no Python runs unless a filelist changed.
+include $(REPO_ROOT)/frag/filelist.mk
+SIM_SOURCES = $(addprefix $(REPO_ROOT)/,$(FILELIST_FILES))
+SIM_TOP = $(FILELIST_TOP)
 
 all: help
 
@@ -9,14 +9,14 @@ YOSYS ?= yosys
 NETLISTSVG ?= netlistsvg
 RSVG ?= rsvg-convert
 
-# This is a little bit hacky, but sufficient. In order to make sure
-# that students can edit the filelist, that make knows about updates
-# to that filelist *and* the files themselves, and that pytest can
-# read the filelist, we store the listlist in a json file. We then
-# read the json file while checking dependencies.
-SYNTH_SOURCES = $(shell python3 $(REPO_ROOT)/util/get_filelist.py)
-SYNTH_SOURCES := $(addprefix $(REPO_ROOT)/,$(SYNTH_SOURCES))
-ABSTRACT_TOP = $(shell python3 $(REPO_ROOT)/util/get_top.py)
+# In order to make sure that students can edit the filelist, that make
+# knows about updates to that filelist *and* the files themselves, and
+# that pytest can read the filelist, we store the filelist in a json
+# file. frag/filelist.mk resolves it (with its includes) into a cached
+# make fragment, so no Python runs unless a filelist changed.
+include $(REPO_ROOT)/frag/filelist.mk
+SYNTH_SOURCES = $(addprefix $(REPO_ROOT)/,$(FILELIST_FILES))
+ABSTRACT_TOP = $(FILELIST_TOP)
 
 # The ice40 commands will only work if top.sv is provided, i.e. if
 # there is a design for the FPGA.
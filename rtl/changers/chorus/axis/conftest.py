@@ -0,0 +1,2 @@
+def pytest_make_parametrize_id(config, val, argname):
+    return f"{argname}={val}"
@@ -0,0 +1,102 @@
+import os
+import sys
+
+# REPO_ROOT is set in the simulator by runner(). Otherwise, the root is
+# the nearest parent directory with util/utilities.py.
+_REPO_ROOT = os.environ.get("REPO_ROOT") or os.path.dirname(os.path.realpath(__file__))
+while not os.path.isfile(os.path.join(_REPO_ROOT, "util", "utilities.py")):
+    assert _REPO_ROOT != os.path.dirname(_REPO_ROOT), "REPO_ROOT path must exist"
+    _REPO_ROOT = os.path.dirname(_REPO_ROOT)
+sys.path.append(os.path.join(_REPO_ROOT, "util"))
+from utilities import runner, regression, lint
+from axistream import check_reset, check_full_rate, check_backpressure, check_random_valid
+import golden
+tbpath = os.path.dirname(os.path.realpath(__file__))
+
+import pytest
+
+import cocotb
+
+from pytest_utils.decorators import max_score, visibility, tags
+   
+timescale = "1ps/1ps"
+
+tests =['init_test',
+         'full_rate',
+         'random_backpressure',
+         'random_valid',
+         ]
+
+
+@pytest.mark.parametrize("test_name", tests)
+@pytest.mark.parametrize("simulator", ["verilator", "icarus"])
+@pytest.mark.parametrize("pipeline", [0, 2])
+@max_score(0)
+def test_each(test_name, simulator, pipeline):
+    # This line must be first
+    parameters = dict(locals())
+    del parameters['test_name']
+    del parameters['simulator']
+    regression(simulator, timescale, tbpath, parameters, testname=test_name)
+
+@pytest.mark.parametrize("simulator", ["verilator"])
+@max_score(.4)
+def test_lint(simulator):
+    # This line must be first
+    parameters = dict(locals())
+    del parameters['simulator']
+    lint(simulator, timescale, tbpath, parameters)
+
+@pytest.mark.parametrize("simulator", ["verilator"])
+@max_score(.1)
+def test_style(simulator):
+    # This line must be first
+    parameters = dict(locals())
+    del parameters['simulator']
+    lint(simulator, timescale, tbpath, parameters, compile_args=["--lint-only", "-Wwarn-style", "-Wno-lint"])
+
+@pytest.mark.parametrize("simulator", ["verilator", "icarus"])
+@pytest.mark.parametrize("pipeline", [0, 2])
+@max_score(1)
+def test_all(simulator, pipeline):
+    # This line must be first
+    parameters = dict(locals())
+    del parameters['simulator']
+    regression(simulator, timescale, tbpath, parameters)
+
+### Begin Tests ###
+
+tests = ['init_test',
+         'full_rate',
+         'random_backpressure',
+         'random_valid',
+         ]
+
+# The default delay of chorus.sv, in samples
+delay = 480
+
+def reference(dut, x):
+    """The output of chorus.sv for x, delayed by samples rather than cycles."""
+    return golden.chorus(x, delay, len(dut.s_axis_tdata))
+
+@cocotb.test()
+async def init_test(dut):
+    """Basic connectivity + reset behavior."""
+    await check_reset(dut)
+
+@cocotb.test()
+async def full_rate(dut):
+    """With a sink that never pauses, one sample goes through per cycle."""
+    await check_full_rate(dut, reference)
+
+@cocotb.test()
+async def random_backpressure(dut):
+    """With a sink that pauses 30% of cycles, the wrapper always has a
+    sample ready for it."""
+    await check_backpressure(dut, reference)
+
+@cocotb.test()
+async def random_valid(dut):
+    """With gaps in the input and backpressure on the output, the output
+    is the same as without them."""
+    await check_random_valid(dut, reference)
@@ -4,34 +4,94 @@ module chorus #(
   //  5 ms = 240 samples
 	// 10 ms = 480 samples
 	// 20 ms = 960 samples
-  parameter int delay = 480 // 10 ms at 48 kHz
+  parameter int delay = 480, // 10 ms at 48 kHz
+  // Registers after the output register, to raise fmax.
+  parameter int pipeline = 0
 ) (
   input logic clk,
   input logic rst,
 
+  // High when in_signal carries a sample. The delay line only advances
+  // on these cycles, so a stream with gaps (see axis/) delays by delay
+  // samples rather than cycles.
+  input logic en,
   input logic signed [width-1:0] in_signal,
   output logic signed [width-1:0] out_signal
 );
 
-  logic signed [width-1:0] wet_signal; 
-  logic signed [width-1:0] wet_signal_delayed; 
-  assign wet_signal = in_signal;
-  logic signed [width-1:0] dry_signal;
-  assign dry_signal = in_signal;
+  // Cycles from in_signal to out_signal, for the testbench.
+  localparam int latency /*verilator public*/ = 1 + pipeline;
 
-  delaybuffer delaymod #(
+  logic signed [width-1:0] wet_signal_delayed;
+
+  // The buffer always takes a sample and has one, since ready_i is high.
+  /* verilator lint_off UNUSEDSIGNAL */
+  logic buf_ready_unused, buf_valid_unused;
+  /* verilator lint_on UNUSEDSIGNAL */
+
+  // The buffer reads the sample written delay cycles ago at the same
+  // edge it writes the new one, so both are registered together.
+  delaybuffer #(
     .width_p(width),
     .delay_p(delay)
-   ) (
+   ) delaymod (
     .clk_i(clk),
     .reset_i(rst),
-    .data_i(wet_signal),
-    .valid_i(1'b1),
-    .ready_o(),
-    .valid_o(),
+    .data_i(in_signal),
+    .valid_i(en),
+    .ready_o(buf_ready_unused),
+    .valid_o(buf_valid_unused),
     .data_o(wet_signal_delayed),
     .ready_i(1'b1)
   );
-    
+
+  // The buffer memory isn't reset, so the wet signal is silent until it
+  // has been written once.
+  logic [$clog2(delay + 1)-1:0] count_q;
+  logic filled_q;
+  logic signed [width-1:0] dry_q;
+
+  always_ff @(posedge clk) begin
+    if (rst) begin
+      count_q <= '0;
+      filled_q <= 1'b0;
+      dry_q <= '0;
+    end else begin
+      dry_q <= in_signal;
+      if (en && !filled_q) begin
+        filled_q <= (count_q == ($clog2(delay + 1))'(delay));
+        count_q <= count_q + 1'b1;
+      end
+    end
+  end
+
+  logic signed [width-1:0] wet;
+  assign wet = filled_q ? wet_signal_delayed : '0;
+
+  // The average of the dry and wet signals, rounded down: the sum of
+  // their halves, plus one when both halves were rounded down.
+  logic signed [width-1:0] mix;
+  assign mix = (dry_q >>> 1) + (wet >>> 1) + width'(dry_q[0] & wet[0]);
+
+  if (pipeline == 0) begin : g_comb
+    assign out_signal = mix;
+  end else begin : g_pipe
+    logic signed [width-1:0] stage_q [pipeline];
+
+    always_ff @(posedge clk) begin
+      if (rst) begin
+        for (int i = 0; i < pipeline; i++) begin
+          stage_q[i] <= '0;
+        end
+      end else begin
+        stage_q[0] <= mix;
+        for (int i = 1; i < pipeline; i++) begin
+          stage_q[i] <= stage_q[i-1];
+        end
+      end
+    end
+
+    assign out_signal = stage_q[pipeline-1];
+  end
 
 endmodule
@@ -1,11 +1,13 @@
-module softclip_lut (
-    input logic signed [15:0] in_signal,
-    output logic signed [15:0] out_signal
+// lut_gen: 3005ba6b2ffe46f4 -- generated by util/lut_gen.py, do not edit
+module softclip_lut #(
+    parameter int width = 16
+ ) (
+    input logic signed [width-1:0] in_signal,
+    output logic signed [width-1:0] out_signal
 );
 
-
     logic [7:0] addr;
-    assign addr = in_signal[15:8] + 8'd128;
+    assign addr = in_signal[width-1:width-8] + 8'd128;
     always_comb begin 
         case (addr)
             8'd  0 : out_signal = -16'sd32767;
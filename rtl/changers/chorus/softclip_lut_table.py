@@ -0,0 +1,37 @@
+# lut_gen: 3005ba6b2ffe46f4 -- generated by util/lut_gen.py, do not edit
+import numpy as np
+
+# {"curve": "tanh", "drive": 3.0, "module": "softclip_lut", "n": 256, "width": 16}
+TABLE = np.array([
+    -32767, -32759, -32751, -32742, -32734, -32724, -32714, -32704,
+    -32693, -32682, -32670, -32658, -32645, -32631, -32617, -32602,
+    -32586, -32570, -32552, -32534, -32516, -32496, -32475, -32453,
+    -32431, -32407, -32382, -32356, -32329, -32300, -32270, -32239,
+    -32206, -32172, -32136, -32098, -32059, -32018, -31975, -31930,
+    -31882, -31833, -31781, -31727, -31670, -31611, -31549, -31484,
+    -31417, -31346, -31272, -31194, -31113, -31028, -30940, -30847,
+    -30751, -30650, -30544, -30434, -30319, -30199, -30074, -29943,
+    -29806, -29664, -29515, -29360, -29199, -29030, -28855, -28672,
+    -28481, -28283, -28076, -27861, -27638, -27405, -27163, -26911,
+    -26650, -26379, -26097, -25805, -25501, -25187, -24861, -24523,
+    -24173, -23811, -23436, -23049, -22649, -22236, -21809, -21369,
+    -20915, -20448, -19967, -19472, -18963, -18440, -17904, -17353,
+    -16789, -16211, -15619, -15014, -14397, -13766, -13123, -12468,
+    -11801, -11122, -10433, -9734, -9025, -8306, -7580, -6845,
+    -6103, -5355, -4600, -3841, -3078, -2312, -1542, -772,
+    0, 772, 1542, 2312, 3078, 3841, 4600, 5355,
+    6103, 6845, 7580, 8306, 9025, 9734, 10433, 11122,
+    11801, 12468, 13123, 13766, 14397, 15014, 15619, 16211,
+    16789, 17353, 17904, 18440, 18963, 19472, 19967, 20448,
+    20915, 21369, 21809, 22236, 22649, 23049, 23436, 23811,
+    24173, 24523, 24861, 25187, 25501, 25805, 26097, 26379,
+    26650, 26911, 27163, 27405, 27638, 27861, 28076, 28283,
+    28481, 28672, 28855, 29030, 29199, 29360, 29515, 29664,
+    29806, 29943, 30074, 30199, 30319, 30434, 30544, 30650,
+    30751, 30847, 30940, 31028, 31113, 31194, 31272, 31346,
+    31417, 31484, 31549, 31611, 31670, 31727, 31781, 31833,
+    31882, 31930, 31975, 32018, 32059, 32098, 32136, 32172,
+    32206, 32239, 32270, 32300, 32329, 32356, 32382, 32407,
+    32431, 32453, 32475, 32496, 32516, 32534, 32552, 32570,
+    32586, 32602, 32617, 32631, 32645, 32658, 32670, 32682,
+    32693, 32704, 32714, 32724, 32734, 32742, 32751, 32759], dtype=np.int64)
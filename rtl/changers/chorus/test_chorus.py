@@ -0,0 +1,158 @@
+import os
+import sys
+
+# REPO_ROOT is set in the simulator by runner(). Otherwise, the root is
+# the nearest parent directory with util/utilities.py.
+_REPO_ROOT = os.environ.get("REPO_ROOT") or os.path.dirname(os.path.realpath(__file__))
+while not os.path.isfile(os.path.join(_REPO_ROOT, "util", "utilities.py")):
+    assert _REPO_ROOT != os.path.dirname(_REPO_ROOT), "REPO_ROOT path must exist"
+    _REPO_ROOT = os.path.dirname(_REPO_ROOT)
+sys.path.append(os.path.join(_REPO_ROOT, "util"))
+from utilities import runner, regression, lint, assert_resolvable, process_samples, warm_start, check_samples
+import golden
+tbpath = os.path.dirname(os.path.realpath(__file__))
+
+import numpy as np
+
+import pytest
+
+import cocotb
+
+from cocotb.clock import Clock
+from cocotb.regression import TestFactory
+from cocotb.utils import get_sim_time
+from cocotb.triggers import Timer, ClockCycles, RisingEdge, FallingEdge, with_timeout
+from cocotb.types import LogicArray, Range
+
+from pytest_utils.decorators import max_score, visibility, tags
+   
+timescale = "1ps/1ps"
+
+tests =['init_test',
+         'random_samples',
+         'warm_start_restore',
+         ]
+
+
+@pytest.mark.parametrize("test_name", tests)
+@pytest.mark.parametrize("simulator", ["verilator", "icarus"])
+@pytest.mark.parametrize("pipeline", [0, 2])
+@max_score(0)
+def test_each(test_name, simulator, pipeline):
+    # This line must be first
+    parameters = dict(locals())
+    del parameters['test_name']
+    del parameters['simulator']
+    regression(simulator, timescale, tbpath, parameters, testname=test_name)
+
+@pytest.mark.parametrize("simulator", ["verilator"])
+@max_score(.4)
+def test_lint(simulator):
+    # This line must be first
+    parameters = dict(locals())
+    del parameters['simulator']
+    lint(simulator, timescale, tbpath, parameters)
+
+@pytest.mark.parametrize("simulator", ["verilator"])
+@max_score(.1)
+def test_style(simulator):
+    # This line must be first
+    parameters = dict(locals())
+    del parameters['simulator']
+    lint(simulator, timescale, tbpath, parameters, compile_args=["--lint-only", "-Wwarn-style", "-Wno-lint"])
+
+@pytest.mark.parametrize("simulator", ["verilator", "icarus"])
+@pytest.mark.parametrize("pipeline", [0, 2])
+@max_score(1)
+def test_all(simulator, pipeline):
+    # This line must be first
+    parameters = dict(locals())
+    del parameters['simulator']
+    regression(simulator, timescale, tbpath, parameters)
+
+### Begin Tests ###
+
+tests = ['init_test',
+         'random_samples',
+         'warm_start_restore',
+         ]
+
+# The default delay of chorus.sv, in samples
+delay = 480
+
+@cocotb.test()
+async def init_test(dut):
+    """Basic connectivity + reset behavior."""
+
+    # Start clock
+    cocotb.start_soon(Clock(dut.clk, 10, units="ns").start())
+
+    # Apply reset
+    dut.rst.value = 1
+    dut.in_signal.value = 0
+
+    # Hold reset for a couple cycles
+    await ClockCycles(dut.clk, 2)
+
+    # Release reset
+    dut.rst.value = 0
+    await RisingEdge(dut.clk)
+    await Timer(1, units="ps")
+
+    # Now the output MUST be valid
+    assert_resolvable(dut.out_signal)
+
+@cocotb.test()
+async def random_samples(dut):
+    """Random full-scale samples over several delays match the golden model."""
+
+    cocotb.start_soon(Clock(dut.clk, 10, units="ns").start())
+
+    # Reset
+    dut.rst.value = 1
+    dut.in_signal.value = 0
+    await ClockCycles(dut.clk, 2)
+    dut.rst.value = 0
+
+    width = len(dut.in_signal)
+    rng = np.random.default_rng(0)
+    x = rng.integers(-(1 << (width - 1)), 1 << (width - 1), 4 * delay)
+    await check_samples(dut, x, golden.chorus(x, delay, width), "random_samples")
+
+async def fill_buffer(dut):
+    """Reset, then fill the delay line with one delay of noise, and
+    return the noise."""
+    dut.rst.value = 1
+    dut.en.value = 0
+    dut.in_signal.value = 0
+    await ClockCycles(dut.clk, 2)
+    dut.rst.value = 0
+    await ClockCycles(dut.clk, 1)
+
+    width = len(dut.in_signal)
+    x = np.random.default_rng(0).integers(-(1 << (width - 1)), 1 << (width - 1), delay)
+    await process_samples(dut, x)
+    # Nothing more goes into the buffer until the next samples.
+    dut.en.value = 0
+    return x.tolist()
+
+@cocotb.test()
+async def warm_start_restore(dut):
+    """Filling the buffer and restoring it both continue like the golden
+    model of the noise followed by the samples."""
+
+    cocotb.start_soon(Clock(dut.clk, 10, units="ns").start())
+
+    width = len(dut.in_signal)
+    x = np.random.default_rng(1).integers(-(1 << (width - 1)), 1 << (width - 1), 2 * delay)
+
+    # The first warm_start may fill the buffer or restore a checkpoint
+    # from an earlier test; the second always restores.
+    for name in ["first", "second"]:
+        noise = np.array(await warm_start(dut, "fill_buffer", fill_buffer))
+        # warm_start() returns just after a falling edge. Let the rising
+        # edge pass while en is low, so that the samples follow the noise
+        # directly.
+        await RisingEdge(dut.clk)
+        exp = golden.chorus(np.concatenate((noise, x)), delay, width)[delay:]
+        await check_samples(dut, x, exp, f"warm_start_restore ({name} warm start)")
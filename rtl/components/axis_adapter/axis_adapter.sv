@@ -0,0 +1,84 @@
+// Adapts an effect with a fixed latency (in_signal to out_signal in
+// latency_p cycles, one sample per cycle) to AXI-Stream valid/ready on
+// both sides.
+//
+// The effect runs every cycle. en_o is high in the cycles where
+// in_signal carries an accepted sample, and effects with state (delay
+// lines, loops) advance it only then. The output of every accepted
+// sample is caught in a FIFO latency_p cycles later, and the input is
+// only accepted while the FIFO has room for everything in flight, so
+// the adapter keeps up with one sample per cycle whenever the sink
+// does.
+module axis_adapter
+  #(parameter [31:0] width_p = 24
+   ,parameter [31:0] latency_p = 1
+   // Samples in flight plus waiting in the FIFO. A sample is read out
+   // latency_p + 1 cycles after it is accepted at the earliest, and
+   // s_axis_tready doesn't wait for m_axis_tready, so latency_p + 2
+   // keeps one sample per cycle going.
+   ,parameter [31:0] depth_p = latency_p + 2
+   )
+  (input [0:0] clk_i
+  ,input [0:0] reset_i
+
+  ,input [width_p - 1:0] s_axis_tdata
+  ,input [0:0] s_axis_tvalid
+  ,output [0:0] s_axis_tready
+
+  ,output [width_p - 1:0] m_axis_tdata
+  ,output [0:0] m_axis_tvalid
+  ,input [0:0] m_axis_tready
+
+  // To and from the effect
+  ,output [0:0] en_o
+  ,output [width_p - 1:0] data_o
+  ,input [width_p - 1:0] data_i
+  );
+
+    localparam count_width_lp = $clog2(depth_p + 1);
+    localparam ptr_width_lp = (depth_p > 1) ? $clog2(depth_p) : 1;
+
+    // Samples accepted and not yet read from the FIFO
+    logic [count_width_lp - 1:0] used_r;
+    // Samples in the FIFO
+    logic [count_width_lp - 1:0] count_r;
+    logic [ptr_width_lp - 1:0] wr_ptr_r, rd_ptr_r;
+    logic [latency_p - 1:0] valid_r;
+    logic [width_p - 1:0] fifo_r [depth_p];
+
+    wire accept_w = s_axis_tvalid & s_axis_tready;
+    wire push_w = valid_r[latency_p - 1];
+    wire pop_w = m_axis_tvalid & m_axis_tready;
+
+    assign s_axis_tready = (used_r < count_width_lp'(depth_p));
+    assign en_o = accept_w;
+    assign data_o = s_axis_tdata;
+
+    assign m_axis_tvalid = (count_r != '0);
+    assign m_axis_tdata = fifo_r[rd_ptr_r];
+
+    /* verilator lint_off WIDTHEXPAND */
+    always_ff @(posedge clk_i) begin
+        if (reset_i) begin
+            used_r <= '0;
+            count_r <= '0;
+            wr_ptr_r <= '0;
+            rd_ptr_r <= '0;
+            valid_r <= '0;
+        end else begin
+            used_r <= used_r + accept_w - pop_w;
+            count_r <= count_r + push_w - pop_w;
+            // The top bit is set while data_i holds the output of an
+            // accepted sample.
+            valid_r <= (valid_r << 1) | latency_p'(accept_w);
+            if (push_w)
+                wr_ptr_r <= (wr_ptr_r == ptr_width_lp'(depth_p - 1)) ? '0 : wr_ptr_r + 1'b1;
+            if (pop_w)
+                rd_ptr_r <= (rd_ptr_r == ptr_width_lp'(depth_p - 1)) ? '0 : rd_ptr_r + 1'b1;
+        end
+        if (push_w)
+            fifo_r[wr_ptr_r] <= data_i;
+    end
+    /* verilator lint_on WIDTHEXPAND */
+
+endmodule
@@ -22,11 +22,15 @@ module ram_1r1w_sync
   initial begin
      // Display depth and width (You will need to match these in your init file)
      $display("%m: depth_p is %d, width_p is %d", depth_p, width_p);
-     // wire [bar:0] foo [baz:0];
-     // In order to get the memory contents in iverilog you need to run this for loop during initialization:
+`ifdef DUMP_MEMORIES
+     // In order to get the memory contents in iverilog you need to
+     // run this for loop during initialization. It is only compiled
+     // in when the trace configuration asks for memories, since it
+     // dominates the dump of any large buffer.
      for (int i = 0; i < depth_p; i++) begin
-       $dumpvars(0,/* Your verilog array name here */ mem[i]);
+       $dumpvars(0, mem[i]);
      end
+`endif
   end
 
   logic [width_p-1:0] rd_data_l;
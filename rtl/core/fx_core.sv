@@ -0,0 +1,224 @@
+// Time-multiplexed effect chain: one sample at a time goes through the
+// enabled stages in order, one stage after the other, over one shared
+// multiplier (an SB_MAC16) and one shared memory port. At 12 MHz and
+// 48 kHz there are 250 cycles per sample, and a sample takes
+// 2 + 3 (overdrive) + 1 (distortion) + 2 (chorus) of them; see
+// util/cycle_budget.py.
+//
+// The stages compute the same as softclip_interp_lut (overdrive with
+// interpolate=1), distortion and chorus, on samples rather than cycles:
+// the chorus delay is delay samples, however far apart they arrive.
+`ifndef BINPATH
+ `define BINPATH ""
+`endif
+module fx_core #(
+  parameter int width = 24,
+  // Chorus delay in samples
+  parameter int delay = 480,
+  // Soft-clip table, see interp_lut.sv (generated by util/lut_gen.py)
+  parameter int abits = 9,
+  parameter int fbits = 15,
+  parameter int cbits = 10,
+  parameter int shift = 8,
+  parameter base_memh_p = "../creators/overdrive/softclip_interp_lut_base.memh",
+  parameter slope_memh_p = "../creators/overdrive/softclip_interp_lut_slope.memh"
+ ) (
+  input logic clk,
+  input logic rst,
+
+  // Stages to run: [0] overdrive, [1] distortion, [2] chorus
+  input logic [2:0] stage_en,
+  input logic signed [width-1:0] threshold,
+
+  // A new sample, taken when in_ready is high
+  input logic in_valid,
+  output logic in_ready,
+  input logic signed [width-1:0] in_signal,
+
+  // out_signal is held until the next sample is done; out_valid is high
+  // for one cycle when it changes.
+  output logic out_valid,
+  output logic signed [width-1:0] out_signal
+);
+
+  typedef enum logic [2:0] {
+    IDLE,
+    OD_READ,
+    OD_MUL,
+    OD_ADD,
+    CLIP,
+    CH_READ,
+    CH_MIX,
+    DONE
+  } state_t;
+
+  state_t state, next_state;
+
+  // The sample being processed
+  logic signed [width-1:0] acc;
+
+  // The first enabled stage from stage s on
+  function automatic state_t first_stage(input logic [2:0] en, input int s);
+    if (s <= 0 && en[0]) return OD_READ;
+    if (s <= 1 && en[1]) return CLIP;
+    if (s <= 2 && en[2]) return CH_READ;
+    return DONE;
+  endfunction
+
+  always_comb begin
+    next_state = state;
+    case (state)
+      IDLE: if (in_valid) next_state = first_stage(stage_en, 0);
+      OD_READ: next_state = OD_MUL;
+      OD_MUL: next_state = OD_ADD;
+      OD_ADD: next_state = first_stage(stage_en, 1);
+      CLIP: next_state = first_stage(stage_en, 2);
+      CH_READ: next_state = CH_MIX;
+      CH_MIX: next_state = DONE;
+      DONE: next_state = IDLE;
+      default: next_state = IDLE;
+    endcase
+  end
+
+  assign in_ready = (state == IDLE);
+
+  // Overdrive: the segment's base and slope from the table ROMs, then
+  // slope * fraction in the shared multiplier
+  logic [abits-1:0] od_addr;
+  logic signed [width-1:0] od_base;
+  logic signed [cbits-1:0] od_slope;
+  logic [fbits-1:0] od_frac_q;
+  logic signed [width-1:0] od_base_q;
+  assign od_addr = acc[width-1:width-abits] + {1'b1, {(abits-1){1'b0}}};
+
+  rom_1r_sync #(
+    .width_p(width),
+    .depth_p(1 << abits),
+    .memh_p(base_memh_p)
+    ) base_rom (
+    .clk_i(clk),
+    .rd_addr_i(od_addr),
+    .rd_data_o(od_base)
+  );
+
+  rom_1r_sync #(
+    .width_p(cbits),
+    .depth_p(1 << abits),
+    .memh_p(slope_memh_p)
+    ) slope_rom (
+    .clk_i(clk),
+    .rd_addr_i(od_addr),
+    .rd_data_o(od_slope)
+  );
+
+  // The shared multiplier, registered. Stages that need it set its
+  // operands in the cycle before they use the product.
+  localparam int mw = (cbits > width) ? cbits : width;
+  logic signed [mw-1:0] mul_a, mul_b;
+  logic signed [2*mw-1:0] prod_q;
+
+  always_comb begin
+    mul_a = '0;
+    mul_b = '0;
+    if (state == OD_MUL) begin
+      mul_a = mw'(od_slope);
+      mul_b = mw'($signed({1'b0, od_frac_q}));
+    end
+  end
+
+  always_ff @(posedge clk) begin
+    prod_q <= mul_a * mul_b;
+  end
+
+  // Add and saturate, like interp_lut.sv
+  localparam int sw = (cbits + fbits + 1 > width + 2) ? cbits + fbits + 1 : width + 2;
+  localparam logic signed [sw-1:0] hi = sw'((1 <<< (width - 1)) - 1);
+  localparam logic signed [sw-1:0] lo = -hi - 1;
+  logic signed [sw-1:0] od_sum;
+  logic signed [width-1:0] od_out;
+  assign od_sum = sw'(od_base_q) + sw'(prod_q >>> (fbits - shift));
+
+  always_comb begin
+    if (od_sum > hi) begin
+      od_out = hi[width-1:0];
+    end else if (od_sum < lo) begin
+      od_out = lo[width-1:0];
+    end else begin
+      od_out = od_sum[width-1:0];
+    end
+  end
+
+  // Distortion: hard clip to +/- threshold
+  logic signed [width-1:0] clip_out;
+
+  always_comb begin
+    if (acc > threshold) begin
+      clip_out = threshold;
+    end else if (acc < -threshold) begin
+      clip_out = -threshold;
+    end else begin
+      clip_out = acc;
+    end
+  end
+
+  // Chorus: the delay line in the shared memory, read in CH_READ and
+  // written in CH_MIX, so one port is enough. The memory isn't reset,
+  // so the wet signal is silent until it has been written once.
+  localparam int aw = (delay > 1) ? $clog2(delay) : 1;
+  logic [aw-1:0] ch_ptr_q;
+  logic [$clog2(delay + 1)-1:0] ch_count_q;
+  logic signed [width-1:0] ch_wet;
+  logic signed [width-1:0] ch_rd_data;
+  logic signed [width:0] ch_sum;
+
+  ram_1r1w_sync #(
+    .width_p(width),
+    .depth_p(delay)
+   ) mem (
+    .clk_i(clk),
+    .reset_i(rst),
+    .wr_valid_i(state == CH_MIX),
+    .wr_data_i(acc),
+    .wr_addr_i(ch_ptr_q),
+    .rd_valid_i(state == CH_READ),
+    .rd_addr_i(ch_ptr_q),
+    .rd_data_o(ch_rd_data)
+  );
+
+  assign ch_wet = (ch_count_q == ($clog2(delay + 1))'(delay)) ? ch_rd_data : '0;
+  assign ch_sum = acc + ch_wet;
+
+  always_ff @(posedge clk) begin
+    if (rst) begin
+      state <= IDLE;
+      acc <= '0;
+      ch_ptr_q <= '0;
+      ch_count_q <= '0;
+      out_valid <= 1'b0;
+      out_signal <= '0;
+    end else begin
+      state <= next_state;
+      out_valid <= 1'b0;
+      case (state)
+        IDLE: if (in_valid) acc <= in_signal;
+        OD_READ: od_frac_q <= acc[width-abits-1:width-abits-fbits];
+        OD_MUL: od_base_q <= od_base;
+        OD_ADD: acc <= od_out;
+        CLIP: acc <= clip_out;
+        CH_MIX: begin
+          acc <= ch_sum[width:1];
+          ch_ptr_q <= (ch_ptr_q == aw'(delay - 1)) ? '0 : ch_ptr_q + 1'b1;
+          if (ch_count_q != ($clog2(delay + 1))'(delay)) begin
+            ch_count_q <= ch_count_q + 1'b1;
+          end
+        end
+        DONE: begin
+          out_signal <= acc;
+          out_valid <= 1'b1;
+        end
+        default: ;
+      endcase
+    end
+  end
+
+endmodule
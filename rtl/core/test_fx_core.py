@@ -0,0 +1,225 @@
+import os
+import sys
+
+# REPO_ROOT is set in the simulator by runner(). Otherwise, the root is
+# the nearest parent directory with util/utilities.py.
+_REPO_ROOT = os.environ.get("REPO_ROOT") or os.path.dirname(os.path.realpath(__file__))
+while not os.path.isfile(os.path.join(_REPO_ROOT, "util", "utilities.py")):
+    assert _REPO_ROOT != os.path.dirname(_REPO_ROOT), "REPO_ROOT path must exist"
+    _REPO_ROOT = os.path.dirname(_REPO_ROOT)
+sys.path.append(os.path.join(_REPO_ROOT, "util"))
+from utilities import runner, regression, lint, assert_resolvable
+from cycle_budget import get_budget, get_sample_cycles
+import golden
+tbpath = os.path.dirname(os.path.realpath(__file__))
+
+# The soft-clip table fx_core reads from the overdrive directory
+sys.path.append(os.path.join(_REPO_ROOT, "rtl", "creators", "overdrive"))
+import softclip_interp_lut_table
+
+import pytest
+import numpy as np
+
+import cocotb
+
+from cocotb.clock import Clock
+from cocotb.triggers import Timer, ClockCycles, RisingEdge, FallingEdge
+
+from pytest_utils.decorators import max_score, visibility, tags
+   
+timescale = "1ps/1ps"
+
+tests =['init_test',
+         'overdrive_only',
+         'distortion_only',
+         'chorus_only',
+         'all_stages',
+         'cycle_count',
+         'sample_rate',
+         ]
+
+
+@pytest.mark.parametrize("test_name", tests)
+@pytest.mark.parametrize("simulator", ["verilator", "icarus"])
+@max_score(0)
+def test_each(test_name, simulator):
+    # This line must be first
+    parameters = dict(locals())
+    del parameters['test_name']
+    del parameters['simulator']
+    regression(simulator, timescale, tbpath, parameters, testname=test_name)
+
+@pytest.mark.parametrize("simulator", ["verilator"])
+@max_score(.4)
+def test_lint(simulator):
+    # This line must be first
+    parameters = dict(locals())
+    del parameters['simulator']
+    lint(simulator, timescale, tbpath, parameters)
+
+@pytest.mark.parametrize("simulator", ["verilator"])
+@max_score(.1)
+def test_style(simulator):
+    # This line must be first
+    parameters = dict(locals())
+    del parameters['simulator']
+    lint(simulator, timescale, tbpath, parameters, compile_args=["--lint-only", "-Wwarn-style", "-Wno-lint"])
+
+@pytest.mark.parametrize("simulator", ["verilator", "icarus"])
+@max_score(1)
+def test_all(simulator):
+    # This line must be first
+    parameters = dict(locals())
+    del parameters['simulator']
+    regression(simulator, timescale, tbpath, parameters)
+
+### Begin Tests ###
+
+tests = ['init_test',
+         'overdrive_only',
+         'distortion_only',
+         'chorus_only',
+         'all_stages',
+         'cycle_count',
+         'sample_rate',
+         ]
+
+# The default chorus delay of fx_core.sv, in samples
+delay = 480
+
+# Clips about half of the full-scale random samples
+threshold = 1 << 22
+
+# The stages, in the order of stage_en
+STAGES = ["overdrive", "distortion", "chorus"]
+
+def reference(x, stage_en, width):
+    """The output of fx_core for x, with the stages of stage_en."""
+    y = golden.wrap(x, width)
+    if stage_en & 1:
+        t = softclip_interp_lut_table
+        y = golden.interp(y, t.BASE, t.SLOPE, t.SHIFT, width)
+    if stage_en & 2:
+        y = golden.distortion(y, threshold, width)
+    if stage_en & 4:
+        y = golden.chorus(y, delay, width)
+    return y
+
+async def reset(dut, stage_en):
+    """Reset the core with the given stages. The clock must be running."""
+    dut.stage_en.value = stage_en
+    dut.threshold.value = threshold
+    dut.in_valid.value = 0
+    dut.in_signal.value = 0
+    dut.rst.value = 1
+    await ClockCycles(dut.clk, 2)
+    dut.rst.value = 0
+    await FallingEdge(dut.clk)
+
+async def stream(dut, x, period=None):
+    """Give the core the samples of x, each as soon as it is ready, or
+    one every period cycles, and return the outputs and the cycle every
+    sample was taken at."""
+    width = len(dut.in_signal)
+    xs = golden.wrap(x, width).tolist()
+    y, taken = [], []
+    i = cycle = 0
+    # Inputs are assigned, and outputs read, on the falling edge.
+    while len(y) < len(xs):
+        if i < len(xs) and (period is None or cycle >= i * period):
+            dut.in_valid.value = 1
+            dut.in_signal.value = xs[i]
+        else:
+            dut.in_valid.value = 0
+        ready = dut.in_ready.value == 1
+        await FallingEdge(dut.clk)
+        if dut.in_valid.value == 1 and ready:
+            taken.append(cycle)
+            i += 1
+        if dut.out_valid.value == 1:
+            y.append(dut.out_signal.value.signed_integer)
+        cycle += 1
+    dut.in_valid.value = 0
+    return np.asarray(y, dtype=np.int64), taken
+
+def check(name, y, exp):
+    mismatches = np.flatnonzero(y != exp)
+    assert not len(mismatches), (
+        f"{name}: {len(mismatches)} of {len(exp)} samples differ, first at sample "
+        f"{mismatches[0]}: expected={int(exp[mismatches[0]])}, got={int(y[mismatches[0]])}"
+    )
+
+async def run_stages(dut, stage_en, n):
+    """Stream n random samples through the given stages, and return the
+    output and the reference."""
+    cocotb.start_soon(Clock(dut.clk, 10, units="ns").start())
+    await reset(dut, stage_en)
+    width = len(dut.in_signal)
+    x = np.random.default_rng(stage_en).integers(-(1 << (width - 1)), 1 << (width - 1), n)
+    y, _ = await stream(dut, x)
+    return y, reference(x, stage_en, width)
+
+@cocotb.test()
+async def init_test(dut):
+    """Basic connectivity + reset behavior."""
+    cocotb.start_soon(Clock(dut.clk, 10, units="ns").start())
+    await reset(dut, 0b111)
+    await Timer(1, units="ps")
+
+    assert_resolvable(dut.out_signal)
+    assert dut.in_ready.value == 1, "in_ready is low after reset"
+    assert dut.out_valid.value == 0, "out_valid is high after reset"
+
+@cocotb.test()
+async def overdrive_only(dut):
+    """The overdrive stage alone matches softclip_interp_lut."""
+    y, exp = await run_stages(dut, 0b001, 2000)
+    check("overdrive_only", y, exp)
+
+@cocotb.test()
+async def distortion_only(dut):
+    """The distortion stage alone matches distortion."""
+    y, exp = await run_stages(dut, 0b010, 2000)
+    check("distortion_only", y, exp)
+
+@cocotb.test()
+async def chorus_only(dut):
+    """The chorus stage alone matches chorus, over several delays."""
+    y, exp = await run_stages(dut, 0b100, 4 * delay)
+    check("chorus_only", y, exp)
+
+@cocotb.test()
+async def all_stages(dut):
+    """Every stage in turn matches the composed golden models."""
+    y, exp = await run_stages(dut, 0b111, 4 * delay)
+    check("all_stages", y, exp)
+
+@cocotb.test()
+async def cycle_count(dut):
+    """Samples offered every cycle are taken as often as
+    util/cycle_budget.py says, for every combination of stages."""
+    cocotb.start_soon(Clock(dut.clk, 10, units="ns").start())
+    width = len(dut.in_signal)
+    for stage_en in range(8):
+        await reset(dut, stage_en)
+        x = np.random.default_rng(0).integers(-(1 << (width - 1)), 1 << (width - 1), 16)
+        _, taken = await stream(dut, x)
+        expected = get_sample_cycles([s for i, s in enumerate(STAGES) if stage_en >> i & 1])
+        periods = set(np.diff(taken).tolist())
+        assert periods == {expected}, (
+            f"cycle_count: stage_en={stage_en:03b} took samples every {sorted(periods)} cycles, "
+            f"cycle_budget.py says {expected}"
+        )
+
+@cocotb.test()
+async def sample_rate(dut):
+    """At 12 MHz and 48 kHz, every sample is done before the next one
+    arrives, and the output matches."""
+    cocotb.start_soon(Clock(dut.clk, 10, units="ns").start())
+    await reset(dut, 0b111)
+    width = len(dut.in_signal)
+    period = get_budget()
+    x = np.random.default_rng(1).integers(-(1 << (width - 1)), 1 << (width - 1), 64)
+    y, taken = await stream(dut, x, period)
+    assert taken == [i * period for i in range(len(x))], "sample_rate: a sample waited for the core"
+    check("sample_rate", y, reference(x, 0b111, width))
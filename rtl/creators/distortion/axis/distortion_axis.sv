@@ -0,0 +1,58 @@
+// distortion with AXI-Stream input and output (see axis_adapter).
+module distortion_axis #(
+  parameter int width = 24,
+  parameter int pipeline = 0
+ ) (
+  input logic clk,
+  input logic rst,
+
+  input logic signed [width-1:0] s_axis_tdata,
+  input logic s_axis_tvalid,
+  output logic s_axis_tready,
+
+  output logic signed [width-1:0] m_axis_tdata,
+  output logic m_axis_tvalid,
+  input logic m_axis_tready,
+
+  input logic signed [width-1:0] threshold
+);
+
+  // The latency of distortion, which can't be read from the instance.
+  localparam int latency /*verilator public*/ = 1 + pipeline;
+
+  logic signed [width-1:0] fx_in, fx_out;
+
+  // distortion has no state to hold between samples, so it doesn't need en.
+  /* verilator lint_off UNUSEDSIGNAL */
+  logic en_unused;
+  /* verilator lint_on UNUSEDSIGNAL */
+
+  axis_adapter #(
+    .width_p(width),
+    .latency_p(latency)
+   ) adapter (
+    .clk_i(clk),
+    .reset_i(rst),
+    .s_axis_tdata(s_axis_tdata),
+    .s_axis_tvalid(s_axis_tvalid),
+    .s_axis_tready(s_axis_tready),
+    .m_axis_tdata(m_axis_tdata),
+    .m_axis_tvalid(m_axis_tvalid),
+    .m_axis_tready(m_axis_tready),
+    .en_o(en_unused),
+    .data_o(fx_in),
+    .data_i(fx_out)
+  );
+
+  distortion #(
+    .width(width),
+    .pipeline(pipeline)
+   ) fx (
+    .clk(clk),
+    .rst(rst),
+    .in_signal(fx_in),
+    .out_signal(fx_out),
+    .threshold(threshold)
+  );
+
+endmodule
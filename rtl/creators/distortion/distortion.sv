@@ -1,5 +1,8 @@
 module distortion #(
-  parameter int width = 24
+  parameter int width = 24,
+  // Registers after the output register, for retiming into the
+  // comparisons to raise fmax.
+  parameter int pipeline = 0
  ) (
   input logic clk,
   input logic rst,
@@ -10,19 +13,32 @@ module distortion #(
   input logic signed [width-1:0] threshold
 );
 
+  // Cycles from in_signal (and threshold) to out_signal, for the
+  // testbench.
+  localparam int latency /*verilator public*/ = 1 + pipeline;
+
+  logic signed [width-1:0] stage_q [pipeline+1];
+
   always_ff @(posedge clk) begin 
     if (rst) begin 
-      out_signal <= '0;
+      for (int i = 0; i <= pipeline; i++) begin
+        stage_q[i] <= '0;
+      end
     end else begin 
       if (in_signal > threshold) begin 
-        out_signal <= threshold;
+        stage_q[0] <= threshold;
       end else if (in_signal < -threshold) begin 
-        out_signal <= -threshold;
+        stage_q[0] <= -threshold;
       end else begin 
-        out_signal <= in_signal;
+        stage_q[0] <= in_signal;
+      end
+      for (int i = 1; i <= pipeline; i++) begin
+        stage_q[i] <= stage_q[i-1];
       end
     end
   end
 
+  assign out_signal = stage_q[pipeline];
+
 
 endmodule
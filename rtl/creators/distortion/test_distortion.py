@@ -1,16 +1,19 @@
-import git
 import os
 import sys
-import git
 
-# I don't like this, but it's convenient.
-_REPO_ROOT = git.Repo(search_parent_directories=True).working_tree_dir
-assert (os.path.exists(_REPO_ROOT)), "REPO_ROOT path must exist"
+# REPO_ROOT is set in the simulator by runner(). Otherwise, the root is
+# the nearest parent directory with util/utilities.py.
+_REPO_ROOT = os.environ.get("REPO_ROOT") or os.path.dirname(os.path.realpath(__file__))
+while not os.path.isfile(os.path.join(_REPO_ROOT, "util", "utilities.py")):
+    assert _REPO_ROOT != os.path.dirname(_REPO_ROOT), "REPO_ROOT path must exist"
+    _REPO_ROOT = os.path.dirname(_REPO_ROOT)
 sys.path.append(os.path.join(_REPO_ROOT, "util"))
-from utilities import runner, lint, assert_resolvable
+from utilities import runner, regression, lint, assert_resolvable, check_samples
+import golden
 tbpath = os.path.dirname(os.path.realpath(__file__))
 
 import pytest
+import numpy as np
 
 import cocotb
 
@@ -20,10 +23,6 @@ from cocotb.utils import get_sim_time
 from cocotb.triggers import Timer, ClockCycles, RisingEdge, FallingEdge, with_timeout
 from cocotb.types import LogicArray, Range
 
-from cocotb_test.simulator import run
-
-from cocotbext.axi import AxiLiteBus, AxiLiteMaster, AxiStreamSink, AxiStreamMonitor, AxiStreamBus
-
 from pytest_utils.decorators import max_score, visibility, tags
    
 timescale = "1ps/1ps"
@@ -31,18 +30,20 @@ timescale = "1ps/1ps"
 tests =['init_test',
          'no_clipping',
          'hard_clipping',
+         'random_samples',
          ]
 
 
 @pytest.mark.parametrize("test_name", tests)
 @pytest.mark.parametrize("simulator", ["verilator", "icarus"])
+@pytest.mark.parametrize("pipeline", [0, 2])
 @max_score(0)
-def test_each(test_name, simulator):
+def test_each(test_name, simulator, pipeline):
     # This line must be first
     parameters = dict(locals())
     del parameters['test_name']
     del parameters['simulator']
-    runner(simulator, timescale, tbpath, parameters, testname=test_name)
+    regression(simulator, timescale, tbpath, parameters, testname=test_name)
 
 @pytest.mark.parametrize("simulator", ["verilator"])
 @max_score(.4)
@@ -61,18 +62,44 @@ def test_style(simulator):
     lint(simulator, timescale, tbpath, parameters, compile_args=["--lint-only", "-Wwarn-style", "-Wno-lint"])
 
 @pytest.mark.parametrize("simulator", ["verilator", "icarus"])
+@pytest.mark.parametrize("pipeline", [0, 2])
 @max_score(1)
-def test_all(simulator):
+def test_all(simulator, pipeline):
     # This line must be first
     parameters = dict(locals())
     del parameters['simulator']
-    runner(simulator, timescale, tbpath, parameters)
+    regression(simulator, timescale, tbpath, parameters)
+
+def run_evicting(simulator, pipeline):
+    """Run one test with a build cache too small to keep any other
+    model, and return the error, or None if it passed."""
+    import utilities
+    utilities.BUILD_CACHE_MAX_BYTES = 1
+    try:
+        runner(simulator, timescale, tbpath, dict(pipeline=pipeline), testname="random_samples")
+    except SystemExit as e:
+        return str(e)
+    return None
+
+@pytest.mark.parametrize("simulator", ["verilator", "icarus"])
+@max_score(0)
+def test_build_cache(simulator, tmp_path, monkeypatch):
+    """Two builds that evict each other from a tiny cache, run at once
+    like run_all.py workers, both complete."""
+    import multiprocessing
+
+    monkeypatch.setenv("BUILD_CACHE_DIR", str(tmp_path))
+    with multiprocessing.get_context("fork").Pool(2) as pool:
+        for _ in range(3):
+            errors = pool.starmap(run_evicting, [(simulator, 0), (simulator, 2)])
+            assert errors == [None, None], f"Runs failed with a shared build cache: {errors}"
 
 ### Begin Tests ###
 
 tests = ['init_test',
          'no_clipping',
          'hard_clipping',
+         'random_samples',
          ]
 
 @cocotb.test()
@@ -118,18 +145,11 @@ async def no_clipping(dut):
     thr = 5000
     dut.threshold.value = thr
 
-    for x in [0, 123, -123, 999, -999, 4000, -4000]:
-        dut.in_signal.value = x
+    vectors = [0, 123, -123, 999, -999, 4000, -4000]
 
-        # Wait for the registered output to update
-        await RisingEdge(dut.clk)
-        await Timer(1, units="ps")
-
-        got = dut.out_signal.value.signed_integer
-        assert got == x, (
-            f"no_clipping: expected {x}, got {got} (thr={thr}) "
-            f"at {get_sim_time(units='ns')} ns"
-        )
+    # The scoreboard lines the outputs up with the inputs, however many
+    # registers the module has.
+    await check_samples(dut, vectors, vectors, f"no_clipping (thr={thr})")
         
 @cocotb.test()
 async def hard_clipping(dut):
@@ -150,23 +170,41 @@ async def hard_clipping(dut):
     thr = 5000
     dut.threshold.value = thr
 
-    for x in [0, 123, -123, 5001, -5001, 6000, -6000]:
-        dut.in_signal.value = x
-       
+    vectors = [0, 123, -123, 5001, -5001, 6000, -6000]
+    expected = []
+    for x in vectors:
         if x > thr:
-            expected = thr
+            expected.append(thr)
         elif x < -thr:
-            expected = -thr
+            expected.append(-thr)
         else:
-            expected = x
-       
-        # Wait for the registered output to update
-        await RisingEdge(dut.clk)
-        await Timer(1, units="ps")
-
-        got = dut.out_signal.value.signed_integer
-        assert got == expected, (
-            f"hard_clipping: expected {expected}, got {got} (thr={thr}) "
-            f"at {get_sim_time(units='ns')} ns"
-        )
-        
+            expected.append(x)
+
+    await check_samples(dut, vectors, expected, f"hard_clipping (thr={thr})")
+
+@cocotb.test()
+async def random_samples(dut):
+    """Random full-scale samples and thresholds match the golden model."""
+
+    # Start a clock
+    cocotb.start_soon(Clock(dut.clk, 10, units="ns").start())
+
+    # Reset
+    dut.rst.value = 1
+    dut.in_signal.value = 0
+    dut.threshold.value = 0
+    await ClockCycles(dut.clk, 2)
+    dut.rst.value = 0
+    await ClockCycles(dut.clk, 1)
+
+    width = len(dut.in_signal)
+    rng = np.random.default_rng(0)
+    x = rng.integers(-(1 << (width - 1)), 1 << (width - 1), 20000)
+    # Change the threshold every 1000 samples
+    thr = np.repeat(rng.integers(0, 1 << (width - 1), 20), 1000)
+    exp = golden.distortion(x, thr, width)
+
+    # Each chunk drains the pipeline before the threshold changes.
+    for i in range(0, len(x), 1000):
+        dut.threshold.value = int(thr[i])
+        await check_samples(dut, x[i:i + 1000], exp[i:i + 1000], f"random_samples (thr={thr[i]}, from sample {i})")
@@ -0,0 +1,85 @@
+`ifndef BINPATH
+ `define BINPATH ""
+`endif
+module interp_lut #(
+  parameter int width = 24,
+  // 2**abits segments, addressed by the top abits of in_signal
+  parameter int abits = 8,
+  // Bits below the address that are multiplied by the slope
+  parameter int fbits = 15,
+  // Width of the slope table
+  parameter int cbits = 16,
+  // Left shift of the slopes, see lut_gen.interp_tables()
+  parameter int shift = 0,
+  // Generated by util/lut_gen.py
+  parameter base_memh_p = "softclip_interp_lut_base.memh",
+  parameter slope_memh_p = "softclip_interp_lut_slope.memh"
+ ) (
+  input logic clk_i,
+
+  input logic signed [width-1:0] in_signal,
+  output logic signed [width-1:0] out_signal
+);
+
+  // Wide enough for the sum and the product, before saturation
+  localparam int pw = cbits + fbits + 1;
+  localparam int sw = (pw > width + 2) ? pw : width + 2;
+  localparam logic signed [sw-1:0] hi = sw'((1 <<< (width - 1)) - 1);
+  localparam logic signed [sw-1:0] lo = -hi - 1;
+
+  // Stage 1: read the segment's base and slope from BRAM
+  logic [abits-1:0] addr;
+  assign addr = in_signal[width-1:width-abits] + {1'b1, {(abits-1){1'b0}}};
+
+  logic signed [width-1:0] base_q;
+  logic signed [cbits-1:0] slope_q;
+  logic [fbits-1:0] frac_q;
+
+  rom_1r_sync #(
+    .width_p(width),
+    .depth_p(1 << abits),
+    .memh_p(base_memh_p)
+    ) base_rom (
+    .clk_i(clk_i),
+    .rd_addr_i(addr),
+    .rd_data_o(base_q)
+  );
+
+  rom_1r_sync #(
+    .width_p(cbits),
+    .depth_p(1 << abits),
+    .memh_p(slope_memh_p)
+    ) slope_rom (
+    .clk_i(clk_i),
+    .rd_addr_i(addr),
+    .rd_data_o(slope_q)
+  );
+
+  always_ff @(posedge clk_i) begin
+    frac_q <= in_signal[width-abits-1:width-abits-fbits];
+  end
+
+  // Stage 2: slope * fraction, in one SB_MAC16
+  logic signed [pw-1:0] prod_q;
+  logic signed [width-1:0] base_qq;
+
+  always_ff @(posedge clk_i) begin
+    prod_q <= slope_q * $signed({1'b0, frac_q});
+    base_qq <= base_q;
+  end
+
+  // Add and saturate
+  logic signed [sw-1:0] sum;
+  assign sum = sw'(base_qq) + sw'(prod_q >>> (fbits - shift));
+
+  always_comb begin
+    if (sum > hi) begin
+      out_signal = hi[width-1:0];
+    end else if (sum < lo) begin
+      out_signal = lo[width-1:0];
+    end else begin
+      out_signal = sum[width-1:0];
+    end
+  end
+
+endmodule
@@ -1,5 +1,15 @@
 module overdrive #(
-  parameter int width = 24
+  parameter int width = 24,
+  // 0: combinational case-statement table (softclip_lut, logic cells)
+  // 1: synchronous ROM in BRAM (rom_1r_sync), one more cycle of latency
+  parameter bit use_bram = 0,
+  // 1: linearly interpolated table in BRAM and a DSP (softclip_interp_lut,
+  // see util/softclip_size.py), two more cycles of latency. Overrides
+  // use_bram.
+  parameter bit interpolate /*verilator public*/ = 0,
+  // Registers after the output register, for retiming into the table
+  // lookup to raise fmax.
+  parameter int pipeline = 0
  ) (
   input logic clk,
   input logic rst,
@@ -9,22 +19,57 @@ module overdrive #(
 
 );
 
+  // Cycles from in_signal to out_signal, for the testbench.
+  localparam int latency /*verilator public*/ = (interpolate ? 3 : (use_bram ? 2 : 1)) + pipeline;
+
   logic signed [width-1:0] lut_out;
 
-  softclip_lut #(
-    .width(width)
-    ) lut (
-    .in_signal(in_signal),
-    .out_signal(lut_out)
-  );
+  if (interpolate) begin : g_interp
+    softclip_interp_lut #(
+      .width(width)
+      ) lut (
+      .clk(clk),
+      .in_signal(in_signal),
+      .out_signal(lut_out)
+    );
+  end else if (use_bram) begin : g_bram
+    logic [7:0] addr;
+    assign addr = in_signal[width-1:width-8] + 8'd128;
+
+    rom_1r_sync #(
+      .width_p(width),
+      .depth_p(256),
+      .memh_p("softclip_lut.memh")
+      ) lut (
+      .clk_i(clk),
+      .rd_addr_i(addr),
+      .rd_data_o(lut_out)
+    );
+  end else begin : g_case
+    softclip_lut #(
+      .width(width)
+      ) lut (
+      .in_signal(in_signal),
+      .out_signal(lut_out)
+    );
+  end
+
+  logic signed [width-1:0] stage_q [pipeline+1];
 
   always_ff @(posedge clk) begin 
     if (rst) begin 
-      out_signal <= '0;
+      for (int i = 0; i <= pipeline; i++) begin
+        stage_q[i] <= '0;
+      end
     end else begin 
-      out_signal <= lut_out;
+      stage_q[0] <= lut_out;
+      for (int i = 1; i <= pipeline; i++) begin
+        stage_q[i] <= stage_q[i-1];
+      end
     end
   end
 
+  assign out_signal = stage_q[pipeline];
+
 
 endmodule
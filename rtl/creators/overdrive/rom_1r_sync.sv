@@ -0,0 +1,31 @@
+`ifndef BINPATH
+ `define BINPATH ""
+`endif
+module rom_1r_sync
+  #(parameter [31:0] width_p = 8,
+    parameter [31:0] depth_p = 256,
+    // Generated by util/lut_gen.py. BINPATH is prepended, since
+    // simulators read it relative to their working directory.
+    parameter memh_p = "softclip_lut.memh"
+    ) (
+    input [0:0] clk_i,
+
+    input [$clog2(depth_p) - 1 : 0] rd_addr_i,
+    output [width_p-1:0] rd_data_o
+);
+
+  // Synchronous read with no reset, so that yosys maps it to BRAM
+  // (SB_RAM40_4K) initialized from the memh file.
+  logic [width_p-1:0] mem [0:depth_p-1];
+  initial begin
+     $readmemh({`BINPATH, memh_p}, mem);
+  end
+
+  logic [width_p-1:0] rd_data_l;
+  always_ff @(posedge clk_i) begin 
+    rd_data_l <= mem[rd_addr_i];
+  end
+
+  assign rd_data_o = rd_data_l;
+
+endmodule
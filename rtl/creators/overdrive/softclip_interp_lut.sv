@@ -0,0 +1,24 @@
+// lut_gen: 3396e1c9ebafebd2 -- generated by util/lut_gen.py, do not edit
+module softclip_interp_lut #(
+    parameter int width = 24
+ ) (
+    input logic clk,
+    input logic signed [width-1:0] in_signal,
+    output logic signed [width-1:0] out_signal
+);
+
+    interp_lut #(
+        .width(width),
+        .abits(9),
+        .fbits(15),
+        .cbits(10),
+        .shift(8),
+        .base_memh_p("softclip_interp_lut_base.memh"),
+        .slope_memh_p("softclip_interp_lut_slope.memh")
+      ) lut (
+        .clk_i(clk),
+        .in_signal(in_signal),
+        .out_signal(out_signal)
+    );
+
+endmodule
@@ -0,0 +1,135 @@
+# lut_gen: 3396e1c9ebafebd2 -- generated by util/lut_gen.py, do not edit
+import numpy as np
+
+# {"cbits": 10, "curve": "tanh", "drive": 3.0, "kind": "interp", "module": "softclip_interp_lut", "n": 512, "width": 24}
+BASE = np.array([
+    -8388607, -8387621, -8386611, -8385578, -8384521, -8383438, -8382330, -8381196,
+    -8380035, -8378847, -8377630, -8376385, -8375111, -8373807, -8372472, -8371105,
+    -8369707, -8368275, -8366810, -8365310, -8363775, -8362204, -8360596, -8358950,
+    -8357265, -8355541, -8353776, -8351970, -8350121, -8348229, -8346293, -8344311,
+    -8342282, -8340206, -8338082, -8335907, -8333682, -8331404, -8329073, -8326687,
+    -8324245, -8321747, -8319189, -8316572, -8313894, -8311153, -8308348, -8305478,
+    -8302540, -8299534, -8296458, -8293309, -8290088, -8286791, -8283418, -8279966,
+    -8276433, -8272819, -8269120, -8265335, -8261462, -8257499, -8253445, -8249296,
+    -8245051, -8240707, -8236263, -8231715, -8227063, -8222303, -8217433, -8212450,
+    -8207352, -8202137, -8196801, -8191342, -8185758, -8180045, -8174201, -8168222,
+    -8162106, -8155849, -8149449, -8142903, -8136206, -8129357, -8122350, -8115184,
+    -8107854, -8100357, -8092690, -8084848, -8076827, -8068625, -8060236, -8051658,
+    -8042885, -8033914, -8024740, -8015359, -8005767, -7995959, -7985930, -7975676,
+    -7965193, -7954474, -7943516, -7932314, -7920861, -7909154, -7897186, -7884952,
+    -7872448, -7859666, -7846603, -7833251, -7819605, -7805660, -7791408, -7776844,
+    -7761963, -7746756, -7731218, -7715343, -7699124, -7682553, -7665625, -7648333,
+    -7630669, -7612625, -7594197, -7575374, -7556152, -7536521, -7516474, -7496004,
+    -7475103, -7453764, -7431977, -7409735, -7387031, -7363856, -7340201, -7316058,
+    -7291420, -7266276, -7240620, -7214442, -7187734, -7160487, -7132692, -7104340,
+    -7075422, -7045930, -7015855, -6985188, -6953919, -6922039, -6889540, -6856413,
+    -6822648, -6788237, -6753170, -6717439, -6681033, -6643946, -6606167, -6567688,
+    -6528499, -6488593, -6447961, -6406594, -6364483, -6321620, -6277998, -6233607,
+    -6188441, -6142491, -6095749, -6048208, -5999862, -5950702, -5900722, -5849915,
+    -5798276, -5745797, -5692473, -5638299, -5583268, -5527377, -5470621, -5412994,
+    -5354494, -5295117, -5234859, -5173717, -5111690, -5048775, -4984971, -4920277,
+    -4854691, -4788214, -4720847, -4652589, -4583443, -4513410, -4442493, -4370694,
+    -4298018, -4224468, -4150050, -4074767, -3998627, -3921636, -3843801, -3765130,
+    -3685631, -3605314, -3524187, -3442261, -3359548, -3276058, -3191805, -3106801,
+    -3021059, -2934595, -2847421, -2759556, -2671013, -2581811, -2491966, -2401496,
+    -2310421, -2218758, -2126529, -2033752, -1940450, -1846642, -1752352, -1657602,
+    -1562414, -1466811, -1370818, -1274459, -1177757, -1080738, -983428, -885851,
+    -788033, -690001, -591780, -493398, -394881, -296256, -197549, -98788,
+    0, 98788, 197549, 296256, 394881, 493398, 591780, 690001,
+    788033, 885851, 983428, 1080738, 1177757, 1274459, 1370818, 1466811,
+    1562414, 1657602, 1752352, 1846642, 1940450, 2033752, 2126529, 2218758,
+    2310421, 2401496, 2491966, 2581811, 2671013, 2759556, 2847421, 2934595,
+    3021059, 3106801, 3191805, 3276058, 3359548, 3442261, 3524187, 3605314,
+    3685631, 3765130, 3843801, 3921636, 3998627, 4074767, 4150050, 4224468,
+    4298018, 4370694, 4442493, 4513410, 4583443, 4652589, 4720847, 4788214,
+    4854691, 4920277, 4984971, 5048775, 5111690, 5173717, 5234859, 5295117,
+    5354494, 5412994, 5470621, 5527377, 5583268, 5638299, 5692473, 5745797,
+    5798276, 5849915, 5900722, 5950702, 5999862, 6048208, 6095749, 6142491,
+    6188441, 6233607, 6277998, 6321620, 6364483, 6406594, 6447961, 6488593,
+    6528499, 6567688, 6606167, 6643946, 6681033, 6717439, 6753170, 6788237,
+    6822648, 6856413, 6889540, 6922039, 6953919, 6985188, 7015855, 7045930,
+    7075422, 7104340, 7132692, 7160487, 7187734, 7214442, 7240620, 7266276,
+    7291420, 7316058, 7340201, 7363856, 7387031, 7409735, 7431977, 7453764,
+    7475103, 7496004, 7516474, 7536521, 7556152, 7575374, 7594197, 7612625,
+    7630669, 7648333, 7665625, 7682553, 7699124, 7715343, 7731218, 7746756,
+    7761963, 7776844, 7791408, 7805660, 7819605, 7833251, 7846603, 7859666,
+    7872448, 7884952, 7897186, 7909154, 7920861, 7932314, 7943516, 7954474,
+    7965193, 7975676, 7985930, 7995959, 8005767, 8015359, 8024740, 8033914,
+    8042885, 8051658, 8060236, 8068625, 8076827, 8084848, 8092690, 8100357,
+    8107854, 8115184, 8122350, 8129357, 8136206, 8142903, 8149449, 8155849,
+    8162106, 8168222, 8174201, 8180045, 8185758, 8191342, 8196801, 8202137,
+    8207352, 8212450, 8217433, 8222303, 8227063, 8231715, 8236263, 8240707,
+    8245051, 8249296, 8253445, 8257499, 8261462, 8265335, 8269120, 8272819,
+    8276433, 8279966, 8283418, 8286791, 8290088, 8293309, 8296458, 8299534,
+    8302540, 8305478, 8308348, 8311153, 8313894, 8316572, 8319189, 8321747,
+    8324245, 8326687, 8329073, 8331404, 8333682, 8335907, 8338082, 8340206,
+    8342282, 8344311, 8346293, 8348229, 8350121, 8351970, 8353776, 8355541,
+    8357265, 8358950, 8360596, 8362204, 8363775, 8365310, 8366810, 8368275,
+    8369707, 8371105, 8372472, 8373807, 8375111, 8376385, 8377630, 8378847,
+    8380035, 8381196, 8382330, 8383438, 8384521, 8385578, 8386611, 8387621], dtype=np.int64)
+SLOPE = np.array([
+    4, 4, 4, 4, 4, 4, 4, 5,
+    5, 5, 5, 5, 5, 5, 5, 5,
+    6, 6, 6, 6, 6, 6, 6, 7,
+    7, 7, 7, 7, 7, 8, 8, 8,
+    8, 8, 8, 9, 9, 9, 9, 10,
+    10, 10, 10, 10, 11, 11, 11, 11,
+    12, 12, 12, 13, 13, 13, 13, 14,
+    14, 14, 15, 15, 15, 16, 16, 17,
+    17, 17, 18, 18, 19, 19, 19, 20,
+    20, 21, 21, 22, 22, 23, 23, 24,
+    24, 25, 26, 26, 27, 27, 28, 29,
+    29, 30, 31, 31, 32, 33, 34, 34,
+    35, 36, 37, 37, 38, 39, 40, 41,
+    42, 43, 44, 45, 46, 47, 48, 49,
+    50, 51, 52, 53, 54, 56, 57, 58,
+    59, 61, 62, 63, 65, 66, 68, 69,
+    70, 72, 74, 75, 77, 78, 80, 82,
+    83, 85, 87, 89, 91, 92, 94, 96,
+    98, 100, 102, 104, 106, 109, 111, 113,
+    115, 117, 120, 122, 125, 127, 129, 132,
+    134, 137, 140, 142, 145, 148, 150, 153,
+    156, 159, 162, 164, 167, 170, 173, 176,
+    179, 183, 186, 189, 192, 195, 198, 202,
+    205, 208, 212, 215, 218, 222, 225, 229,
+    232, 235, 239, 242, 246, 249, 253, 256,
+    260, 263, 267, 270, 274, 277, 280, 284,
+    287, 291, 294, 297, 301, 304, 307, 311,
+    314, 317, 320, 323, 326, 329, 332, 335,
+    338, 341, 343, 346, 348, 351, 353, 356,
+    358, 360, 362, 364, 366, 368, 370, 372,
+    373, 375, 376, 378, 379, 380, 381, 382,
+    383, 384, 384, 385, 385, 386, 386, 386,
+    386, 386, 386, 385, 385, 384, 384, 383,
+    382, 381, 380, 379, 378, 376, 375, 373,
+    372, 370, 368, 366, 364, 362, 360, 358,
+    356, 353, 351, 348, 346, 343, 341, 338,
+    335, 332, 329, 326, 323, 320, 317, 314,
+    311, 307, 304, 301, 297, 294, 291, 287,
+    284, 280, 277, 274, 270, 267, 263, 260,
+    256, 253, 249, 246, 242, 239, 235, 232,
+    229, 225, 222, 218, 215, 212, 208, 205,
+    202, 198, 195, 192, 189, 186, 183, 179,
+    176, 173, 170, 167, 164, 162, 159, 156,
+    153, 150, 148, 145, 142, 140, 137, 134,
+    132, 129, 127, 125, 122, 120, 117, 115,
+    113, 111, 109, 106, 104, 102, 100, 98,
+    96, 94, 92, 91, 89, 87, 85, 83,
+    82, 80, 78, 77, 75, 74, 72, 70,
+    69, 68, 66, 65, 63, 62, 61, 59,
+    58, 57, 56, 54, 53, 52, 51, 50,
+    49, 48, 47, 46, 45, 44, 43, 42,
+    41, 40, 39, 38, 37, 37, 36, 35,
+    34, 34, 33, 32, 31, 31, 30, 29,
+    29, 28, 27, 27, 26, 26, 25, 24,
+    24, 23, 23, 22, 22, 21, 21, 20,
+    20, 19, 19, 19, 18, 18, 17, 17,
+    17, 16, 16, 15, 15, 15, 14, 14,
+    14, 13, 13, 13, 13, 12, 12, 12,
+    11, 11, 11, 11, 10, 10, 10, 10,
+    10, 9, 9, 9, 9, 8, 8, 8,
+    8, 8, 8, 7, 7, 7, 7, 7,
+    7, 6, 6, 6, 6, 6, 6, 6,
+    5, 5, 5, 5, 5, 5, 5, 5,
+    5, 4, 4, 4, 4, 4, 4, 4], dtype=np.int64)
+SHIFT = 8
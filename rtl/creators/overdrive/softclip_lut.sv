@@ -1,3 +1,4 @@
+// lut_gen: a417363897a6a715 -- generated by util/lut_gen.py, do not edit
 module softclip_lut #(
     parameter int width = 24
  ) (
@@ -270,4 +271,3 @@ module softclip_lut #(
     end
 
 endmodule
-            
@@ -0,0 +1,37 @@
+# lut_gen: a417363897a6a715 -- generated by util/lut_gen.py, do not edit
+import numpy as np
+
+# {"curve": "tanh", "drive": 3.0, "module": "softclip_lut", "n": 256, "width": 24}
+TABLE = np.array([
+    -8388607, -8386611, -8384521, -8382330, -8380035, -8377630, -8375111, -8372472,
+    -8369707, -8366810, -8363775, -8360596, -8357265, -8353776, -8350121, -8346293,
+    -8342282, -8338082, -8333682, -8329073, -8324245, -8319189, -8313894, -8308348,
+    -8302540, -8296458, -8290088, -8283418, -8276433, -8269120, -8261462, -8253445,
+    -8245051, -8236263, -8227063, -8217433, -8207352, -8196801, -8185758, -8174201,
+    -8162106, -8149449, -8136206, -8122350, -8107854, -8092690, -8076827, -8060236,
+    -8042885, -8024740, -8005767, -7985930, -7965193, -7943516, -7920861, -7897186,
+    -7872448, -7846603, -7819605, -7791408, -7761963, -7731218, -7699124, -7665625,
+    -7630669, -7594197, -7556152, -7516474, -7475103, -7431977, -7387031, -7340201,
+    -7291420, -7240620, -7187734, -7132692, -7075422, -7015855, -6953919, -6889540,
+    -6822648, -6753170, -6681033, -6606167, -6528499, -6447961, -6364483, -6277998,
+    -6188441, -6095749, -5999862, -5900722, -5798276, -5692473, -5583268, -5470621,
+    -5354494, -5234859, -5111690, -4984971, -4854691, -4720847, -4583443, -4442493,
+    -4298018, -4150050, -3998627, -3843801, -3685631, -3524187, -3359548, -3191805,
+    -3021059, -2847421, -2671013, -2491966, -2310421, -2126529, -1940450, -1752352,
+    -1562414, -1370818, -1177757, -983428, -788033, -591780, -394881, -197549,
+    0, 197549, 394881, 591780, 788033, 983428, 1177757, 1370818,
+    1562414, 1752352, 1940450, 2126529, 2310421, 2491966, 2671013, 2847421,
+    3021059, 3191805, 3359548, 3524187, 3685631, 3843801, 3998627, 4150050,
+    4298018, 4442493, 4583443, 4720847, 4854691, 4984971, 5111690, 5234859,
+    5354494, 5470621, 5583268, 5692473, 5798276, 5900722, 5999862, 6095749,
+    6188441, 6277998, 6364483, 6447961, 6528499, 6606167, 6681033, 6753170,
+    6822648, 6889540, 6953919, 7015855, 7075422, 7132692, 7187734, 7240620,
+    7291420, 7340201, 7387031, 7431977, 7475103, 7516474, 7556152, 7594197,
+    7630669, 7665625, 7699124, 7731218, 7761963, 7791408, 7819605, 7846603,
+    7872448, 7897186, 7920861, 7943516, 7965193, 7985930, 8005767, 8024740,
+    8042885, 8060236, 8076827, 8092690, 8107854, 8122350, 8136206, 8149449,
+    8162106, 8174201, 8185758, 8196801, 8207352, 8217433, 8227063, 8236263,
+    8245051, 8253445, 8261462, 8269120, 8276433, 8283418, 8290088, 8296458,
+    8302540, 8308348, 8313894, 8319189, 8324245, 8329073, 8333682, 8338082,
+    8342282, 8346293, 8350121, 8353776, 8357265, 8360596, 8363775, 8366810,
+    8369707, 8372472, 8375111, 8377630, 8380035, 8382330, 8384521, 8386611], dtype=np.int64)
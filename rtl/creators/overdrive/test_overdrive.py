@@ -1,16 +1,24 @@
-import git
 import os
 import sys
-import git
 
-# I don't like this, but it's convenient.
-_REPO_ROOT = git.Repo(search_parent_directories=True).working_tree_dir
-assert (os.path.exists(_REPO_ROOT)), "REPO_ROOT path must exist"
+# REPO_ROOT is set in the simulator by runner(). Otherwise, the root is
+# the nearest parent directory with util/utilities.py.
+_REPO_ROOT = os.environ.get("REPO_ROOT") or os.path.dirname(os.path.realpath(__file__))
+while not os.path.isfile(os.path.join(_REPO_ROOT, "util", "utilities.py")):
+    assert _REPO_ROOT != os.path.dirname(_REPO_ROOT), "REPO_ROOT path must exist"
+    _REPO_ROOT = os.path.dirname(_REPO_ROOT)
 sys.path.append(os.path.join(_REPO_ROOT, "util"))
-from utilities import runner, lint, assert_resolvable
+from utilities import runner, regression, lint, assert_resolvable, check_samples, get_latency
+import golden
+from audio import AudioSource, AudioDriver, AudioMonitor
 tbpath = os.path.dirname(os.path.realpath(__file__))
 
+import lut_gen
+import softclip_lut_table
+import softclip_interp_lut_table
+
 import pytest
+import numpy as np
 
 import cocotb
 
@@ -20,32 +28,34 @@ from cocotb.utils import get_sim_time
 from cocotb.triggers import Timer, ClockCycles, RisingEdge, FallingEdge, with_timeout
 from cocotb.types import LogicArray, Range
 
-from cocotb_test.simulator import run
-
-from cocotbext.axi import AxiLiteBus, AxiLiteMaster, AxiStreamSink, AxiStreamMonitor, AxiStreamBus
-
 from pytest_utils.decorators import max_score, visibility, tags
    
 timescale = "1ps/1ps"
 
 tests =['init_test',
          'soft_clipping',
+         'random_samples',
+         'audio_stream',
+         'ramp_accuracy',
          ]
 
 
 @pytest.mark.parametrize("test_name", tests)
 @pytest.mark.parametrize("simulator", ["verilator", "icarus"])
+@pytest.mark.parametrize("use_bram,interpolate", [(0, 0), (1, 0), (0, 1)])
+@pytest.mark.parametrize("pipeline", [0, 2])
 @max_score(0)
-def test_each(test_name, simulator):
+def test_each(test_name, simulator, use_bram, interpolate, pipeline):
     # This line must be first
     parameters = dict(locals())
     del parameters['test_name']
     del parameters['simulator']
-    runner(simulator, timescale, tbpath, parameters, testname=test_name)
+    regression(simulator, timescale, tbpath, parameters, testname=test_name)
 
 @pytest.mark.parametrize("simulator", ["verilator"])
+@pytest.mark.parametrize("use_bram,interpolate", [(0, 0), (1, 0), (0, 1)])
 @max_score(.4)
-def test_lint(simulator):
+def test_lint(simulator, use_bram, interpolate):
     # This line must be first
     parameters = dict(locals())
     del parameters['simulator']
@@ -60,17 +70,30 @@ def test_style(simulator):
     lint(simulator, timescale, tbpath, parameters, compile_args=["--lint-only", "-Wwarn-style", "-Wno-lint"])
 
 @pytest.mark.parametrize("simulator", ["verilator", "icarus"])
+@pytest.mark.parametrize("use_bram,interpolate", [(0, 0), (1, 0), (0, 1)])
+@pytest.mark.parametrize("pipeline", [0, 2])
 @max_score(1)
-def test_all(simulator):
+def test_all(simulator, use_bram, interpolate, pipeline):
     # This line must be first
     parameters = dict(locals())
     del parameters['simulator']
-    runner(simulator, timescale, tbpath, parameters)
+    regression(simulator, timescale, tbpath, parameters)
 
 ### Begin Tests ###
 
+def model(dut, x):
+    """The golden model of the DUT, for its table parameters."""
+    width = len(dut.in_signal)
+    if int(dut.interpolate.value):
+        t = softclip_interp_lut_table
+        return golden.interp(x, t.BASE, t.SLOPE, t.SHIFT, width)
+    return golden.overdrive(x, width)
+
 tests = ['init_test',
          'soft_clipping',
+         'random_samples',
+         'audio_stream',
+         'ramp_accuracy',
          ]
 
 @cocotb.test()
@@ -99,33 +122,8 @@ async def init_test(dut):
 async def soft_clipping(dut):
     """Hard-clip path passes through when |in| < threshold (softclip=0)."""
     
-    SOFT_LUT = [
-        -8388607, 
-        -8386611, -8384521, -8382330, -8380035, -8377630, -8375111, -8372472, -8369707, -8366810, -8363775, -8360596, 
-        -8357265, -8353776, -8350121, -8346293, -8342282, -8338082, -8333682, -8329073, -8324245, -8319189, -8313894, 
-        -8308348, -8302540, -8296458, -8290088, -8283418, -8276433, -8269120, -8261462, -8253445, -8245051, -8236263, 
-        -8227063, -8217433, -8207352, -8196801, -8185758, -8174201, -8162106, -8149449, -8136206, -8122350, -8107854, 
-        -8092690, -8076827, -8060236, -8042885, -8024740, -8005767, -7985930, -7965193, -7943516, -7920861, -7897186, 
-        -7872448, -7846603, -7819605, -7791408, -7761963, -7731218, -7699124, -7665625, -7630669, -7594197, -7556152, 
-        -7516474, -7475103, -7431977, -7387031, -7340201, -7291420, -7240620, -7187734, -7132692, -7075422, -7015855, 
-        -6953919, -6889540, -6822648, -6753170, -6681033, -6606167, -6528499, -6447961, -6364483, -6277998, -6188441, 
-        -6095749, -5999862, -5900722, -5798276, -5692473, -5583268, -5470621, -5354494, -5234859, -5111690, -4984971,
-        -4854691, -4720847, -4583443, -4442493, -4298018, -4150050, -3998627, -3843801, -3685631, -3524187, -3359548, 
-        -3191805, -3021059, -2847421, -2671013, -2491966, -2310421, -2126529, -1940450, -1752352, -1562414, -1370818, 
-        -1177757, -983428, -788033, -591780, -394881, -197549,
-        0, 
-        197549, 394881, 591780, 788033, 983428, 1177757,
-        1370818, 1562414, 1752352, 1940450, 2126529, 2310421, 2491966, 2671013, 2847421, 3021059, 3191805,
-        3359548, 3524187, 3685631, 3843801, 3998627, 4150050, 4298018, 4442493, 4583443, 4720847, 4854691,
-        4984971, 5111690, 5234859, 5354494, 5470621, 5583268, 5692473, 5798276, 5900722, 5999862, 6095749, 
-        6188441, 6277998, 6364483, 6447961, 6528499, 6606167, 6681033, 6753170, 6822648, 6889540, 6953919,
-        7015855, 7075422, 7132692, 7187734, 7240620, 7291420, 7340201, 7387031, 7431977, 7475103, 7516474, 
-        7556152, 7594197, 7630669, 7665625, 7699124, 7731218, 7761963, 7791408, 7819605, 7846603, 7872448, 
-        7897186, 7920861, 7943516, 7965193, 7985930, 8005767, 8024740, 8042885, 8060236, 8076827, 8092690,
-        8107854, 8122350, 8136206, 8149449, 8162106, 8174201, 8185758, 8196801, 8207352, 8217433, 8227063, 
-        8236263, 8245051, 8253445, 8261462, 8269120, 8276433, 8283418, 8290088, 8296458, 8302540, 8308348, 
-        8313894, 8319189, 8324245, 8329073, 8333682, 8338082, 8342282, 8346293, 8350121, 8353776, 8357265, 
-        8360596, 8363775, 8366810, 8369707, 8372472, 8375111, 8377630, 8380035, 8382330, 8384521, 8386611]
+    # Generated from luts.json by util/lut_gen.py
+    SOFT_LUT = softclip_lut_table.TABLE
     
     assert len(SOFT_LUT) == 256
 
@@ -150,20 +148,93 @@ async def soft_clipping(dut):
         12345, -12345,
     ]
 
-    for x in vectors:
-        dut.in_signal.value = x
-
-        await RisingEdge(dut.clk)
-        await Timer(1, units="ps")
+    if int(dut.interpolate.value):
+        await check_samples(dut, vectors, model(dut, vectors), "softclip_interp")
+        return
 
-        got = dut.out_signal.value.signed_integer
+    exp = []
+    for x in vectors:
         # Interpret x as a signed 24-bit sample (two's complement wrap)
         x24 = x & 0xFFFFFF
         upper = (x24 >> 16) & 0xFF          # bits [23:16]
         addr = (upper + 128) & 0xFF
-        exp = SOFT_LUT[addr]
+        exp.append(SOFT_LUT[addr])
+
+    # The scoreboard lines the outputs up with the inputs, however many
+    # registers the table and the pipeline add.
+    await check_samples(dut, vectors, exp, "softclip_lut_test")
+
+@cocotb.test()
+async def random_samples(dut):
+    """Random full-scale samples match the golden model."""
+
+    cocotb.start_soon(Clock(dut.clk, 10, units="ns").start())
+
+    # Reset
+    dut.rst.value = 1
+    dut.in_signal.value = 0
+    await ClockCycles(dut.clk, 2)
+    dut.rst.value = 0
+    await ClockCycles(dut.clk, 1)
+
+    width = len(dut.in_signal)
+    rng = np.random.default_rng(0)
+    x = rng.integers(-(1 << (width - 1)), 1 << (width - 1), 20000)
+    await check_samples(dut, x, model(dut, x), "random_samples")
+
+@cocotb.test()
+async def audio_stream(dut):
+    """Streamed audio matches the golden model. Set AUDIO_FILE to a .wav
+    or .npy recording to use it instead of a synthesized pluck."""
+
+    cocotb.start_soon(Clock(dut.clk, 10, units="ns").start())
+
+    # Reset
+    dut.rst.value = 1
+    dut.in_signal.value = 0
+    await ClockCycles(dut.clk, 2)
+    dut.rst.value = 0
+    await ClockCycles(dut.clk, 1)
+
+    width = len(dut.in_signal)
+    path = os.environ.get("AUDIO_FILE")
+    if path is None:
+        # 0.1 s of a decaying 110 Hz note with a few harmonics at 48 kHz
+        t = np.arange(4800) / 48000
+        note = sum(np.sin(2 * np.pi * 110 * k * t) / k for k in range(1, 6)) * np.exp(-8 * t)
+        path = "pluck.npy"
+        np.save(path, np.round(note / np.abs(note).max() * ((1 << (width - 1)) - 1)).astype(np.int64))
+
+    source = AudioSource(path, width)
+    monitor = AudioMonitor(dut.clk, dut.out_signal, len(source), reference=model(dut, source.read()),
+                           latency=get_latency(dut))
+    driver = AudioDriver(dut.clk, dut.in_signal, source)
+
+    monitor.start(driver)
+    await driver.run()
+    await monitor.wait()
+    monitor.check()
+
+@cocotb.test()
+async def ramp_accuracy(dut):
+    """A full-scale ramp matches the golden model, and the interpolated
+    table is within 16-bit accuracy of the floating point curve."""
+
+    cocotb.start_soon(Clock(dut.clk, 10, units="ns").start())
+
+    # Reset
+    dut.rst.value = 1
+    dut.in_signal.value = 0
+    await ClockCycles(dut.clk, 2)
+    dut.rst.value = 0
+    await ClockCycles(dut.clk, 1)
+
+    width = len(dut.in_signal)
+    x = np.linspace(-(1 << (width - 1)), (1 << (width - 1)) - 1, 8192).astype(np.int64)
+    got = await check_samples(dut, x, model(dut, x), "ramp_accuracy")
 
-        assert got == exp, (
-            f"softclip_lut_test: in={x}, expected={exp}, got={got}, "
-            f"t={get_sim_time(units='ns')} ns"
-        )
\ No newline at end of file
+    if int(dut.interpolate.value):
+        maxi = (1 << (width - 1)) - 1
+        ref = lut_gen.CURVES["tanh"](x / float(1 << (width - 1)), 3.0) * maxi
+        err = np.abs(got - ref).max()
+        assert err <= 1 << (width - 16), f"ramp_accuracy: max error {err:.1f} LSBs"
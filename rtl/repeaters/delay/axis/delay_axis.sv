@@ -0,0 +1,60 @@
+// delay with AXI-Stream input and output (see axis_adapter). The delay
+// line only advances on accepted samples.
+module delay_axis #(
+  parameter int width = 24,
+  parameter int delay = 480,
+  parameter bit compand /*verilator public*/ = 0
+ ) (
+  input logic clk,
+  input logic rst,
+
+  input logic signed [width-1:0] s_axis_tdata,
+  input logic s_axis_tvalid,
+  output logic s_axis_tready,
+
+  output logic signed [width-1:0] m_axis_tdata,
+  output logic m_axis_tvalid,
+  input logic m_axis_tready,
+
+  input logic [7:0] feedback,
+  input logic [8:0] mix
+);
+
+  // The latency of delay, which can't be read from the instance.
+  localparam int latency /*verilator public*/ = 1;
+
+  logic en;
+  logic signed [width-1:0] fx_in, fx_out;
+
+  axis_adapter #(
+    .width_p(width),
+    .latency_p(latency)
+   ) adapter (
+    .clk_i(clk),
+    .reset_i(rst),
+    .s_axis_tdata(s_axis_tdata),
+    .s_axis_tvalid(s_axis_tvalid),
+    .s_axis_tready(s_axis_tready),
+    .m_axis_tdata(m_axis_tdata),
+    .m_axis_tvalid(m_axis_tvalid),
+    .m_axis_tready(m_axis_tready),
+    .en_o(en),
+    .data_o(fx_in),
+    .data_i(fx_out)
+  );
+
+  delay #(
+    .width(width),
+    .delay(delay),
+    .compand(compand)
+   ) fx (
+    .clk(clk),
+    .rst(rst),
+    .en(en),
+    .in_signal(fx_in),
+    .out_signal(fx_out),
+    .feedback(feedback),
+    .mix(mix)
+  );
+
+endmodule
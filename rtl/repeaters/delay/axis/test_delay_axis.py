@@ -0,0 +1,121 @@
+import os
+import sys
+
+# REPO_ROOT is set in the simulator by runner(). Otherwise, the root is
+# the nearest parent directory with util/utilities.py.
+_REPO_ROOT = os.environ.get("REPO_ROOT") or os.path.dirname(os.path.realpath(__file__))
+while not os.path.isfile(os.path.join(_REPO_ROOT, "util", "utilities.py")):
+    assert _REPO_ROOT != os.path.dirname(_REPO_ROOT), "REPO_ROOT path must exist"
+    _REPO_ROOT = os.path.dirname(_REPO_ROOT)
+sys.path.append(os.path.join(_REPO_ROOT, "util"))
+from utilities import runner, regression, lint
+from axistream import (start, samples, check, random_pauses,
+                       check_reset, check_full_rate, check_backpressure, check_random_valid)
+import golden
+tbpath = os.path.dirname(os.path.realpath(__file__))
+
+import pytest
+
+import cocotb
+
+from pytest_utils.decorators import max_score, visibility, tags
+   
+timescale = "1ps/1ps"
+
+tests =['init_test',
+         'full_rate',
+         'random_backpressure',
+         'random_valid',
+         'feedback_gaps',
+         ]
+
+
+@pytest.mark.parametrize("test_name", tests)
+@pytest.mark.parametrize("simulator", ["verilator", "icarus"])
+@pytest.mark.parametrize("compand", [0, 1])
+@max_score(0)
+def test_each(test_name, simulator, compand):
+    # This line must be first
+    parameters = dict(locals())
+    del parameters['test_name']
+    del parameters['simulator']
+    regression(simulator, timescale, tbpath, parameters, testname=test_name)
+
+@pytest.mark.parametrize("simulator", ["verilator"])
+@max_score(.4)
+def test_lint(simulator):
+    # This line must be first
+    parameters = dict(locals())
+    del parameters['simulator']
+    lint(simulator, timescale, tbpath, parameters)
+
+@pytest.mark.parametrize("simulator", ["verilator"])
+@max_score(.1)
+def test_style(simulator):
+    # This line must be first
+    parameters = dict(locals())
+    del parameters['simulator']
+    lint(simulator, timescale, tbpath, parameters, compile_args=["--lint-only", "-Wwarn-style", "-Wno-lint"])
+
+@pytest.mark.parametrize("simulator", ["verilator", "icarus"])
+@pytest.mark.parametrize("compand", [0, 1])
+@max_score(1)
+def test_all(simulator, compand):
+    # This line must be first
+    parameters = dict(locals())
+    del parameters['simulator']
+    regression(simulator, timescale, tbpath, parameters)
+
+### Begin Tests ###
+
+tests = ['init_test',
+         'full_rate',
+         'random_backpressure',
+         'random_valid',
+         'feedback_gaps',
+         ]
+
+# The default delay of delay.sv, in samples
+delay = 480
+
+def reference(dut, x, feedback=0, mix=256):
+    """The output of delay.sv for x, delayed by samples rather than cycles.
+    By default the output is only the delayed signal, so any slip in the
+    delay line shows."""
+    return golden.delay(x, delay, len(dut.s_axis_tdata), feedback, mix, int(dut.compand.value))
+
+@cocotb.test()
+async def init_test(dut):
+    """Basic connectivity + reset behavior."""
+    await check_reset(dut, feedback=0, mix=256)
+
+@cocotb.test()
+async def full_rate(dut):
+    """With a sink that never pauses, one sample goes through per cycle."""
+    await check_full_rate(dut, reference, feedback=0, mix=256)
+
+@cocotb.test()
+async def random_backpressure(dut):
+    """With a sink that pauses 30% of cycles, the wrapper always has a
+    sample ready for it."""
+    await check_backpressure(dut, reference, feedback=0, mix=256)
+
+@cocotb.test()
+async def random_valid(dut):
+    """With gaps in the input and backpressure on the output, the output
+    is the same as without them."""
+    await check_random_valid(dut, reference, feedback=0, mix=256)
+
+@cocotb.test()
+async def feedback_gaps(dut):
+    """With feedback and a mix of dry and delayed signal, gaps in the
+    input and backpressure on the output, the output matches the golden
+    model exactly."""
+    stream = await start(dut, feedback=200, mix=128)
+    stream.source.set_pause_generator(random_pauses(0.3, seed=4))
+    stream.sink.set_pause_generator(random_pauses(0.3, seed=5))
+
+    # Half scale, so that the echoes add up without saturating at once
+    x = samples(dut, 6 * delay) >> 1
+    y = await stream.run(x)
+    check("feedback_gaps", y, reference(dut, x, 200, 128))
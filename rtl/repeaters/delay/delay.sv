@@ -1,16 +1,157 @@
+// Delay with feedback and a dry/wet mix. The delay line is a circular
+// buffer in one ram_1r1w_sync, which yosys maps to BRAM:
+//
+//   d = the sample written delay samples ago (0 until it is full)
+//   written = saturate(in_signal + d * feedback / 256)
+//   out_signal = in_signal + (d - in_signal) * mix / 256
+//
+// With compand=1 the buffer holds 12-bit codes instead of samples (see
+// golden.compress()), for twice the delay in the same memory. In the
+// UP5K's 30 BRAMs that is 5120 samples (107 ms at 48 kHz) of 24-bit
+// samples, or 10240 (213 ms) companded.
 module delay #(
   parameter int width = 24,
-  parameter int delay = 480 // 10 ms at 48 kHz
+  parameter int delay = 480, // 10 ms at 48 kHz; at least 2
+  // Store 12-bit companded samples (width at most 24)
+  parameter bit compand /*verilator public*/ = 0
  ) (
   input logic clk,
   input logic rst,
 
+  // High when in_signal carries a sample; the delay line only advances then
+  input logic en,
   input logic signed [width-1:0] in_signal,
-  output logic signed [width-1:0] out_signal
+  output logic signed [width-1:0] out_signal,
 
+  // Gain of the delayed signal written back, in 256ths
+  input logic [7:0] feedback,
+  // Level of the delayed signal in the output, in 256ths (256 is only
+  // the delayed signal)
+  input logic [8:0] mix
 );
 
-  
+  // Cycles from in_signal to out_signal, for the testbench.
+  localparam int latency /*verilator public*/ = 1;
 
+  localparam int mem_width = compand ? 12 : width;
+  localparam int aw = $clog2(delay);
+
+  // The buffer is read at the edge that takes a sample, and the sample
+  // plus feedback is written back to the same address at the next
+  // edge, once the read data is there.
+  logic [aw-1:0] ptr_q, wr_ptr_q;
+  logic [$clog2(delay + 1)-1:0] count_q;
+  logic filled_q, wr_q;
+  logic signed [width-1:0] dry_q;
+  logic [mem_width-1:0] rd_data, wr_data;
+
+  ram_1r1w_sync #(
+    .width_p(mem_width),
+    .depth_p(delay)
+   ) mem (
+    .clk_i(clk),
+    .reset_i(rst),
+    .wr_valid_i(wr_q),
+    .wr_data_i(wr_data),
+    .wr_addr_i(wr_ptr_q),
+    .rd_valid_i(en),
+    .rd_addr_i(ptr_q),
+    .rd_data_o(rd_data)
+  );
+
+  always_ff @(posedge clk) begin
+    if (rst) begin
+      ptr_q <= '0;
+      wr_ptr_q <= '0;
+      count_q <= '0;
+      filled_q <= 1'b0;
+      wr_q <= 1'b0;
+      dry_q <= '0;
+    end else begin
+      wr_q <= en;
+      if (en) begin
+        dry_q <= in_signal;
+        wr_ptr_q <= ptr_q;
+        ptr_q <= (ptr_q == aw'(delay - 1)) ? '0 : ptr_q + 1'b1;
+        // The memory isn't reset, so what is read before it has been
+        // written once is silenced.
+        filled_q <= (count_q == ($clog2(delay + 1))'(delay));
+        if (count_q != ($clog2(delay + 1))'(delay)) begin
+          count_q <= count_q + 1'b1;
+        end
+      end
+    end
+  end
+
+  // The delayed sample, and what is written back
+  logic signed [width-1:0] stored, wet, dry_w;
+
+  if (compand) begin : g_compand
+    // Sign, 4-bit exponent, and 7-bit mantissa of the magnitude without
+    // its LSB
+    logic [width-1:0] mag;
+    logic [width-3:0] mag1;
+    logic [3:0] exp_w;
+    logic [6:0] man_w;
+    logic [width-3:0] dec;
+
+    always_comb begin
+      mag = dry_w[width-1] ? -dry_w : dry_w;
+      // The most negative sample has no positive counterpart
+      if (mag[width-1]) begin
+        mag = {1'b0, {(width-1){1'b1}}};
+      end
+      mag1 = mag[width-2:1];
+      exp_w = '0;
+      for (int k = 0; k < 15; k++) begin
+        if (k + 7 < width - 2 && mag1 >= (width-2)'(128 << k)) begin
+          exp_w = 4'(k + 1);
+        end
+      end
+      man_w = (exp_w == '0) ? mag1[6:0] : 7'(mag1 >> (exp_w - 1));
+    end
+
+    assign wr_data = {dry_w[width-1], exp_w, man_w};
+
+    always_comb begin
+      if (rd_data[10:7] == '0) begin
+        dec = (width-2)'(rd_data[6:0]);
+      end else begin
+        dec = (width-2)'({1'b1, rd_data[6:0]}) << (rd_data[10:7] - 1);
+      end
+      stored = rd_data[11] ? -{dec, 1'b0} : {1'b0, dec, 1'b0};
+    end
+  end else begin : g_plain
+    assign wr_data = dry_w;
+    assign stored = rd_data;
+  end
+
+  assign wet = filled_q ? stored : '0;
+
+  // Written back: the input plus the feedback, saturated
+  localparam logic signed [width+1:0] hi = (width+2)'((1 <<< (width - 1)) - 1);
+  localparam logic signed [width+1:0] lo = -hi - 1;
+  logic signed [width+9:0] fb_prod;
+  logic signed [width+1:0] fb_sum;
+
+  assign fb_prod = wet * $signed({1'b0, feedback});
+  assign fb_sum = (width+2)'(dry_q) + (width+2)'(fb_prod >>> 8);
+
+  always_comb begin
+    if (fb_sum > hi) begin
+      dry_w = hi[width-1:0];
+    end else if (fb_sum < lo) begin
+      dry_w = lo[width-1:0];
+    end else begin
+      dry_w = fb_sum[width-1:0];
+    end
+  end
+
+  // The output: the input, moved toward the delayed sample by mix
+  logic signed [width:0] diff;
+  logic signed [width+10:0] mix_prod;
+  assign diff = wet - dry_q;
+  assign mix_prod = diff * $signed({1'b0, mix});
+  assign out_signal = dry_q + width'(mix_prod >>> 8);
 
 endmodule
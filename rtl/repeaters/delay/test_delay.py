@@ -0,0 +1,209 @@
+import os
+import sys
+
+# REPO_ROOT is set in the simulator by runner(). Otherwise, the root is
+# the nearest parent directory with util/utilities.py.
+_REPO_ROOT = os.environ.get("REPO_ROOT") or os.path.dirname(os.path.realpath(__file__))
+while not os.path.isfile(os.path.join(_REPO_ROOT, "util", "utilities.py")):
+    assert _REPO_ROOT != os.path.dirname(_REPO_ROOT), "REPO_ROOT path must exist"
+    _REPO_ROOT = os.path.dirname(_REPO_ROOT)
+sys.path.append(os.path.join(_REPO_ROOT, "util"))
+from utilities import runner, regression, lint, assert_resolvable, check_samples, get_latency
+import golden
+from audio import AudioSource, AudioDriver, AudioMonitor
+tbpath = os.path.dirname(os.path.realpath(__file__))
+
+import numpy as np
+
+import pytest
+
+import cocotb
+
+from cocotb.clock import Clock
+from cocotb.regression import TestFactory
+from cocotb.utils import get_sim_time
+from cocotb.triggers import Timer, ClockCycles, RisingEdge, FallingEdge, with_timeout
+from cocotb.types import LogicArray, Range
+
+from pytest_utils.decorators import max_score, visibility, tags
+
+timescale = "1ps/1ps"
+
+tests =['init_test',
+         'pure_delay',
+         'dry_only',
+         'feedback_mix',
+         'feedback_saturation',
+         'audio_stream',
+         ]
+
+
+@pytest.mark.parametrize("test_name", tests)
+@pytest.mark.parametrize("simulator", ["verilator", "icarus"])
+@pytest.mark.parametrize("compand", [0, 1])
+@max_score(0)
+def test_each(test_name, simulator, compand):
+    # This line must be first
+    parameters = dict(locals())
+    del parameters['test_name']
+    del parameters['simulator']
+    regression(simulator, timescale, tbpath, parameters, testname=test_name)
+
+@pytest.mark.parametrize("simulator", ["verilator"])
+@max_score(.4)
+def test_lint(simulator):
+    # This line must be first
+    parameters = dict(locals())
+    del parameters['simulator']
+    lint(simulator, timescale, tbpath, parameters)
+
+@pytest.mark.parametrize("simulator", ["verilator"])
+@max_score(.1)
+def test_style(simulator):
+    # This line must be first
+    parameters = dict(locals())
+    del parameters['simulator']
+    lint(simulator, timescale, tbpath, parameters, compile_args=["--lint-only", "-Wwarn-style", "-Wno-lint"])
+
+@pytest.mark.parametrize("simulator", ["verilator", "icarus"])
+@pytest.mark.parametrize("compand", [0, 1])
+@max_score(1)
+def test_all(simulator, compand):
+    # This line must be first
+    parameters = dict(locals())
+    del parameters['simulator']
+    regression(simulator, timescale, tbpath, parameters)
+
+### Begin Tests ###
+
+tests = ['init_test',
+         'pure_delay',
+         'dry_only',
+         'feedback_mix',
+         'feedback_saturation',
+         'audio_stream',
+         ]
+
+# The default delay of delay.sv, in samples
+delay = 480
+
+def model(dut, x, feedback, mix):
+    """ The golden model for the parameters dut was built with. """
+    return golden.delay(x, delay, len(dut.in_signal), feedback, mix, int(dut.compand.value))
+
+async def reset(dut, feedback, mix):
+    """ Set the controls and reset. """
+    dut.rst.value = 1
+    dut.en.value = 0
+    dut.in_signal.value = 0
+    dut.feedback.value = feedback
+    dut.mix.value = mix
+    await ClockCycles(dut.clk, 2)
+    dut.rst.value = 0
+    await ClockCycles(dut.clk, 1)
+
+@cocotb.test()
+async def init_test(dut):
+    """Basic connectivity + reset behavior."""
+
+    # Start clock
+    cocotb.start_soon(Clock(dut.clk, 10, units="ns").start())
+
+    # Apply reset
+    dut.rst.value = 1
+    dut.en.value = 0
+    dut.in_signal.value = 0
+    dut.feedback.value = 0
+    dut.mix.value = 0
+
+    # Hold reset for a couple cycles
+    await ClockCycles(dut.clk, 2)
+
+    # Release reset
+    dut.rst.value = 0
+    await RisingEdge(dut.clk)
+    await Timer(1, units="ps")
+
+    # Now the output MUST be valid
+    assert_resolvable(dut.out_signal)
+
+@cocotb.test()
+async def pure_delay(dut):
+    """With mix 256 and no feedback the output is the input delay samples
+    earlier, and silent until then."""
+
+    cocotb.start_soon(Clock(dut.clk, 10, units="ns").start())
+    await reset(dut, 0, 256)
+
+    width = len(dut.in_signal)
+    rng = np.random.default_rng(0)
+    x = rng.integers(-(1 << (width - 1)), 1 << (width - 1), 4 * delay)
+    await check_samples(dut, x, model(dut, x, 0, 256), "pure_delay")
+
+@cocotb.test()
+async def dry_only(dut):
+    """With mix 0 the output is the input, whatever the delay line holds."""
+
+    cocotb.start_soon(Clock(dut.clk, 10, units="ns").start())
+    await reset(dut, 128, 0)
+
+    width = len(dut.in_signal)
+    rng = np.random.default_rng(1)
+    x = rng.integers(-(1 << (width - 1)), 1 << (width - 1), 3 * delay)
+    await check_samples(dut, x, x, "dry_only")
+
+@cocotb.test()
+async def feedback_mix(dut):
+    """Repeating echoes of half-scale noise mixed with the dry signal
+    match the golden model."""
+
+    cocotb.start_soon(Clock(dut.clk, 10, units="ns").start())
+    await reset(dut, 200, 128)
+
+    width = len(dut.in_signal)
+    rng = np.random.default_rng(2)
+    x = rng.integers(-(1 << (width - 2)), 1 << (width - 2), 6 * delay)
+    await check_samples(dut, x, model(dut, x, 200, 128), "feedback_mix")
+
+@cocotb.test()
+async def feedback_saturation(dut):
+    """Full feedback of full-scale samples saturates what is written back
+    instead of wrapping it."""
+
+    cocotb.start_soon(Clock(dut.clk, 10, units="ns").start())
+    await reset(dut, 255, 256)
+
+    width = len(dut.in_signal)
+    hi = (1 << (width - 1)) - 1
+    x = np.tile(np.repeat([hi, -hi - 1], delay // 4), 8)
+    await check_samples(dut, x, model(dut, x, 255, 256), "feedback_saturation")
+
+@cocotb.test()
+async def audio_stream(dut):
+    """Streamed audio through echoes matches the golden model. Set
+    AUDIO_FILE to a .wav or .npy recording to use it instead of a
+    synthesized pluck."""
+
+    cocotb.start_soon(Clock(dut.clk, 10, units="ns").start())
+    await reset(dut, 160, 96)
+    dut.en.value = 1
+
+    width = len(dut.in_signal)
+    path = os.environ.get("AUDIO_FILE")
+    if path is None:
+        # 1 s of a decaying 110 Hz note with a few harmonics at 48 kHz,
+        # long enough for the echoes to die away
+        t = np.arange(48000) / 48000
+        note = sum(np.sin(2 * np.pi * 110 * k * t) / k for k in range(1, 6)) * np.exp(-8 * t)
+        path = "pluck.npy"
+        np.save(path, np.round(note / np.abs(note).max() * ((1 << (width - 2)) - 1)).astype(np.int64))
+
+    source = AudioSource(path, width)
+    monitor = AudioMonitor(dut.clk, dut.out_signal, len(source), reference=model(dut, source.read(), 160, 96),
+                           latency=get_latency(dut))
+    driver = AudioDriver(dut.clk, dut.in_signal, source)
+
+    monitor.start(driver)
+    await driver.run()
+    await monitor.wait()
+    monitor.check()
@@ -0,0 +1,234 @@
+# Streaming audio stimulus and capture for cocotb tests. Audio is read
+# from a WAV file or a (memory-mapped) .npy file one chunk at a time,
+# driven into in_signal one sample per clock, and out_signal is
+# captured into a preallocated array and compared to a reference chunk
+# by chunk. Nothing is ever held in Python lists, so a test can run
+# minutes of real audio, e.g.:
+#
+#   source = AudioSource("riff.wav", width=24)
+#   ref = golden.overdrive(source.read(), 24)
+#   monitor = AudioMonitor(dut.clk, dut.out_signal, len(source), reference=ref)
+#   driver = AudioDriver(dut.clk, dut.in_signal, source)
+#   monitor.start(driver)
+#   await driver.run()
+#   await monitor.wait()
+#   monitor.check()
+#
+# Timing follows golden.py: sample n is driven before rising edge n
+# (on the falling edge, like reset_sequence()) and the output captured
+# for it is out_signal just after rising edge n + latency - 1.
+
+import os
+import wave
+
+import numpy as np
+
+import cocotb
+from cocotb.triggers import RisingEdge, FallingEdge, ReadOnly, Event
+
+class AudioSource:
+    """ A mono stream of signed integer samples of width bits, read from
+    a .wav or .npy file in chunks. Multi-channel files use the first
+    channel. """
+
+    def __init__(self, path, width=24, chunk_size=4096, channel=0):
+        self.path = path
+        self.width = width
+        self.chunk_size = chunk_size
+        self.channel = channel
+
+        if path.endswith(".npy"):
+            # Memory-mapped: only the pages that are read get loaded.
+            self.data = np.load(path, mmap_mode="r")
+            assert np.issubdtype(self.data.dtype, np.integer), f"{path} must hold integer samples"
+            if self.data.ndim > 1:
+                self.data = self.data[:, channel]
+            self.bits = width
+            self.rate = None
+            self.length = len(self.data)
+        else:
+            self.data = None
+            with wave.open(path, "rb") as w:
+                self.bits = 8 * w.getsampwidth()
+                self.channels = w.getnchannels()
+                self.rate = w.getframerate()
+                self.length = w.getnframes()
+
+    def __len__(self):
+        return self.length
+
+    def chunks(self):
+        """ Yield (offset, samples) pairs, where samples is an int64
+        array of up to chunk_size samples starting at offset. """
+        if self.data is not None:
+            for s in range(0, self.length, self.chunk_size):
+                yield s, np.asarray(self.data[s:s + self.chunk_size], dtype=np.int64)
+            return
+
+        with wave.open(self.path, "rb") as w:
+            s = 0
+            while s < self.length:
+                frames = w.readframes(self.chunk_size)
+                x = decode_pcm(frames, self.bits, self.channels)[:, self.channel]
+                yield s, rescale(x, self.bits, self.width)
+                s += len(x)
+
+    def read(self):
+        """ Get the whole stream as one array (e.g. to compute a
+        reference). """
+        x = np.empty(self.length, dtype=np.int64)
+        for s, chunk in self.chunks():
+            x[s:s + len(chunk)] = chunk
+        return x
+
+def decode_pcm(frames, bits, channels):
+    """ Get an (n, channels) int64 array from little-endian PCM bytes.
+
+    Arguments:
+    frames -- Bytes read from a WAV file
+    bits -- Bits per sample (8, 16, 24 or 32)
+    channels -- Number of interleaved channels
+    """
+    if bits == 8:
+        # 8-bit WAV is unsigned
+        x = np.frombuffer(frames, dtype=np.uint8).astype(np.int64) - 128
+    elif bits == 24:
+        b = np.frombuffer(frames, dtype=np.uint8).reshape(-1, 3).astype(np.int64)
+        x = b[:, 0] | (b[:, 1] << 8) | (b[:, 2] << 16)
+        x = x - ((x & 0x800000) << 1)
+    else:
+        x = np.frombuffer(frames, dtype=f"<i{bits // 8}").astype(np.int64)
+    return x.reshape(-1, channels)
+
+def rescale(x, bits, width):
+    """ Rescale full-scale samples of bits bits to width bits. """
+    if width >= bits:
+        return x << (width - bits)
+    return x >> (bits - width)
+
+def write_wav(path, x, width=24, rate=48000):
+    """ Write samples of width bits to a mono 24-bit WAV file, e.g. to
+    listen to a captured output.
+
+    Arguments:
+    path -- Output file
+    x -- Array of signed samples
+    width -- Width of the samples in bits
+    rate -- Sample rate in Hz
+    """
+    x = rescale(np.asarray(x, dtype=np.int64), width, 24)
+    b = np.empty((len(x), 3), dtype=np.uint8)
+    b[:, 0] = x & 0xFF
+    b[:, 1] = (x >> 8) & 0xFF
+    b[:, 2] = (x >> 16) & 0xFF
+    with wave.open(path, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(3)
+        w.setframerate(rate)
+        w.writeframes(b.tobytes())
+
+class AudioDriver:
+    """ Drives an AudioSource into a signal, one sample per clock,
+    assigning on the falling edge. """
+
+    def __init__(self, clk, signal, source):
+        self.clk = clk
+        self.signal = signal
+        self.source = source
+        # Set once the first sample is on the signal.
+        self.started = Event()
+
+    async def run(self):
+        for _, chunk in self.source.chunks():
+            for v in chunk:
+                await FallingEdge(self.clk)
+                self.signal.value = int(v)
+                self.started.set()
+        await FallingEdge(self.clk)
+
+class AudioMonitor:
+    """ Captures a signal into a preallocated array once per rising
+    edge, and compares every completed chunk to a reference.
+
+    Arguments:
+    clk -- Clock signal
+    signal -- Signal to capture (signed)
+    length -- Number of samples to capture
+    reference -- Optional array-like (e.g. a golden model output, or a
+                 memory-mapped .npy) with the expected samples
+    tolerance -- Largest allowed absolute difference to the reference
+    chunk_size -- Samples per comparison
+    latency -- Register latency between the driven and captured signal,
+               or None (what utilities.get_latency() returns for a DUT
+               that declares none) for 1
+    path -- If given, capture into a memory-mapped .npy file here
+    """
+
+    def __init__(self, clk, signal, length, reference=None, tolerance=0, chunk_size=4096, latency=1, path=None):
+        self.clk = clk
+        self.signal = signal
+        self.length = length
+        self.reference = reference
+        self.tolerance = tolerance
+        self.chunk_size = chunk_size
+        # Said so in the report, since a wrong latency makes every
+        # sample differ.
+        self.assumed = latency is None
+        self.latency = 1 if latency is None else latency
+
+        if path is None:
+            self.data = np.zeros(length, dtype=np.int64)
+        else:
+            self.data = np.lib.format.open_memmap(path, mode="w+", dtype=np.int64, shape=(length,))
+
+        self.mismatches = 0
+        self.first_mismatch = None
+        self.done = Event()
+        self._task = None
+
+    def start(self, driver):
+        """ Start capturing, aligned to the first sample of driver. """
+        self._task = cocotb.start_soon(self._run(driver.started))
+
+    async def wait(self):
+        await self.done.wait()
+
+    async def _run(self, started):
+        await started.wait()
+        # The first sample is in_signal at the next rising edge, and
+        # its output appears latency - 1 edges later.
+        for _ in range(self.latency - 1):
+            await RisingEdge(self.clk)
+
+        checked = 0
+        for i in range(self.length):
+            await RisingEdge(self.clk)
+            await ReadOnly()
+            self.data[i] = self.signal.value.signed_integer
+            if i + 1 - checked == self.chunk_size or i + 1 == self.length:
+                self._compare(checked, i + 1)
+                checked = i + 1
+        self.done.set()
+
+    def _compare(self, s, e):
+        if self.reference is None:
+            return
+        ref = np.asarray(self.reference[s:e], dtype=np.int64)
+        bad = np.flatnonzero(np.abs(self.data[s:e] - ref) > self.tolerance)
+        if len(bad):
+            self.mismatches += len(bad)
+            if self.first_mismatch is None:
+                i = s + bad[0]
+                self.first_mismatch = (i, int(ref[bad[0]]), int(self.data[i]))
+            self.signal._log.warning(f"{len(bad)} mismatches in samples {s}..{e - 1}")
+
+    def check(self):
+        """ Assert that every captured sample matched the reference. """
+        if self.mismatches:
+            i, exp, got = self.first_mismatch
+            msg = (f"{self.mismatches} of {self.length} samples differ from the reference "
+                   f"by more than {self.tolerance}; first at sample {i}: expected={exp}, got={got}")
+            if self.assumed:
+                msg += ("; latency 1 was assumed, since the DUT declares none "
+                        "(a latency localparam marked /*verilator public*/)")
+            raise AssertionError(msg)
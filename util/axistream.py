@@ -0,0 +1,216 @@
+# AXI-Stream stimulus and throughput measurement for the effect
+# wrappers in the axis/ directories (see rtl/components/axis_adapter).
+# Samples go in through cocotbext-axi's AxiStreamSource and come out of
+# its AxiStreamSink one sample per beat, while a monitor counts the
+# handshakes on both sides every cycle:
+#
+#   stream = AxisStream(dut)
+#   stream.sink.set_pause_generator(random_pauses(0.3))
+#   y = await stream.run(x)
+#   assert stream.bubbles == 0, stream.report()
+#
+# An effect keeps up at full rate when its output is never what holds
+# the stream back: there are no bubbles (cycles in which the sink was
+# ready but the wrapper had no sample for it) between the first and
+# the last output, and with a sink that never pauses the wrapper takes
+# one sample every cycle.
+#
+# Every wrapper's test module runs the same checks of that, given the
+# effect's golden model and the values of its other inputs:
+#
+#   def reference(dut, x):
+#       return golden.distortion(x, threshold, len(dut.s_axis_tdata))
+#
+#   @cocotb.test()
+#   async def full_rate(dut):
+#       await check_full_rate(dut, reference, threshold=threshold)
+
+import logging
+
+import numpy as np
+
+import cocotb
+from cocotb.clock import Clock
+from cocotb.triggers import Timer, ClockCycles, RisingEdge
+from cocotbext.axi import AxiStreamBus, AxiStreamSource, AxiStreamSink
+
+from golden import wrap
+from utilities import assert_resolvable
+
+def random_pauses(probability, seed=0):
+    """ Get a pause generator for a cocotbext-axi source or sink that
+    pauses each cycle with the given probability.
+
+    Arguments:
+    probability -- Fraction of cycles to pause
+    seed -- Seed of the random sequence
+    """
+    rng = np.random.default_rng(seed)
+    while True:
+        yield bool(rng.random() < probability)
+
+class AxisStream:
+    """ Streams samples through the s_axis and m_axis ports of a
+    wrapper, and counts what happened on them. After run():
+
+    cycles -- Cycles from the first accepted sample to the last output
+    stalls -- Cycles the source had a sample the wrapper didn't accept
+    bubbles -- Cycles the sink was ready with no output valid, between
+               the first and the last output
+
+    Arguments:
+    dut -- The wrapper, with clk and rst
+    """
+
+    def __init__(self, dut):
+        self.clk = dut.clk
+        self.s_axis = AxiStreamBus.from_prefix(dut, "s_axis")
+        self.m_axis = AxiStreamBus.from_prefix(dut, "m_axis")
+        self.width = len(self.s_axis.tdata)
+
+        # One sample per beat, rather than width / 8 bytes
+        self.source = AxiStreamSource(self.s_axis, dut.clk, dut.rst, byte_lanes=1)
+        self.sink = AxiStreamSink(self.m_axis, dut.clk, dut.rst, byte_lanes=1)
+        # They log every frame, and every sample is one at the sink.
+        self.source.log.setLevel(logging.WARNING)
+        self.sink.log.setLevel(logging.WARNING)
+
+        self.samples = 0
+        self.cycles = 0
+        self.stalls = 0
+        self.bubbles = 0
+
+    @property
+    def rate(self):
+        """ Samples per cycle of the last run(). """
+        return self.samples / self.cycles if self.cycles else 0.0
+
+    async def _monitor(self, n):
+        """ Count handshakes until n samples have come out. """
+        s, m = self.s_axis, self.m_axis
+        edge = RisingEdge(self.clk)
+        accepted = popped = cycles = stalls = bubbles = 0
+        # Bubbles after the last output so far; they only count if
+        # another output follows.
+        pending = 0
+        while popped < n:
+            # The values just before the edge, like the source and sink
+            await edge
+            s_valid, s_ready = s.tvalid.value == 1, s.tready.value == 1
+            m_valid, m_ready = m.tvalid.value == 1, m.tready.value == 1
+            if accepted or (s_valid and s_ready):
+                cycles += 1
+            accepted += s_valid and s_ready
+            stalls += s_valid and not s_ready
+            if m_valid and m_ready:
+                popped += 1
+                bubbles += pending
+                pending = 0
+            elif popped and m_ready:
+                pending += 1
+        self.samples, self.cycles, self.stalls, self.bubbles = n, cycles, stalls, bubbles
+
+    async def run(self, x):
+        """ Stream the samples of x through the wrapper, and return the
+        signed output samples. Reset must be released. """
+        n = len(x)
+        monitor = cocotb.start_soon(self._monitor(n))
+        mask = (1 << self.width) - 1
+        await self.source.send((np.asarray(x, dtype=np.int64) & mask).tolist())
+        y = []
+        while len(y) < n:
+            y += await self.sink.read(n - len(y))
+        await monitor
+        return wrap(y, self.width)
+
+    def report(self):
+        """ Get a summary of the last run(), for assertion messages. """
+        return (f"{self.samples} samples in {self.cycles} cycles ({self.rate:.3f} samples/cycle), "
+                f"{self.stalls} input stalls, {self.bubbles} output bubbles")
+
+async def start(dut, **controls):
+    """ Start the clock, and reset the wrapper with the stream idle.
+    Returns an AxisStream on it.
+
+    Arguments:
+    dut -- The wrapper, with clk and rst
+    controls -- Values of the wrapper's other inputs, by name
+    """
+    cocotb.start_soon(Clock(dut.clk, 10, units="ns").start())
+    stream = AxisStream(dut)
+
+    for name, value in controls.items():
+        getattr(dut, name).value = value
+    dut.rst.value = 1
+    await ClockCycles(dut.clk, 2)
+    dut.rst.value = 0
+    await ClockCycles(dut.clk, 1)
+    return stream
+
+def samples(dut, n, seed=0):
+    """ Get n random full-scale samples for the wrapper. """
+    width = len(dut.s_axis_tdata)
+    return np.random.default_rng(seed).integers(-(1 << (width - 1)), 1 << (width - 1), n)
+
+def check(name, y, exp):
+    """ Assert that the output samples y are the expected ones. """
+    mismatches = np.flatnonzero(y != exp)
+    assert not len(mismatches), (
+        f"{name}: {len(mismatches)} of {len(exp)} samples differ, first at sample "
+        f"{mismatches[0]}: expected={int(exp[mismatches[0]])}, got={int(y[mismatches[0]])}"
+    )
+
+async def check_reset(dut, **controls):
+    """ Check that after reset nothing is in flight, and a sample would
+    be accepted. """
+    await start(dut, **controls)
+    await Timer(1, units="ps")
+
+    assert_resolvable(dut.m_axis_tvalid)
+    assert dut.m_axis_tvalid.value == 0, "m_axis_tvalid is high after reset"
+    assert dut.s_axis_tready.value == 1, "s_axis_tready is low after reset"
+
+async def check_full_rate(dut, reference, **controls):
+    """ Check that with a sink that never pauses, one sample goes through
+    per cycle.
+
+    Arguments:
+    dut -- The wrapper, with a latency localparam
+    reference -- Function of (dut, x) that returns the expected output
+                 for x, delayed by samples rather than cycles
+    controls -- Values of the wrapper's other inputs, by name
+    """
+    stream = await start(dut, **controls)
+    latency = int(dut.latency.value)
+
+    x = samples(dut, 2000)
+    y = await stream.run(x)
+    check("full_rate", y, reference(dut, x))
+
+    # Every cycle but the ones filling the pipeline carries a sample.
+    assert stream.stalls == 0, f"full_rate: {stream.report()}"
+    assert stream.rate >= len(x) / (len(x) + latency + 2), f"full_rate: {stream.report()}"
+
+async def check_backpressure(dut, reference, **controls):
+    """ Check that with a sink that pauses 30% of cycles, the wrapper
+    always has a sample ready for it. The arguments are those of
+    check_full_rate(). """
+    stream = await start(dut, **controls)
+    stream.sink.set_pause_generator(random_pauses(0.3, seed=1))
+
+    x = samples(dut, 2000)
+    y = await stream.run(x)
+    check("random_backpressure", y, reference(dut, x))
+    assert stream.bubbles == 0, f"random_backpressure: {stream.report()}"
+
+async def check_random_valid(dut, reference, **controls):
+    """ Check that with gaps in the input and backpressure on the output,
+    the output is the same as without them. The arguments are those of
+    check_full_rate(). """
+    stream = await start(dut, **controls)
+    stream.source.set_pause_generator(random_pauses(0.3, seed=2))
+    stream.sink.set_pause_generator(random_pauses(0.3, seed=3))
+
+    x = samples(dut, 2000)
+    y = await stream.run(x)
+    check("random_valid", y, reference(dut, x))
@@ -0,0 +1,81 @@
+# Benchmark how long the harness takes to import. pytest imports every
+# test module once, but each simulator process imports the test module
+# (and with it utilities.py) again, so this cost is paid once per
+# simulation run. Each import is timed in a fresh interpreter.
+#
+#   python3 util/bench_import.py
+#   python3 util/bench_import.py -n 20 --top 15 utilities
+#
+# --top lists the imports that took the longest (by their own time, as
+# reported by python -X importtime) for each module.
+
+import os
+import sys
+import glob
+import argparse
+import statistics
+import subprocess
+
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+UTIL = os.path.join(_REPO_ROOT, "util")
+
+# Run in the child: time one import, with paths searched first.
+CODE = ("import sys, time; sys.path[:0] = {paths!r}; "
+        "t = time.perf_counter(); import {module}; print(time.perf_counter() - t)")
+
+def get_modules(names):
+    """ Get (label, module, paths) for the util modules in names, or
+    for the util modules the tests use and every test module. """
+    if names:
+        return [(n, n, [UTIL]) for n in names]
+    modules = [(n, n, [UTIL]) for n in ["utilities", "golden", "audio"]]
+    for path in sorted(glob.glob(os.path.join(_REPO_ROOT, "rtl", "**", "test_*.py"), recursive=True)):
+        tbpath = os.path.dirname(path)
+        module = os.path.splitext(os.path.basename(path))[0]
+        modules.append((os.path.relpath(path, _REPO_ROOT), module, [tbpath, UTIL]))
+    return modules
+
+def time_import(module, paths, repeat):
+    """ Get the median time in seconds of importing module in a fresh
+    interpreter, or raise CalledProcessError if the import fails. """
+    times = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", CODE.format(paths=paths, module=module)],
+                             cwd=paths[0], check=True, capture_output=True, text=True).stdout
+        times.append(float(out.split()[-1]))
+    return statistics.median(times)
+
+def top_imports(module, paths, n):
+    """ Get the n imports with the largest self time (in seconds) when
+    importing module, as (seconds, name) pairs. """
+    err = subprocess.run([sys.executable, "-X", "importtime", "-c", CODE.format(paths=paths, module=module)],
+                         cwd=paths[0], capture_output=True, text=True).stderr
+    rows = []
+    for line in err.splitlines():
+        # import time: self [us] | cumulative | imported package
+        parts = line.split("|")
+        if line.startswith("import time:") and len(parts) == 3 and parts[1].strip().isdigit():
+            rows.append((int(parts[0].split(":")[1]) / 1e6, parts[2].strip()))
+    return sorted(rows, reverse=True)[:n]
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the imports of the test harness.")
+    parser.add_argument("modules", nargs="*", help="util modules to time (default: the harness and every test module)")
+    parser.add_argument("-n", "--repeat", type=int, default=10, help="Imports per module (the median is reported)")
+    parser.add_argument("--top", type=int, default=0, help="Also list the N slowest imports of each module")
+    args = parser.parse_args()
+
+    base = time_import("os", [UTIL], args.repeat)
+    print(f"{'module':44} {'import (ms)':>11}")
+    for label, module, paths in get_modules(args.modules):
+        try:
+            t = time_import(module, paths, args.repeat)
+        except subprocess.CalledProcessError as e:
+            print(f"{label:44} failed: {e.stderr.strip().splitlines()[-1]}")
+            continue
+        print(f"{label:44} {1000 * (t - base):11.1f}", flush=True)
+        for seconds, name in top_imports(module, paths, args.top):
+            print(f"    {name.strip():40} {1000 * seconds:11.1f}")
+
+if __name__ == "__main__":
+    main()
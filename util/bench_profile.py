@@ -0,0 +1,67 @@
+# Benchmark the Verilator build profiles (see utilities.BUILD_PROFILES):
+# how long each takes to compile an effect from scratch, and how many
+# samples per second the compiled model then simulates:
+#
+#   python3 util/bench_profile.py
+#   python3 util/bench_profile.py -n 200000 --threads 1 2 4 rtl/changers/chorus
+#
+# Every build goes to an empty cache, so the compile time is a cold
+# build (apart from ccache, which the fast profile uses if installed).
+# --threads repeats the fast profile with each VERILATOR_THREADS value.
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+sys.path.append(os.path.join(_REPO_ROOT, "util"))
+
+from run_all import load_testbench
+from bench_samples import RESULTS
+
+def bench(tbpath, timescale, profile, threads):
+    """ Get (compile seconds, samples per second) of one profile.
+
+    Arguments:
+    tbpath -- Absolute path to the effect directory
+    timescale -- Timescale of the effect's tests
+    profile -- One of BUILD_PROFILES
+    threads -- VERILATOR_THREADS for the build
+    """
+    from utilities import runner, get_work_dir, environ
+
+    with tempfile.TemporaryDirectory() as cache, environ(BUILD_CACHE_DIR=cache, VERILATOR_THREADS=str(threads)):
+        start = time.perf_counter()
+        runner("verilator", timescale, tbpath, {}, pymodule="bench_samples", root=_REPO_ROOT,
+               compile_only=True, trace="off", profile=profile)
+        build = time.perf_counter() - start
+        runner("verilator", timescale, tbpath, {}, testname="throughput", pymodule="bench_samples",
+               root=_REPO_ROOT, trace="off", profile=profile)
+    with open(os.path.join(get_work_dir(tbpath, "throughput", {}, "verilator"), RESULTS)) as fd:
+        return build, json.load(fd)["batched"]
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare compile time and simulation speed of the Verilator build profiles.")
+    parser.add_argument("effect", nargs="?", default=os.path.join(_REPO_ROOT, "rtl", "creators", "overdrive"))
+    parser.add_argument("-n", "--samples", type=int, default=100000)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1],
+                        help="VERILATOR_THREADS values to build the fast profile with (default: 1)")
+    args = parser.parse_args()
+
+    tbpath = os.path.realpath(args.effect)
+    os.environ["BENCH_SAMPLES"] = str(args.samples)
+    timescale = load_testbench(tbpath).timescale
+
+    runs = [("debug", 1)] + [("fast", t) for t in args.threads]
+    print(f"{'profile':8} {'threads':>7} {'compile (s)':>12} {'samples/s':>10} {'speedup':>8}")
+    base = None
+    for profile, threads in runs:
+        build, rate = bench(tbpath, timescale, profile, threads)
+        base = base or rate
+        print(f"{profile:8} {threads:7} {build:12.1f} {rate:10.0f} {rate / base:7.2f}x", flush=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# Benchmark how many audio samples per second the cocotb harness can
+# push through an effect, on each simulator: once with the per-sample
+# loop the tests started with (RisingEdge + Timer + signed_integer),
+# and once with utilities.process_samples().
+#
+#   python3 util/bench_samples.py
+#   python3 util/bench_samples.py -n 200000 rtl/creators/distortion
+#
+# The effect must have the shared clk/rst/in_signal/out_signal
+# interface (en, if it has one, is held high). This file is also the
+# cocotb test module that runs inside the simulator.
+
+import os
+import sys
+import json
+import time
+import argparse
+
+import numpy as np
+
+import cocotb
+from cocotb.clock import Clock
+from cocotb.triggers import Timer, ClockCycles, RisingEdge
+
+from utilities import process_samples
+
+RESULTS = "bench_samples.json"
+
+@cocotb.test()
+async def throughput(dut):
+    """Time both drive loops over the same random samples."""
+    n = int(os.environ.get("BENCH_SAMPLES", 20000))
+
+    cocotb.start_soon(Clock(dut.clk, 10, units="ns").start())
+    dut.rst.value = 1
+    dut.in_signal.value = 0
+    if hasattr(dut, "en"):
+        dut.en.value = 1
+    await ClockCycles(dut.clk, 2)
+    dut.rst.value = 0
+    await ClockCycles(dut.clk, 1)
+
+    width = len(dut.in_signal)
+    x = np.random.default_rng(0).integers(-(1 << (width - 1)), 1 << (width - 1), n)
+
+    start = time.perf_counter()
+    for v in x:
+        dut.in_signal.value = int(v)
+        await RisingEdge(dut.clk)
+        await Timer(1, units="ps")
+        dut.out_signal.value.signed_integer
+    legacy = time.perf_counter() - start
+
+    start = time.perf_counter()
+    await process_samples(dut, x)
+    batched = time.perf_counter() - start
+
+    with open(RESULTS, "w") as fd:
+        json.dump(dict(samples=n, legacy=n / legacy, batched=n / batched), fd)
+
+def main():
+    from run_all import _REPO_ROOT, SIMULATORS, load_testbench
+    from utilities import runner, get_work_dir
+
+    parser = argparse.ArgumentParser(description="Measure simulated samples per second on each simulator.")
+    parser.add_argument("effect", nargs="?", default=os.path.join(_REPO_ROOT, "rtl", "creators", "overdrive"))
+    parser.add_argument("-n", "--samples", type=int, default=20000)
+    parser.add_argument("--simulators", nargs="+", default=SIMULATORS, choices=SIMULATORS)
+    args = parser.parse_args()
+
+    tbpath = os.path.realpath(args.effect)
+    os.environ["BENCH_SAMPLES"] = str(args.samples)
+    timescale = load_testbench(tbpath).timescale
+
+    print(f"{'simulator':9} {'samples':>8} {'legacy (samples/s)':>19} {'batched (samples/s)':>20} {'speedup':>8}")
+    for simulator in args.simulators:
+        runner(simulator, timescale, tbpath, {}, testname="throughput", pymodule="bench_samples", root=_REPO_ROOT, trace="off")
+        with open(os.path.join(get_work_dir(tbpath, "throughput", {}, simulator), RESULTS)) as fd:
+            r = json.load(fd)
+        print(f"{simulator:9} {r['samples']:8} {r['legacy']:19.0f} {r['batched']:20.0f} {r['batched'] / r['legacy']:7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# Benchmark the cost of tracing: run every effect's tests with
+# trace="off" and trace="always" on each simulator, and report the
+# simulation wall time, the size of the dumped waves, and the speedup
+# of running untraced (which is what trace="on-failure" does for a
+# passing regression). Models are compiled before timing starts.
+#
+#   python3 util/bench_trace.py
+#   python3 util/bench_trace.py -n 5 rtl/changers/chorus
+
+import os
+import sys
+import time
+import argparse
+
+from run_all import _REPO_ROOT, SIMULATORS, find_effects, load_testbench
+from utilities import runner, get_work_dir
+
+def time_run(tb, tbpath, simulator, trace, repeat):
+    """ Get the best wall time of repeat runs of all tests, and the size
+    of the waves written by the last one. """
+    runner(simulator, tb.timescale, tbpath, {}, pymodule=tb.__name__, root=_REPO_ROOT, trace=trace, compile_only=True)
+
+    work_dir = get_work_dir(tbpath, "all", {}, simulator)
+    best = None
+    for _ in range(repeat):
+        for f in os.listdir(work_dir) if os.path.isdir(work_dir) else []:
+            if f.endswith((".fst", ".vcd")):
+                os.remove(os.path.join(work_dir, f))
+        start = time.perf_counter()
+        try:
+            runner(simulator, tb.timescale, tbpath, {}, pymodule=tb.__name__, root=_REPO_ROOT, trace=trace)
+        except SystemExit:
+            # Failing tests still take representative time.
+            pass
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    waves = sum(os.path.getsize(os.path.join(work_dir, f))
+                for f in os.listdir(work_dir) if f.endswith((".fst", ".vcd")))
+    return best, waves
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare simulation time with and without waves.")
+    parser.add_argument("paths", nargs="*", default=[os.path.join(_REPO_ROOT, "rtl")])
+    parser.add_argument("-n", "--repeat", type=int, default=3, help="Runs per configuration (best is kept)")
+    parser.add_argument("--simulators", nargs="+", default=SIMULATORS, choices=SIMULATORS)
+    args = parser.parse_args()
+
+    print(f"{'effect':28} {'simulator':9} {'off (s)':>9} {'always (s)':>10} {'waves (KiB)':>11} {'speedup':>8}")
+    for tbpath in find_effects(args.paths):
+        name = os.path.relpath(tbpath, _REPO_ROOT)
+        sys.path.insert(0, tbpath)
+        try:
+            os.chdir(tbpath)
+            tb = load_testbench(tbpath)
+            for simulator in args.simulators:
+                off, _ = time_run(tb, tbpath, simulator, "off", args.repeat)
+                always, waves = time_run(tb, tbpath, simulator, "always", args.repeat)
+                print(f"{name:28} {simulator:9} {off:9.2f} {always:10.2f} {waves / 1024:11.0f} {always / off:7.2f}x", flush=True)
+        except BaseException as e:
+            print(f"{name:28} failed: {type(e).__name__}: {e}", flush=True)
+        finally:
+            while tbpath in sys.path:
+                sys.path.remove(tbpath)
+
+if __name__ == "__main__":
+    main()
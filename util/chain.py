@@ -0,0 +1,297 @@
+# Compose effects into one chain and simulate it in a single run:
+# generate a top module that feeds every effect's out_signal into the
+# next one's in_signal, a filelist.json that includes the effects'
+# filelists, and check random samples through the whole chain against
+# the golden models composed in the same order.
+#
+#   python3 util/chain.py overdrive chorus delay:mix=128,feedback=96
+#   python3 util/chain.py overdrive:pipeline=1 distortion:threshold=0x400000 chorus:delay=240 --name board
+#   python3 util/chain.py board.json --no-run
+#
+# A stage is an effect name from EFFECTS, with its parameters and
+# controls (inputs besides the audio stream, driven with a constant
+# value for the run) after a ":". A .json spec has the same stages:
+#
+#   {"name": "board", "width": 24, "stages": ["overdrive", "chorus:delay=240"]}
+#
+# The chain is written to chains/<name>/ at the repository root (the
+# top module is <name>, and its controls are <stage>_<control> inputs),
+# so it can be simulated, linted and synthesized like any effect
+# directory. This file is also the cocotb test module that runs inside
+# the simulator.
+
+import os
+import sys
+import json
+import shutil
+import argparse
+import importlib.util
+
+import numpy as np
+
+import cocotb
+from cocotb.clock import Clock
+from cocotb.triggers import ClockCycles
+
+_REPO_ROOT = os.environ.get("REPO_ROOT") or os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+sys.path.append(os.path.join(_REPO_ROOT, "util"))
+
+import golden
+from utilities import check_samples, get_latency
+
+# Written to the chain directory, and read by the test in the simulator
+SPEC = "chain.json"
+
+def _overdrive(x, params, controls, width):
+    if params.get("interpolate"):
+        path = os.path.join(_REPO_ROOT, EFFECTS["overdrive"]["path"], "softclip_interp_lut_table.py")
+        spec = importlib.util.spec_from_file_location("softclip_interp_lut_table", path)
+        t = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(t)
+        return golden.interp(x, t.BASE, t.SLOPE, t.SHIFT, width)
+    return golden.overdrive(x, width)
+
+# The effects a chain can use:
+#
+#   path     -- Effect directory, relative to the repository root
+#   module   -- Module name
+#   files    -- Sources, if the effect's filelist.json can't be included
+#   en       -- Whether it has an en input (a sample on every cycle it
+#               is high; see rtl/components/axis_adapter)
+#   controls -- Inputs besides the stream: name -> bits (None for a
+#               signed input of the sample width)
+#   latency  -- Cycles from in_signal to out_signal for a dictionary of
+#               parameters. The top module needs it to delay en, so it
+#               can't read the module's latency localparam, but
+#               chain_samples checks that the two agree.
+#   model    -- Golden model, for latency 1, of (x, params, controls,
+#               width)
+EFFECTS = {
+    "overdrive": dict(
+        path="rtl/creators/overdrive", module="overdrive", en=False, controls={},
+        latency=lambda p: (3 if p.get("interpolate") else (2 if p.get("use_bram") else 1)) + p.get("pipeline", 0),
+        model=_overdrive),
+    "distortion": dict(
+        path="rtl/creators/distortion", module="distortion", en=False, controls={"threshold": None},
+        latency=lambda p: 1 + p.get("pipeline", 0),
+        model=lambda x, p, c, w: golden.distortion(x, c.get("threshold", 0), w)),
+    "chorus": dict(
+        path="rtl/changers/chorus", module="chorus", en=True, controls={},
+        latency=lambda p: 1 + p.get("pipeline", 0),
+        model=lambda x, p, c, w: golden.chorus(x, p.get("delay", 480), w)),
+    "delay": dict(
+        path="rtl/repeaters/delay", module="delay", en=True, controls={"feedback": 8, "mix": 9},
+        latency=lambda p: 1,
+        model=lambda x, p, c, w: golden.delay(x, p.get("delay", 480), w, c["feedback"], c["mix"],
+                                              p.get("compand", 0))),
+    "looper": dict(
+        path="rtl/repeaters/looper", module="loop", en=False, controls={"loop_en": 1},
+        files=["rtl/repeaters/looper/loop.sv"],
+        latency=lambda p: 1,
+        model=lambda x, p, c, w: golden.looper(x, np.full(len(x), c.get("loop_en", 0)), width=w)),
+}
+
+def parse_stage(s):
+    """ Parse a "name:k=v,k=v" stage into a dictionary with the keys
+    effect, params and controls. """
+    from synth import parse_param
+
+    effect, _, rest = s.partition(":")
+    assert effect in EFFECTS, f"Unknown effect {effect}, must be one of {', '.join(EFFECTS)}"
+    values = parse_param(rest)
+    controls = {k: v for k, v in values.items() if k in EFFECTS[effect]["controls"]}
+    params = {k: v for k, v in values.items() if k not in controls}
+    return dict(effect=effect, params=params, controls=controls)
+
+def make_spec(stages, name="chain", width=24):
+    """ Get the spec of a chain, with every stage resolved: its effect,
+    instance name, params (including width), controls, and latency.
+
+    Arguments:
+    stages -- List of stage strings (see parse_stage()) or dictionaries
+    name -- Name of the chain and its top module
+    width -- Sample width of every stage
+    """
+    assert stages, "A chain needs at least one stage"
+    resolved = []
+    for i, s in enumerate(stages):
+        s = parse_stage(s) if isinstance(s, str) else dict(s)
+        effect = EFFECTS[s["effect"]]
+        params = dict(s.get("params", {}), width=width)
+        controls = {k: s.get("controls", {}).get(k, 0) for k in effect["controls"]}
+        resolved.append(dict(effect=s["effect"], name=f"s{i}_{s['effect']}", params=params,
+                             controls=controls, latency=effect["latency"](params)))
+    return dict(name=name, width=width, stages=resolved,
+                latency=sum(s["latency"] for s in resolved))
+
+def render_top(spec):
+    """ Get the source of the top module of a chain.
+
+    Stages with an en input get the chain's en delayed by the latency
+    of the stages before them, so they record exactly the samples the
+    chain was given, and the pipeline's reset values never reach their
+    buffers.
+    """
+    from synth import sv_value
+
+    w = spec["width"]
+    stages = spec["stages"]
+    has_en = any(EFFECTS[s["effect"]]["en"] for s in stages)
+
+    ports = ["  input logic clk,", "  input logic rst,"]
+    if has_en:
+        ports.append("  input logic en,")
+    ports += [f"  input logic signed [{w - 1}:0] in_signal,",
+              f"  output logic signed [{w - 1}:0] out_signal"]
+    for s in stages:
+        for k, bits in EFFECTS[s["effect"]]["controls"].items():
+            ports[-1] += ","
+            ports.append(f"  input logic signed [{w - 1}:0] {s['name']}_{k}" if bits is None
+                         else f"  input logic [{bits - 1}:0] {s['name']}_{k}")
+
+    # Cycles each stage's input is behind the chain's
+    offsets = np.cumsum([0] + [s["latency"] for s in stages[:-1]]).tolist()
+    delay = max(o for o, s in zip(offsets, stages) if EFFECTS[s["effect"]]["en"]) if has_en else 0
+
+    lines = [f"// Generated by util/chain.py: {' -> '.join(s['effect'] for s in stages)}",
+             f"module {spec['name']} (", *ports, ");", "",
+             "  // Cycles from in_signal to out_signal, for the testbench.",
+             f"  localparam int latency /*verilator public*/ = {spec['latency']};", ""]
+    if delay:
+        lines += ["  // en, delayed by 1 + i cycles in en_q[i]",
+                  f"  logic [{delay - 1}:0] en_q;", "",
+                  "  always_ff @(posedge clk) begin",
+                  "    if (rst) begin",
+                  "      en_q <= '0;",
+                  "    end else begin",
+                  f"      en_q <= {{en_q[{delay - 2}:0], en}};" if delay > 1 else "      en_q <= en;",
+                  "    end",
+                  "  end", ""]
+    lines.append("  logic signed [{}:0] {};".format(w - 1, ", ".join(f"{s['name']}_out" for s in stages)))
+
+    prev = "in_signal"
+    for s, offset in zip(stages, offsets):
+        effect = EFFECTS[s["effect"]]
+        overrides = ", ".join(f".{k}({sv_value(v)})" for k, v in s["params"].items())
+        conns = ["    .clk(clk)", "    .rst(rst)"]
+        if effect["en"]:
+            conns.append(f"    .en({'en' if offset == 0 else f'en_q[{offset - 1}]'})")
+        conns += [f"    .in_signal({prev})", f"    .out_signal({s['name']}_out)"]
+        conns += [f"    .{k}({s['name']}_{k})" for k in effect["controls"]]
+        lines += ["", f"  {effect['module']} #({overrides}) {s['name']} (", ",\n".join(conns), "  );"]
+        prev = f"{s['name']}_out"
+
+    lines += ["", f"  assign out_signal = {prev};", "", "endmodule", ""]
+    return "\n".join(lines)
+
+def write_chain(spec, path):
+    """ Write the top module, filelist.json and spec of a chain to path,
+    a directory below the repository root, with the memory init files
+    of its effects (they are read from the testbench directory).
+    """
+    assert os.path.realpath(path).startswith(os.path.realpath(_REPO_ROOT) + os.sep), \
+        f"The chain directory {path} must be inside the repository"
+    os.makedirs(path, exist_ok=True)
+    rel = os.path.relpath(os.path.realpath(path), os.path.realpath(_REPO_ROOT))
+    top = f"{spec['name']}.sv"
+
+    files, include = [], []
+    for s in spec["stages"]:
+        effect = EFFECTS[s["effect"]]
+        if "files" in effect:
+            files += [f for f in effect["files"] if f not in files]
+        elif effect["path"] not in include:
+            include.append(effect["path"])
+        src = os.path.join(_REPO_ROOT, effect["path"])
+        for f in sorted(os.listdir(src)):
+            if f.endswith(".memh"):
+                shutil.copyfile(os.path.join(src, f), os.path.join(path, f))
+
+    with open(os.path.join(path, top), "w") as fd:
+        fd.write(render_top(spec))
+    with open(os.path.join(path, "filelist.json"), "w") as fd:
+        json.dump(dict(top=spec["name"], files=files + [os.path.join(rel, top)], include=include), fd, indent=4)
+    with open(os.path.join(path, SPEC), "w") as fd:
+        json.dump(spec, fd, indent=4)
+
+def reference(spec, x):
+    """ Get the output of a chain for x from the golden models of its
+    stages, for latency 1. """
+    y = np.asarray(x, dtype=np.int64)
+    for s in spec["stages"]:
+        y = EFFECTS[s["effect"]]["model"](y, s["params"], s["controls"], spec["width"])
+    return y
+
+@cocotb.test()
+async def chain_samples(dut):
+    """Random full-scale samples through the chain match the composed models."""
+    with open(os.environ["CHAIN_SPEC"]) as fd:
+        spec = json.load(fd)
+    n = int(os.environ.get("CHAIN_SAMPLES", 20000))
+
+    # en is delayed by the latencies in EFFECTS, so they must be what
+    # the stages declare.
+    for s in spec["stages"]:
+        declared = get_latency(getattr(dut, s["name"]))
+        assert declared in (None, s["latency"]), (
+            f"{s['name']}: {s['effect']} declares latency {declared}, "
+            f"but EFFECTS in chain.py gives {s['latency']} for {s['params']}")
+
+    cocotb.start_soon(Clock(dut.clk, 10, units="ns").start())
+    for s in spec["stages"]:
+        for k, v in s["controls"].items():
+            getattr(dut, f"{s['name']}_{k}").value = v
+    # No samples until process_samples() raises en
+    if hasattr(dut, "en"):
+        dut.en.value = 0
+    dut.rst.value = 1
+    dut.in_signal.value = 0
+    await ClockCycles(dut.clk, 2)
+    dut.rst.value = 0
+    await ClockCycles(dut.clk, 1)
+
+    w = spec["width"]
+    x = np.random.default_rng(0).integers(-(1 << (w - 1)), 1 << (w - 1), n)
+    await check_samples(dut, x, reference(spec, x), "chain_samples")
+
+def main():
+    from run_all import SIMULATORS
+    from utilities import runner, get_results, get_work_dir, environ
+
+    parser = argparse.ArgumentParser(description="Generate a chain of effects and check it against the composed golden models.")
+    parser.add_argument("stages", nargs="+", help="Stages in order, e.g. overdrive chorus:delay=240, or one .json spec")
+    parser.add_argument("--name", default=None, help="Name of the chain and its top module (default: chain)")
+    parser.add_argument("--width", type=int, default=None, help="Sample width of every stage (default: 24)")
+    parser.add_argument("-o", "--output", default=None, help="Directory to write the chain to (default: chains/<name>)")
+    parser.add_argument("-n", "--samples", type=int, default=20000)
+    parser.add_argument("--simulator", default="verilator", choices=SIMULATORS)
+    parser.add_argument("--no-run", action="store_true", help="Only generate the chain")
+    args = parser.parse_args()
+
+    config = dict(stages=args.stages)
+    if len(args.stages) == 1 and args.stages[0].endswith(".json"):
+        with open(args.stages[0]) as fd:
+            config = json.load(fd)
+    spec = make_spec(config["stages"], args.name or config.get("name", "chain"), args.width or config.get("width", 24))
+    path = os.path.realpath(args.output or os.path.join(_REPO_ROOT, "chains", spec["name"]))
+    write_chain(spec, path)
+    print(f"Wrote {' -> '.join(s['name'] for s in spec['stages'])} (latency {spec['latency']}) to {path}")
+    if args.no_run:
+        return
+
+    with environ(CHAIN_SPEC=os.path.join(path, SPEC), CHAIN_SAMPLES=str(args.samples)):
+        try:
+            runner(args.simulator, "1ps/1ps", path, {}, testname="chain_samples", pymodule="chain", root=_REPO_ROOT)
+        except SystemExit:
+            # A failing test still leaves a results file behind.
+            pass
+    results_xml = os.path.join(get_work_dir(path, "chain_samples", {}, args.simulator), "results.xml")
+    if not os.path.exists(results_xml):
+        sys.exit("The chain did not build or run")
+    result = get_results(results_xml)["chain_samples"]
+    if not result["passed"]:
+        sys.exit(result["message"])
+    print(f"{args.samples} samples passed in {result['time']:.1f} s")
+
+if __name__ == "__main__":
+    main()
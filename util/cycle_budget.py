@@ -0,0 +1,159 @@
+# Count the clock cycles the time-multiplexed effect chain
+# (rtl/core/fx_core.sv) spends on one sample, and how many stages fit
+# in a sample period:
+#
+#   python3 util/cycle_budget.py
+#   python3 util/cycle_budget.py overdrive distortion chorus:delay=960 --freq 12 --rate 48000
+#
+# Every stage runs in a fixed number of cycles, one after the other, on
+# the shared multiplier and memory port. The clock defaults to the one
+# the board is placed and routed for (--freq 12 in frag/fpga.mk).
+#
+# Memory is counted in the UP5K's 4 Kbit BRAMs, whole blocks per
+# memory, since fx_core's memories are 1r1w (or ROMs) and can't be
+# mapped to the single-port SPRAMs. --synth synthesizes fx_core and
+# checks the count against yosys's.
+
+import argparse
+
+# Clock and sample rate of the board
+FREQ_MHZ = 12.0
+RATE = 48000
+
+# Cycles fx_core spends on every sample besides the stages: taking it
+# (IDLE) and registering the output (DONE)
+OVERHEAD = 2
+
+# The stages of fx_core, in the order it runs them:
+#
+#   cycles -- Cycles the stage takes
+#   mul    -- Cycles it uses the shared multiplier
+#   mem    -- Cycles it uses the shared memory port
+#   memories -- The (depth, width) of each memory it has, for (width,
+#               params): the soft-clip table's base and slope ROMs, and
+#               the chorus delay line
+STAGES = {
+    "overdrive": dict(cycles=3, mul=1, mem=0,
+                      memories=lambda width, p: [(1 << p.get("abits", 9), width),
+                                                 (1 << p.get("abits", 9), p.get("cbits", 10))]),
+    "distortion": dict(cycles=1, mul=0, mem=0, memories=lambda width, p: []),
+    "chorus": dict(cycles=2, mul=0, mem=2, memories=lambda width, p: [(p.get("delay", 480), width)]),
+}
+
+# BRAMs of the iCE40 UP5K, and the (depth, width) shapes one SB_RAM40_4K
+# can take
+BRAMS = 30
+BRAM_SHAPES = [(256, 16), (512, 8), (1024, 4), (2048, 2)]
+
+def get_budget(freq_mhz=FREQ_MHZ, rate=RATE):
+    """ Get the number of clock cycles in one sample period. """
+    return int(freq_mhz * 1e6 // rate)
+
+def get_sample_cycles(stages):
+    """ Get the cycles fx_core takes per sample with the given stages
+    enabled, which is also the shortest period it can take samples at.
+
+    Arguments:
+    stages -- List of stage names, or of (name, params) tuples
+    """
+    return OVERHEAD + sum(STAGES[get_name(s)]["cycles"] for s in stages)
+
+def get_name(stage):
+    """ Get the name of a stage given as a name or (name, params). """
+    return stage if isinstance(stage, str) else stage[0]
+
+def get_brams(depth, width):
+    """ Get the number of BRAMs a depth x width memory takes, in the
+    shape that needs the fewest. """
+    return min(-(-depth // d) * -(-width // w) for d, w in BRAM_SHAPES)
+
+def get_usage(stages, width=24):
+    """ Get a dictionary of what one sample through stages uses: cycles,
+    mul and mem (cycles of the shared multiplier and memory port), bits
+    (memory) and bram (BRAMs).
+
+    Arguments:
+    stages -- List of (name, params) tuples
+    width -- Sample width
+    """
+    usage = dict(cycles=OVERHEAD, mul=0, mem=0, bits=0, bram=0)
+    for name, params in stages:
+        stage = STAGES[name]
+        usage["cycles"] += stage["cycles"]
+        usage["mul"] += stage["mul"]
+        usage["mem"] += stage["mem"]
+        for depth, w in stage["memories"](width, params):
+            usage["bits"] += depth * w
+            usage["bram"] += get_brams(depth, w)
+    return usage
+
+def get_fit(stages, budget, width=24):
+    """ Get how many copies of the chain of stages fit in budget cycles,
+    and in the UP5K's BRAMs (None if it needs no memory). """
+    usage = get_usage(stages, width)
+    per_chain = usage["cycles"] - OVERHEAD
+    cycles = (budget - OVERHEAD) // per_chain if per_chain else None
+    memory = BRAMS // usage["bram"] if usage["bram"] else None
+    return cycles, memory
+
+def check_synth(stages, width=24):
+    """ Synthesize fx_core with the parameters of stages, and assert
+    that it uses the BRAMs get_usage() counts for all of its stages
+    (fx_core has every stage, whichever are enabled). Returns the
+    count. """
+    import os
+    from synth import synthesize
+
+    params = dict(width=width)
+    for _, p in stages:
+        params.update(p)
+    expected = get_usage([(name, params) for name in STAGES], width)["bram"]
+    core = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), "rtl", "core")
+    bram = synthesize(core, params)["bram"]
+    assert bram == expected, f"fx_core uses {bram} BRAMs, but cycle_budget.py counts {expected}"
+    return bram
+
+def parse_stage(s):
+    """ Parse a "name:k=v,k=v" stage into (name, params). """
+    from synth import parse_param
+
+    name, _, rest = s.partition(":")
+    assert name in STAGES, f"Unknown stage {name}, must be one of {', '.join(STAGES)}"
+    return name, parse_param(rest)
+
+def main():
+    parser = argparse.ArgumentParser(description="Report how many effect stages fit in one sample period of fx_core.")
+    parser.add_argument("stages", nargs="*", type=parse_stage, help=f"Stages of the chain (default: {' '.join(STAGES)})")
+    parser.add_argument("--freq", type=float, default=FREQ_MHZ, help=f"Clock in MHz (default: {FREQ_MHZ})")
+    parser.add_argument("--rate", type=int, default=RATE, help=f"Sample rate in Hz (default: {RATE})")
+    parser.add_argument("--width", type=int, default=24, help="Sample width (default: 24)")
+    parser.add_argument("--synth", action="store_true", help="Synthesize fx_core and check the BRAM count against it")
+    args = parser.parse_args()
+
+    stages = args.stages or [(name, {}) for name in STAGES]
+    budget = get_budget(args.freq, args.rate)
+    print(f"{budget} cycles per sample at {args.freq:g} MHz and {args.rate} Hz, {OVERHEAD} of them per-sample overhead")
+    print()
+    print(f"{'stage':12} {'cycles':>6} {'mul':>4} {'mem':>4} {'bits':>8} {'bram':>4} {'fit alone':>10}")
+    for name, params in stages:
+        usage = get_usage([(name, params)], args.width)
+        alone = (budget - OVERHEAD) // STAGES[name]["cycles"]
+        print(f"{name:12} {usage['cycles'] - OVERHEAD:6} {usage['mul']:4} {usage['mem']:4} {usage['bits']:8} "
+              f"{usage['bram']:4} {alone:10}")
+
+    usage = get_usage(stages, args.width)
+    cycles, memory = get_fit(stages, budget, args.width)
+    print()
+    print(f"chain: {usage['cycles']} cycles per sample ({100 * usage['cycles'] / budget:.1f}% of the budget), "
+          f"multiplier busy {usage['mul']}, memory port busy {usage['mem']}")
+    fit = f"{cycles} copies of the chain fit in the cycle budget"
+    if memory is not None:
+        fit += f", {memory} in the UP5K's {BRAMS} BRAMs ({usage['bram']} each)"
+    print(fit)
+    if args.synth:
+        print(f"fx_core synthesizes to {check_synth(stages, args.width)} BRAMs, as counted")
+    if usage["cycles"] > budget:
+        raise SystemExit(f"The chain needs {usage['cycles']} cycles per sample, more than the {budget} available")
+
+if __name__ == "__main__":
+    main()
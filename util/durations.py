@@ -0,0 +1,187 @@
+# Keep the history of how long the tests take, in a local SQLite
+# database (durations.db at the repository root, or DURATIONS_DB; set it
+# to an empty string to keep no history). Three tables:
+#
+#   launches -- one row per simulator launch by utilities.runner(): the
+#               effect, simulator, parameters, and its compile and run
+#               wall times
+#   tests    -- one row per test in a launch: its wall time and the
+#               simulated time it covered
+#   jobs     -- one row per job of util/run_all.py, which schedules the
+#               longest jobs first from this history
+#
+# To list the tests whose last run took longer than the median of their
+# previous runs:
+#
+#   python3 util/durations.py
+#   python3 util/durations.py --all --window 20
+
+import os
+import time
+import sqlite3
+import argparse
+import statistics
+
+_REPO_ROOT = os.environ.get("REPO_ROOT") or os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+
+DB = os.environ.get("DURATIONS_DB", os.path.join(_REPO_ROOT, "durations.db"))
+
+# Runs that the rolling median is taken over
+WINDOW = 10
+
+# A duration is a slowdown if it is this many times the median, and
+# longer by at least MIN_SLOWDOWN seconds (short jobs are noisy).
+SLOWDOWN = 1.5
+MIN_SLOWDOWN = 1.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS launches (
+    id INTEGER PRIMARY KEY,
+    time REAL,
+    effect TEXT,
+    simulator TEXT,
+    params TEXT,
+    profile TEXT,
+    testname TEXT,
+    compile_s REAL,
+    run_s REAL,
+    status TEXT
+);
+CREATE TABLE IF NOT EXISTS tests (
+    launch INTEGER REFERENCES launches(id),
+    test TEXT,
+    wall_s REAL,
+    sim_ns REAL,
+    passed INTEGER
+);
+CREATE TABLE IF NOT EXISTS jobs (
+    time REAL,
+    kind TEXT,
+    effect TEXT,
+    simulator TEXT,
+    wall_s REAL,
+    cpu_s REAL,
+    status TEXT
+);
+CREATE INDEX IF NOT EXISTS launches_by_effect ON launches (effect, simulator, params);
+CREATE INDEX IF NOT EXISTS jobs_by_effect ON jobs (kind, effect, simulator);
+"""
+
+def connect(path=None):
+    """ Open the database, creating it if needed, or get None if the
+    history is turned off. """
+    if path is None:
+        path = DB
+    if not path:
+        return None
+    # Parallel pytest workers write at the same time.
+    db = sqlite3.connect(path, timeout=30)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.executescript(SCHEMA)
+    return db
+
+def record_launch(effect, simulator, params, profile, testname, compile_s, run_s, results, path=None):
+    """ Record one simulator launch and its tests.
+
+    Arguments:
+    effect -- Effect directory, relative to the repository root
+    simulator -- Name of the simulator
+    params -- Parameter string (see utilities.get_param_string())
+    profile -- Build profile
+    testname -- Test the launch ran, or None for all of them
+    compile_s -- Wall time of the build step
+    run_s -- Wall time of the simulation, or None if it didn't run
+    results -- utilities.get_results() of the launch, or None
+    """
+    db = connect(path)
+    if db is None:
+        return
+    with db:
+        status = "ERROR" if results is None else ("PASS" if all(r["passed"] for r in results.values()) else "FAIL")
+        launch = db.execute("INSERT INTO launches (time, effect, simulator, params, profile, testname, compile_s, run_s, status) "
+                            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                            (time.time(), effect, simulator, params, profile, testname, compile_s, run_s, status)).lastrowid
+        db.executemany("INSERT INTO tests (launch, test, wall_s, sim_ns, passed) VALUES (?, ?, ?, ?, ?)",
+                       [(launch, n, r["time"], r["sim_time_ns"], int(r["passed"])) for n, r in (results or {}).items()])
+    db.close()
+
+def record_job(result, path=None):
+    """ Record one util/run_all.py job result. """
+    db = connect(path)
+    if db is None:
+        return
+    with db:
+        db.execute("INSERT INTO jobs (time, kind, effect, simulator, wall_s, cpu_s, status) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                   (time.time(), result["kind"], os.path.relpath(result["tbpath"], _REPO_ROOT),
+                    result["simulator"], result["wall"], result["cpu"], result["status"]))
+    db.close()
+
+def get_job_medians(window=WINDOW, path=None):
+    """ Get a dictionary of (kind, effect, simulator) to the median wall
+    time of the last window passing runs of that util/run_all.py job. """
+    db = connect(path)
+    if db is None:
+        return {}
+    history = {}
+    for kind, effect, simulator, wall in db.execute("SELECT kind, effect, simulator, wall_s FROM jobs "
+                                                    "WHERE status = 'PASS' ORDER BY time DESC"):
+        walls = history.setdefault((kind, effect, simulator), [])
+        if len(walls) < window:
+            walls.append(wall)
+    db.close()
+    return {k: statistics.median(v) for k, v in history.items()}
+
+def is_slowdown(seconds, median, factor=SLOWDOWN):
+    """ Whether a duration is a slowdown against the median of earlier
+    ones (None if there were none). """
+    return median is not None and seconds > factor * median and seconds - median >= MIN_SLOWDOWN
+
+def get_test_slowdowns(window=WINDOW, factor=SLOWDOWN, everything=False, path=None):
+    """ Get the last run of every test, as (effect, simulator, params,
+    test, wall seconds, median of the previous window runs or None, sim
+    ns) tuples. Only slowdowns are returned, unless everything is set.
+    """
+    db = connect(path)
+    if db is None:
+        return []
+    rows = db.execute("SELECT l.effect, l.simulator, l.params, t.test, t.wall_s, t.sim_ns FROM tests t "
+                      "JOIN launches l ON t.launch = l.id WHERE t.passed ORDER BY l.id DESC").fetchall()
+    db.close()
+
+    # Newest first: the first row of a test is its last run.
+    history = {}
+    for effect, simulator, params, test, wall, sim_ns in rows:
+        key = (effect, simulator, params, test)
+        if key not in history:
+            history[key] = ([], wall, sim_ns)
+        elif len(history[key][0]) < window:
+            history[key][0].append(wall)
+
+    report = []
+    for (effect, simulator, params, test), (walls, wall, sim_ns) in sorted(history.items()):
+        median = statistics.median(walls) if walls else None
+        if everything or is_slowdown(wall, median, factor):
+            report.append((effect, simulator, params, test, wall, median, sim_ns))
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Report tests that got slower than their rolling median.")
+    parser.add_argument("--window", type=int, default=WINDOW, help=f"Earlier runs to take the median of (default: {WINDOW})")
+    parser.add_argument("--factor", type=float, default=SLOWDOWN, help=f"Slowdown threshold (default: {SLOWDOWN})")
+    parser.add_argument("--all", action="store_true", help="List every test of the last launches, not just slowdowns")
+    parser.add_argument("--db", default=DB)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        raise SystemExit(f"No history in {args.db} yet.")
+
+    print(f"{'effect':24} {'simulator':9} {'test':24} {'wall (s)':>9} {'median':>8} {'sim ns/s':>10}")
+    for effect, simulator, params, test, wall, median, sim_ns in get_test_slowdowns(args.window, args.factor, args.all, args.db):
+        name = effect + (f" {params}" if params else "")
+        rate = f"{sim_ns / wall:.0f}" if wall else "-"
+        flag = "  SLOW" if args.all and is_slowdown(wall, median, args.factor) else ""
+        median = "-" if median is None else f"{median:.2f}"
+        print(f"{name:24} {simulator:9} {test:24} {wall:9.2f} {median:>8} {rate:>10}{flag}")
+
+if __name__ == "__main__":
+    main()
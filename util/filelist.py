@@ -0,0 +1,117 @@
+# Resolve a filelist.json, including the filelists it includes, into
+# one list of sources. Besides "top" and "files", a filelist may have
+# "include", a list of other filelists whose files are compiled first:
+#
+# {
+#     "top": "chorus",
+#     "files":
+#     ["rtl/changers/chorus/chorus.sv"
+#     ],
+#     "include": ["delaybuffer"]
+# }
+#
+# An include without a "/" is a component, rtl/components/<name>/
+# filelist.json. Otherwise it is a filelist (or a directory with a
+# filelist.json) relative to the repository root. Included filelists
+# don't need a "top", and every file is listed once.
+#
+# The make flow reads the result from a generated fragment instead of
+# running Python on every invocation:
+#
+#   python3 util/filelist.py --mk filelist.mk    # from the effect directory
+#   python3 util/filelist.py --top               # print the top module
+#   python3 util/filelist.py                     # print the sources
+
+import os
+import json
+import argparse
+
+_REPO_ROOT = os.environ.get("REPO_ROOT") or os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+
+# Where components are found, relative to the repository root
+COMPONENTS = os.path.join("rtl", "components")
+
+# Resolved filelists, by path: (modification times of every filelist
+# read, result). An entry is reused until one of those files changes.
+_cache = {}
+
+def get_include_path(include, root):
+    """ Get the absolute path of the filelist an include refers to. """
+    if "/" not in include:
+        return os.path.join(root, COMPONENTS, include, "filelist.json")
+    path = os.path.join(root, include)
+    if os.path.isdir(path):
+        path = os.path.join(path, "filelist.json")
+    return path
+
+def _resolve(path, root, files, deps, stack):
+    assert path not in stack, "Filelist include cycle: " + " -> ".join(stack + [path])
+    assert os.path.isfile(path), f"Filelist {path} does not exist"
+    deps.append(path)
+    with open(path) as fd:
+        filelist = json.load(fd)
+    for include in filelist.get("include", []):
+        inc = os.path.realpath(get_include_path(include, root))
+        if inc not in deps:
+            _resolve(inc, root, files, deps, stack + [path])
+    for f in filelist.get("files", []):
+        if f not in files:
+            files.append(f)
+    return filelist.get("top")
+
+def resolve(p, n="filelist.json", root=None):
+    """ Get a dictionary with the top module ("top"), the sources
+    ("files", relative to the root, included filelists first) and every
+    filelist read ("deps", absolute) of a filelist.
+
+    Arguments:
+    p -- Path to the directory that contains the filelist
+    n -- Name of the filelist
+    root -- Absolute path to the root of the repository
+    """
+    if root is None:
+        root = _REPO_ROOT
+    path = os.path.realpath(os.path.join(p, n))
+    cached = _cache.get((path, root))
+    if cached is not None:
+        stamps, result = cached
+        try:
+            if [os.stat(d).st_mtime_ns for d in result["deps"]] == stamps:
+                return result
+        except OSError:
+            pass
+
+    files, deps = [], []
+    top = _resolve(path, root, files, deps, [])
+    result = dict(top=top, files=files, deps=deps)
+    _cache[(path, root)] = ([os.stat(d).st_mtime_ns for d in deps], result)
+    return result
+
+def render_mk(result):
+    """ Get the make fragment for a resolved filelist. Sources are
+    relative to the root, like in filelist.json. """
+    return ("# Generated by util/filelist.py from filelist.json, do not edit\n"
+            f"FILELIST_TOP := {result['top'] or ''}\n"
+            f"FILELIST_FILES := {' '.join(result['files'])}\n"
+            f"FILELIST_DEPS := {' '.join(result['deps'])}\n"
+            "filelist.mk: $(FILELIST_DEPS)\n")
+
+def main():
+    parser = argparse.ArgumentParser(description="Resolve a filelist.json and its includes.")
+    parser.add_argument("path", nargs="?", default=".", help="Directory with the filelist (default: .)")
+    parser.add_argument("-n", "--name", default="filelist.json")
+    parser.add_argument("--mk", metavar="FILE", help="Write a make fragment to FILE instead of printing")
+    parser.add_argument("--top", action="store_true", help="Print the top module instead of the sources")
+    args = parser.parse_args()
+
+    result = resolve(args.path, args.name)
+    if args.mk:
+        with open(args.mk, "w") as fd:
+            fd.write(render_mk(result))
+    elif args.top:
+        print(result["top"])
+    else:
+        print(" ".join(result["files"]))
+
+if __name__ == "__main__":
+    main()
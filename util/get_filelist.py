@@ -1,7 +1,3 @@
-import json
+from filelist import resolve
 
-with open("filelist.json") as filelist:
-    files = json.load(filelist)["files"]
-    for f in files:
-        print(f,end=" ")
-    print()
+print(" ".join(resolve(".")["files"]))
@@ -0,0 +1,252 @@
+# Bit-exact NumPy reference models of the effects. Every model takes
+# an array of input samples and returns an array of output samples,
+# so a test can check any number of samples with one call.
+#
+# Timing convention: x[n] is the value of in_signal at rising edge n,
+# and y[n] is the value of out_signal just after rising edge n. With
+# the default latency of 1 (one output register, like every effect
+# today) this is exactly what the tests' "drive, await RisingEdge,
+# read" loop sees. A module with more registers has y[n] computed from
+# x[n - latency + 1], and y holds the reset value, 0, until the first
+# input reaches the output. process_samples() and AudioMonitor undo
+# the extra latency themselves, and check_samples() (see scoreboard.py)
+# finds it if the module doesn't declare it, so compare their output
+# to a model called with the default latency.
+#
+# All arithmetic is done in int64 and wrapped to the module's width
+# with two's complement semantics, like the RTL.
+
+import functools
+
+import numpy as np
+
+import lut_gen
+
+def wrap(x, width):
+    """ Wrap integers to signed two's complement of width bits.
+
+    Arguments:
+    x -- Integer or array of integers
+    width -- Bit width
+    """
+    x = np.asarray(x, dtype=np.int64)
+    half = np.int64(1) << (width - 1)
+    return ((x + half) & ((half << 1) - 1)) - half
+
+def pipeline(y, latency=1, reset=0):
+    """ Delay a combinational model's output by latency - 1 samples,
+    see the timing convention above.
+
+    Arguments:
+    y -- Array of output samples with no register latency
+    latency -- Number of registers between in_signal and out_signal
+    reset -- Value of out_signal after reset
+    """
+    assert latency >= 1, "latency must be at least 1"
+    return delay_line(y, latency - 1, reset)
+
+def delay_line(x, delay, fill=0):
+    """ Delay an array by delay samples, filling the start with fill.
+
+    Arguments:
+    x -- Array of samples
+    delay -- Number of samples to delay by
+    fill -- Value of the samples before the first input
+    """
+    x = np.asarray(x, dtype=np.int64)
+    y = np.full_like(x, fill)
+    if delay < len(x):
+        y[delay:] = x[:len(x) - delay]
+    return y
+
+@functools.lru_cache(maxsize=None)
+def softclip_table(width=24, n=256, drive=3.0, curve="tanh"):
+    """ Get the soft-clip table of softclip_lut.sv (see lut_gen.py), as
+    a read-only array.
+
+    Arguments:
+    width -- Output width in bits
+    n -- Number of table entries
+    drive -- Curve steepness
+    curve -- Name of the curve, one of lut_gen.CURVES
+    """
+    table = lut_gen.table(curve, width, n, drive)
+    table.setflags(write=False)
+    return table
+
+def overdrive(x, width=24, latency=1):
+    """ Model of overdrive.sv: a soft-clip table lookup addressed by
+    the top byte of the input, plus 128.
+
+    Arguments:
+    x -- Array of input samples
+    width -- Sample width (the width parameter)
+    latency -- Register latency
+    """
+    x = wrap(x, width)
+    addr = ((x >> (width - 8)) + 128) & 0xFF
+    return pipeline(softclip_table(width)[addr], latency)
+
+def interp(x, base, slope, shift, width=24, latency=1):
+    """ Model of interp_lut.sv: a table lookup addressed by the top bits
+    of the input, plus half the table, linearly interpolated with the
+    next bits and saturated to width bits.
+
+    Arguments:
+    x -- Array of input samples
+    base -- Table of segment start values (see lut_gen.interp_tables())
+    slope -- Table of segment slopes
+    shift -- Left shift of the slopes
+    width -- Sample width (the width parameter)
+    latency -- Register latency
+    """
+    x = wrap(x, width)
+    n = len(base)
+    abits = n.bit_length() - 1
+    fbits = lut_gen.interp_fbits(width, n)
+    addr = ((x >> (width - abits)) + n // 2) & (n - 1)
+    frac = (x >> (width - abits - fbits)) & ((1 << fbits) - 1)
+    y = np.asarray(base)[addr] + ((np.asarray(slope)[addr] * frac) >> (fbits - shift))
+    maxi = (1 << (width - 1)) - 1
+    return pipeline(np.clip(y, -maxi - 1, maxi), latency)
+
+def distortion(x, threshold, width=24, latency=1):
+    """ Model of distortion.sv: hard clip to +/- threshold.
+
+    Arguments:
+    x -- Array of input samples
+    threshold -- Threshold, a scalar or an array with one value per sample
+    width -- Sample width (the width parameter)
+    latency -- Register latency
+    """
+    x = wrap(x, width)
+    thr = np.broadcast_to(wrap(threshold, width), x.shape)
+    # -threshold is computed in width bits in the RTL, so it wraps too.
+    y = np.where(x > thr, thr, np.where(x < wrap(-thr, width), wrap(-thr, width), x))
+    return pipeline(y, latency)
+
+def compress(x, width=24):
+    """ Compress samples to the 12-bit codes delay.sv stores with
+    compand=1: a sign bit, a 4-bit exponent and a 7-bit mantissa of the
+    magnitude without its LSB. Exponent 0 holds magnitudes below 128
+    exactly; exponent e holds (128 + mantissa) << (e - 1), truncated.
+    The most negative sample is stored as the most positive one,
+    negated.
+
+    Arguments:
+    x -- Array of input samples
+    width -- Sample width, at most 24
+    """
+    assert width <= 24, "12-bit codes hold at most 24-bit samples"
+    x = wrap(x, width)
+    sign = (x < 0).astype(np.int64)
+    mag = np.minimum(np.abs(x), (1 << (width - 1)) - 1) >> 1
+    e = np.zeros_like(mag)
+    for k in range(15):
+        e += mag >= (128 << k)
+    m = np.where(e == 0, mag, (mag >> np.maximum(e - 1, 0)) & 127)
+    return (sign << 11) | (e << 7) | m
+
+def expand(c, width=24):
+    """ Expand 12-bit codes from compress() back to samples.
+
+    Arguments:
+    c -- Array of codes
+    width -- Sample width
+    """
+    c = np.asarray(c, dtype=np.int64)
+    e = (c >> 7) & 15
+    m = c & 127
+    mag = np.where(e == 0, m, (128 | m) << np.maximum(e - 1, 0)) << 1
+    return wrap(np.where(c >> 11 & 1, -mag, mag), width)
+
+def delay(x, delay=480, width=24, feedback=0, mix=256, compand=0, latency=1):
+    """ Model of delay.sv: the input plus the delay line's output scaled
+    by feedback / 256 is written to the delay line (saturated), and the
+    output is mixed from the input and the delay line's output,
+    x + (d - x) * mix / 256. The delay line is silent until it has
+    been filled once.
+
+    Arguments:
+    x -- Array of input samples
+    delay -- Delay in samples (the delay parameter)
+    width -- Sample width (the width parameter)
+    feedback -- Feedback gain, in 256ths
+    mix -- Level of the delayed signal, in 256ths (256 is only it)
+    compand -- Store compress()ed samples (the compand parameter)
+    latency -- Register latency
+    """
+    x = wrap(x, width)
+    hi = (1 << (width - 1)) - 1
+    w = np.zeros_like(x)
+    d = np.zeros_like(x)
+    # Each block of delay samples only reads what the one before wrote.
+    for s in range(delay, len(x), delay):
+        e = min(s + delay, len(x))
+        w[s - delay:s] = np.clip(x[s - delay:s] + ((d[s - delay:s] * feedback) >> 8), -hi - 1, hi)
+        d[s:e] = w[s - delay:e - delay]
+        if compand:
+            d[s:e] = expand(compress(d[s:e], width), width)
+    y = wrap(x + (((d - x) * mix) >> 8), width)
+    return pipeline(y, latency)
+
+def chorus(x, delay=480, width=24, latency=1):
+    """ Model of chorus.sv: the average of the dry signal and a copy
+    delayed by delay samples (an arithmetic shift right, which rounds
+    toward negative infinity).
+
+    Arguments:
+    x -- Array of input samples
+    delay -- Delay of the wet signal in samples (the delay parameter)
+    width -- Sample width (the width parameter)
+    latency -- Register latency
+    """
+    dry = wrap(x, width)
+    wet = delay_line(dry, delay)
+    return pipeline((dry + wet) >> 1, latency)
+
+# States of the loop.sv FSM, in the order loop_en steps through them.
+IDLE, RECORD, PLAYBACK = 0, 1, 2
+
+def loop_states(loop_en):
+    """ Get the state of the loop.sv FSM at each rising edge (before the
+    edge updates it). Every edge with loop_en high advances the state
+    IDLE -> RECORD -> PLAYBACK -> IDLE.
+
+    Arguments:
+    loop_en -- Array of loop_en values, one per sample
+    """
+    presses = np.cumsum(np.asarray(loop_en, dtype=np.int64) != 0)
+    # The state at edge n only counts the presses at earlier edges.
+    return delay_line(presses, 1) % 3
+
+def looper(x, loop_en, depth=48000, width=24, latency=1):
+    """ Model of loop.sv: in IDLE and RECORD the input passes through,
+    and the RECORD samples (up to depth of them) are kept. In PLAYBACK
+    the recording is repeated and added to the input, wrapping at width
+    bits.
+
+    Arguments:
+    x -- Array of input samples
+    loop_en -- Array of loop_en values, one per sample
+    depth -- Maximum number of recorded samples (the memory depth)
+    width -- Sample width (the width parameter)
+    latency -- Register latency
+    """
+    x = wrap(x, width)
+    state = loop_states(loop_en)
+    y = x.copy()
+
+    # Loop over the (few) state changes, and vectorize within each
+    # stretch of constant state.
+    edges = np.flatnonzero(np.diff(state)) + 1
+    starts = np.concatenate(([0], edges))
+    ends = np.concatenate((edges, [len(x)]))
+    recording = np.zeros(0, dtype=np.int64)
+    for s, e in zip(starts, ends):
+        if state[s] == RECORD:
+            recording = x[s:min(e, s + depth)]
+        elif state[s] == PLAYBACK and len(recording):
+            y[s:e] = wrap(x[s:e] + recording[np.arange(e - s) % len(recording)], width)
+
+    return pipeline(y, latency)
@@ -0,0 +1,77 @@
+# Lint every effect with Verilator, with the flags of test_lint and
+# test_style, in parallel, and print the warnings like a compiler
+# (file:line:column: severity-CODE: message), e.g. before committing:
+#
+#   python3 util/lint_all.py
+#   python3 util/lint_all.py --json lint.json rtl/creators
+#
+# Results are cached on the sources and flags (see
+# utilities.get_lint_result()), so only effects whose sources changed
+# run Verilator again. The exit status is 1 if there were any messages.
+
+import os
+import re
+import sys
+import json
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+sys.path.append(os.path.join(_REPO_ROOT, "util"))
+
+from run_all import LINT_ARGS, find_effects
+from utilities import get_lint_result, format_lint_message
+
+def get_timescale(tbpath):
+    """ Get the timescale a test module declares, without importing it
+    (and pytest and cocotb with it). """
+    for name in sorted(os.listdir(tbpath)):
+        if name.startswith("test_") and name.endswith(".py"):
+            with open(os.path.join(tbpath, name)) as fd:
+                m = re.search(r'^timescale\s*=\s*"([^"]+)"', fd.read(), re.M)
+            if m:
+                return m.group(1)
+    return "1ps/1ps"
+
+def lint_job(tbpath, kind):
+    """ Lint one effect with the flags of one kind of LINT_ARGS. Runs in
+    a thread: the work is in the Verilator subprocess. """
+    try:
+        result = get_lint_result("verilator", get_timescale(tbpath), tbpath, {},
+                                 compile_args=LINT_ARGS[kind], root=_REPO_ROOT)
+    except Exception as e:
+        result = dict(returncode=None, cached=False,
+                      messages=[dict(severity="error", code=None, file=None, line=None,
+                                     column=None, message=f"{type(e).__name__}: {e}")])
+    return dict(result, effect=os.path.relpath(tbpath, _REPO_ROOT), kind=kind)
+
+def main():
+    parser = argparse.ArgumentParser(description="Lint every effect in parallel, with cached results.")
+    parser.add_argument("paths", nargs="*", default=[os.path.join(_REPO_ROOT, "rtl")],
+                        help="Directories to search for filelist.json (default: rtl/)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count())
+    parser.add_argument("--json", default=None, help="Also write the messages to this JSON file")
+    args = parser.parse_args()
+
+    jobs = [(tbpath, kind) for tbpath in find_effects(args.paths) for kind in LINT_ARGS]
+    with ThreadPoolExecutor(max_workers=args.jobs) as pool:
+        results = list(pool.map(lambda job: lint_job(*job), jobs))
+
+    failed = 0
+    for r in results:
+        ok = r["returncode"] == 0 and not r["messages"]
+        failed += not ok
+        print(f"{'PASS' if ok else 'FAIL'} {r['kind']:5} {r['effect']:28} "
+              f"{len(r['messages'])} messages{' (cached)' if r['cached'] else ''}")
+        for m in r["messages"]:
+            print("    " + format_lint_message(m).replace("\n", "\n    "))
+
+    if args.json is not None:
+        with open(args.json, "w") as fd:
+            json.dump(results, fd, indent=2)
+
+    print(f"\n{len(results)} lint jobs, {failed} failed")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+# Generate the lookup tables used by the effects (e.g. softclip_lut.sv)
+# from a luts.json in each effect directory, like so:
+#
+# [
+#     {"module": "softclip_lut", "curve": "tanh", "width": 24, "n": 256, "drive": 3.0}
+# ]
+#
+# For each entry this writes, next to luts.json:
+#   <module>.sv       -- a combinational case-statement ROM
+#   <module>.memh     -- the table for $readmemh, for BRAM-backed ROMs
+#   <module>_table.py -- the table as a NumPy array, e.g. for tests
+#
+# An entry with "kind": "interp" (and a "cbits" slope width) is instead
+# a linearly interpolated table for interp_lut.sv, see interp_tables().
+# It writes <module>.sv (interp_lut with the matching parameters),
+# <module>_base.memh, <module>_slope.memh and <module>_table.py (BASE,
+# SLOPE and SHIFT).
+#
+# Every output starts with a hash of its entry and of this file, and is
+# only rewritten when that hash changes, so running this is cheap and
+# doesn't touch the timestamps make and the simulators look at.
+#
+#   python3 util/lut_gen.py                   # every luts.json under rtl/
+#   python3 util/lut_gen.py rtl/creators/overdrive
+#   python3 util/lut_gen.py --print tanh 24   # print a table
+
+import os
+import glob
+import json
+import math
+import hashlib
+import argparse
+
+import numpy as np
+
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+
+def curve_tanh(x, drive):
+    return np.tanh(drive * x) / math.tanh(drive)
+
+def curve_arctan(x, drive):
+    return np.arctan(drive * x) / math.atan(drive)
+
+def curve_cubic(x, drive):
+    # The classic cubic soft clip, 1.5u - 0.5u^3, which reaches full
+    # scale with zero slope at u = +/-1.
+    u = np.clip(drive * x, -1.0, 1.0)
+    return (1.5 * u - 0.5 * u ** 3) / (1.5 * min(drive, 1.0) - 0.5 * min(drive, 1.0) ** 3)
+
+def curve_tube(x, drive, bias=0.25):
+    # A biased tanh, like a triode: the negative half clips harder than
+    # the positive one, which adds even harmonics.
+    y = np.tanh(drive * (x + bias)) - math.tanh(drive * bias)
+    return y / max(abs(math.tanh(drive * (1 + bias)) - math.tanh(drive * bias)),
+                   abs(math.tanh(drive * (bias - 1)) - math.tanh(drive * bias)))
+
+# Each curve maps x in [-1, 1] to y in [-1, 1].
+CURVES = {"tanh": curve_tanh,
+          "arctan": curve_arctan,
+          "cubic": curve_cubic,
+          "tube": curve_tube}
+
+# Width of the iCE40 SB_MAC16 multiplier inputs. interp_lut.sv feeds it
+# a signed slope and a zero-extended (so one bit shorter) fraction.
+MAC_BITS = 16
+
+def table(curve="tanh", width=24, n=256, drive=3.0, points=None):
+    """ Get a table of n signed samples of width bits, where entry addr
+    holds the curve at x = (addr - n/2) / (n/2).
+
+    Arguments:
+    curve -- Name of the curve, one of CURVES
+    width -- Output width in bits
+    n -- Number of table entries, a power of 2
+    drive -- Curve steepness
+    points -- Number of samples to return, defaults to n (interp_tables()
+              needs n + 1, for the end of the last segment)
+    """
+    assert curve in CURVES, f"curve must be one of {list(CURVES)}, not {curve}"
+    assert n & (n - 1) == 0, "n must be a power of 2"
+    maxi = (1 << (width - 1)) - 1
+    x = (np.arange(n if points is None else points) - n / 2) / (n / 2)
+    y = CURVES[curve](x, drive)
+    # np.round rounds half to even, like Python's round()
+    return np.round(np.clip(y, -1.0, 1.0) * maxi).astype(np.int64)
+
+def interp_fbits(width, n):
+    """ Get the number of fraction bits interp_lut.sv multiplies by:
+    the input bits below the table address, at most MAC_BITS - 1. """
+    return min(width - (n.bit_length() - 1), MAC_BITS - 1)
+
+def interp_tables(curve="tanh", width=24, n=256, drive=3.0, cbits=16):
+    """ Get the tables of a linearly interpolated curve, as (base,
+    slope, shift). Segment addr starts at base[addr], and rises by
+    slope[addr] << shift over the segment. The slopes are rounded to
+    cbits signed bits, and shift is the smallest that makes them fit.
+
+    Arguments:
+    curve -- Name of the curve, one of CURVES
+    width -- Output width in bits
+    n -- Number of segments, a power of 2
+    drive -- Curve steepness
+    cbits -- Width of the slope table in bits
+    """
+    t = table(curve, width, n, drive, points=n + 1)
+    d = np.diff(t)
+    shift = max(0, int(np.abs(d).max()).bit_length() + 1 - cbits)
+    assert shift <= interp_fbits(width, n), f"cbits={cbits} is too narrow for n={n}"
+    half = 1 << (cbits - 1)
+    slope = np.clip(np.round(d / (1 << shift)), -half, half - 1).astype(np.int64)
+    return t[:n], slope, shift
+
+def render_sv(t, module, width):
+    """ Get the source of a case-statement ROM for table t, addressed by
+    the top bits of in_signal (offset by half the table, so that 0 is
+    in the middle). """
+    abits = len(t).bit_length() - 1
+    lines = [f"module {module} #(",
+             f"    parameter int width = {width}",
+             " ) (",
+             "    input logic signed [width-1:0] in_signal,",
+             "    output logic signed [width-1:0] out_signal",
+             ");",
+             "",
+             f"    logic [{abits - 1}:0] addr;",
+             f"    assign addr = in_signal[width-1:width-{abits}] + {abits}'d{len(t) // 2};",
+             "    always_comb begin ",
+             "        case (addr)"]
+    pad = len(str(len(t) - 1))
+    for addr, v in enumerate(t):
+        sign = "-" if v < 0 else ""
+        lines.append(f"            {abits}'d{addr:{pad}d} : out_signal = {sign}{width}'sd{abs(v)};")
+    lines += ["            default: out_signal = in_signal;",
+              "        endcase",
+              "    end",
+              "",
+              "endmodule",
+              ""]
+    return "\n".join(lines)
+
+def render_interp_sv(module, entry, shift):
+    """ Get the source of a module instantiating interp_lut.sv with the
+    parameters of an interp entry. """
+    return "\n".join([f"module {module} #(",
+                      f"    parameter int width = {entry['width']}",
+                      " ) (",
+                      "    input logic clk,",
+                      "    input logic signed [width-1:0] in_signal,",
+                      "    output logic signed [width-1:0] out_signal",
+                      ");",
+                      "",
+                      "    interp_lut #(",
+                      "        .width(width),",
+                      f"        .abits({entry['n'].bit_length() - 1}),",
+                      f"        .fbits({interp_fbits(entry['width'], entry['n'])}),",
+                      f"        .cbits({entry['cbits']}),",
+                      f"        .shift({shift}),",
+                      f"        .base_memh_p(\"{module}_base.memh\"),",
+                      f"        .slope_memh_p(\"{module}_slope.memh\")",
+                      "      ) lut (",
+                      "        .clk_i(clk),",
+                      "        .in_signal(in_signal),",
+                      "        .out_signal(out_signal)",
+                      "    );",
+                      "",
+                      "endmodule",
+                      ""])
+
+def render_memh(t, width):
+    """ Get the $readmemh contents for table t, in two's complement. """
+    digits = (width + 3) // 4
+    mask = (1 << width) - 1
+    return "".join(f"{int(v) & mask:0{digits}x}\n" for v in t)
+
+def render_array(name, t):
+    """ Get the source of a NumPy array assignment. """
+    values = ",\n    ".join(", ".join(str(v) for v in t[i:i + 8]) for i in range(0, len(t), 8))
+    return f"{name} = np.array([\n    {values}], dtype=np.int64)\n"
+
+def render_py(t, entry):
+    """ Get the source of a Python module defining TABLE. """
+    return (f"import numpy as np\n\n"
+            f"# {json.dumps(entry, sort_keys=True)}\n"
+            + render_array("TABLE", t))
+
+def render_interp_py(base, slope, shift, entry):
+    """ Get the source of a Python module defining BASE, SLOPE and
+    SHIFT. """
+    return (f"import numpy as np\n\n"
+            f"# {json.dumps(entry, sort_keys=True)}\n"
+            + render_array("BASE", base)
+            + render_array("SLOPE", slope)
+            + f"SHIFT = {shift}\n")
+
+def get_entry_hash(entry):
+    """ Get the hash identifying the outputs of one luts.json entry. """
+    h = hashlib.sha256(json.dumps(entry, sort_keys=True).encode())
+    with open(os.path.realpath(__file__), "rb") as fd:
+        h.update(fd.read())
+    return h.hexdigest()[:16]
+
+def write_if_changed(path, header, body, h):
+    """ Write header + body to path, unless path already starts with
+    header. Returns True if the file was written. """
+    first = f"{header} lut_gen: {h} -- generated by util/lut_gen.py, do not edit\n"
+    if os.path.exists(path):
+        with open(path) as fd:
+            if fd.readline() == first:
+                return False
+    with open(path, "w") as fd:
+        fd.write(first + body)
+    return True
+
+def generate(lutdir):
+    """ Generate the outputs of every entry in lutdir/luts.json. Returns
+    the list of files that were rewritten. """
+    with open(os.path.join(lutdir, "luts.json")) as fd:
+        entries = json.load(fd)
+
+    written = []
+    for entry in entries:
+        entry = dict(dict(curve="tanh", width=24, n=256, drive=3.0), **entry)
+        module = entry["module"]
+        h = get_entry_hash(entry)
+        if entry.get("kind", "case") == "interp":
+            base, slope, shift = interp_tables(entry["curve"], entry["width"], entry["n"],
+                                               entry["drive"], entry["cbits"])
+            outputs = [(module + ".sv", "//", render_interp_sv(module, entry, shift)),
+                       (module + "_base.memh", "//", render_memh(base, entry["width"])),
+                       (module + "_slope.memh", "//", render_memh(slope, entry["cbits"])),
+                       (module + "_table.py", "#", render_interp_py(base, slope, shift, entry))]
+        else:
+            t = table(entry["curve"], entry["width"], entry["n"], entry["drive"])
+            outputs = [(module + ".sv", "//", render_sv(t, module, entry["width"])),
+                       (module + ".memh", "//", render_memh(t, entry["width"])),
+                       (module + "_table.py", "#", render_py(t, entry))]
+        for name, header, body in outputs:
+            path = os.path.join(lutdir, name)
+            if write_if_changed(path, header, body, h):
+                written.append(path)
+    return written
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate lookup table ROMs from luts.json files.")
+    parser.add_argument("paths", nargs="*", default=[os.path.join(_REPO_ROOT, "rtl")],
+                        help="Directories to search for luts.json (default: rtl/)")
+    parser.add_argument("--print", nargs=2, metavar=("CURVE", "WIDTH"),
+                        help="Print a 256 entry table instead of generating files")
+    parser.add_argument("--drive", type=float, default=3.0)
+    args = parser.parse_args()
+
+    if args.print:
+        print(table(args.print[0], int(args.print[1]), drive=args.drive).tolist())
+        return
+
+    for p in args.paths:
+        for f in sorted(glob.glob(os.path.join(p, "**", "luts.json"), recursive=True)):
+            for path in generate(os.path.dirname(f)):
+                print("wrote", os.path.relpath(path, _REPO_ROOT))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+# Record where the time of a test run goes, as spans in the Chrome trace
+# event format (open the merged file in https://ui.perfetto.dev or
+# chrome://tracing). Set PROFILE_DIR to turn it on:
+#
+#   PROFILE_DIR=/tmp/prof make test
+#   PROFILE_DIR=/tmp/prof PROFILE_PYTHON=1 python3 util/run_all.py
+#   python3 util/profiling.py /tmp/prof -o trace.json
+#
+# Every process writes its own spans to PROFILE_DIR/trace-<pid>.json:
+#
+#   pytest / run_all  -- runner(): build (split into verilate and C++
+#                        compile when Verilator rebuilt the model), and
+#                        simulate, with the tests of the launch laid out
+#                        from their results.xml times
+#   simulator         -- startup (launching the simulator, elaborating,
+#                        starting cocotb, up to the test module's first
+#                        import of this module), and the cocotb helpers
+#                        of utilities.py, with the simulated time they
+#                        covered
+#
+# With PROFILE_PYTHON=1 the simulator's Python side also runs under
+# cProfile, written to PROFILE_DIR/python-<pid>.prof (read it with
+# python3 -m pstats). Time in a test that is not in Python is spent in
+# the simulation kernel.
+
+import os
+import sys
+import glob
+import json
+import time
+import atexit
+import argparse
+import functools
+import contextlib
+
+# Set by runner() in the simulator's environment: when it launched it
+LAUNCH = "PROFILE_LAUNCH"
+
+_events = []
+
+def enabled():
+    """ Whether spans are being recorded. """
+    return bool(os.environ.get("PROFILE_DIR"))
+
+def add_span(name, start, end, cat, tid=None, **args):
+    """ Record a span from start to end (time.time() seconds).
+
+    Arguments:
+    name -- Name of the span
+    cat -- Category, and the track it is drawn on unless tid is given
+    tid -- Track to draw it on
+    args -- Shown with the span
+    """
+    if not enabled():
+        return
+    _events.append(dict(name=name, cat=cat, ph="X", ts=start * 1e6, dur=(end - start) * 1e6,
+                        pid=os.getpid(), tid=tid or cat, args=args))
+
+@contextlib.contextmanager
+def span(name, cat="runner", **args):
+    """ Record the time the body takes as a span. """
+    start = time.time()
+    try:
+        yield
+    finally:
+        add_span(name, start, time.time(), cat, **args)
+
+def spanned(f):
+    """ Record every call of an async cocotb helper as a span, with the
+    simulated time it covered. """
+    @functools.wraps(f)
+    async def wrapper(*args, **kwargs):
+        if not enabled():
+            return await f(*args, **kwargs)
+        from cocotb.utils import get_sim_time
+        start, sim = time.time(), get_sim_time("ns")
+        try:
+            return await f(*args, **kwargs)
+        finally:
+            add_span(f.__name__, start, time.time(), "cocotb", sim_ns=get_sim_time("ns") - sim)
+    return wrapper
+
+def flush(label=None):
+    """ Write the spans of this process so far to PROFILE_DIR.
+
+    Arguments:
+    label -- Name of this process in the trace
+    """
+    if not enabled() or not _events:
+        return
+    events = list(_events)
+    if label is not None:
+        events.append(dict(name="process_name", ph="M", pid=os.getpid(), args=dict(name=label)))
+    os.makedirs(os.environ["PROFILE_DIR"], exist_ok=True)
+    path = os.path.join(os.environ["PROFILE_DIR"], f"trace-{os.getpid()}.json")
+    with open(path, "w") as fd:
+        json.dump(events, fd)
+
+def merge(path):
+    """ Get one Chrome trace of every trace-<pid>.json in path. """
+    events = []
+    for f in sorted(glob.glob(os.path.join(path, "trace-*.json"))):
+        with open(f) as fd:
+            events += json.load(fd)
+    return dict(traceEvents=events, displayTimeUnit="ms")
+
+def _start_simulator():
+    """ Start recording the simulator's side, when this module is first
+    imported in a simulator launched by runner(). """
+    label = f"simulator {os.environ.get('TOPLEVEL', '')} {os.environ.get('TESTCASE') or 'all'}".strip()
+    add_span("startup", float(os.environ[LAUNCH]), time.time(), "simulator")
+
+    profile = None
+    if os.environ.get("PROFILE_PYTHON", "0") != "0":
+        import cProfile
+        profile = cProfile.Profile()
+        profile.enable()
+
+    def finish():
+        os.makedirs(os.environ["PROFILE_DIR"], exist_ok=True)
+        if profile is not None:
+            profile.disable()
+            profile.dump_stats(os.path.join(os.environ["PROFILE_DIR"], f"python-{os.getpid()}.prof"))
+        flush(label)
+    atexit.register(finish)
+
+if enabled() and os.environ.get(LAUNCH):
+    _start_simulator()
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge the spans in a PROFILE_DIR into one Chrome trace.")
+    parser.add_argument("path", help="The PROFILE_DIR of the run")
+    parser.add_argument("-o", "--output", default="trace.json")
+    args = parser.parse_args()
+
+    trace = merge(args.path)
+    if not trace["traceEvents"]:
+        sys.exit(f"No spans in {args.path}")
+    with open(args.output, "w") as fd:
+        json.dump(trace, fd)
+    print(f"Wrote {len(trace['traceEvents'])} events to {args.output}")
+
+if __name__ == "__main__":
+    main()
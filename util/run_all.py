@@ -0,0 +1,217 @@
+# Run the compile, lint and simulation jobs of every effect in the
+# repository in parallel. An effect is any directory under rtl/ with a
+# filelist.json and a test_*.py module, e.g.:
+#
+#   python3 util/run_all.py -j 16
+#   python3 util/run_all.py -j 8 --cache /tmp/fx-build rtl/creators
+#
+# Each simulation job runs every cocotb test of one effect on one
+# simulator in a single launch (see utilities.regression()), in its own
+# run/ directory. Compiled models go through the same content-addressed
+# cache as pytest, so a later `make test` reuses them (and vice versa).
+#
+# Jobs are started longest first, by the median of their earlier runs
+# in the duration history (see durations.py); a compile job counts the
+# simulation that waits for it. Jobs without history start first, and
+# jobs that took much longer than their median are reported at the end.
+
+import os
+import sys
+import glob
+import time
+import heapq
+import argparse
+import itertools
+import importlib.util
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+sys.path.append(os.path.join(_REPO_ROOT, "util"))
+
+import durations
+
+SIMULATORS = ["verilator", "icarus"]
+
+# The same flags test_lint and test_style pass to lint()
+LINT_ARGS = {"lint": [],
+             "style": ["--lint-only", "-Wwarn-style", "-Wno-lint"]}
+
+def find_effects(paths):
+    """ Get the list of effect directories below paths, sorted.
+
+    Arguments:
+    paths -- List of directories to search
+    """
+    effects = []
+    for p in paths:
+        for f in glob.glob(os.path.join(p, "**", "filelist.json"), recursive=True):
+            tbpath = os.path.dirname(os.path.realpath(f))
+            if glob.glob(os.path.join(tbpath, "test_*.py")):
+                effects.append(tbpath)
+    return sorted(set(effects))
+
+def load_testbench(tbpath):
+    """ Import the test module of an effect, the way pytest would. The
+    caller must remove tbpath from sys.path afterwards, since cocotb
+    resolves the module from the same search path. """
+    sys.path.insert(0, tbpath)
+    path = sorted(glob.glob(os.path.join(tbpath, "test_*.py")))[0]
+    name = os.path.splitext(os.path.basename(path))[0]
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def run_job(kind, tbpath, simulator, params={}):
+    """ Run one job in a worker process. Returns a dictionary with the
+    job's status, wall time and CPU time (including the simulator and
+    compiler subprocesses).
+
+    Arguments:
+    kind -- One of "compile", "sim", "lint" or "style"
+    tbpath -- Absolute path to the effect directory
+    simulator -- Name of the simulator
+    params -- Dictionary of top level parameters
+    """
+    from utilities import runner, lint, get_results, get_work_dir
+
+    start = time.perf_counter()
+    t0 = os.times()
+    status, detail = "PASS", ""
+
+    # Behave like `make test`, which runs pytest from the effect directory.
+    os.chdir(tbpath)
+    try:
+        tb = load_testbench(tbpath)
+        pymodule = tb.__name__
+        if kind == "compile":
+            runner(simulator, tb.timescale, tbpath, params, pymodule=pymodule, root=_REPO_ROOT, compile_only=True)
+        elif kind == "sim":
+            try:
+                results_xml = runner(simulator, tb.timescale, tbpath, params, pymodule=pymodule, root=_REPO_ROOT)
+            except SystemExit:
+                # Failing tests still leave a results file behind.
+                results_xml = os.path.join(get_work_dir(tbpath, "all", params, simulator), "results.xml")
+                if not os.path.exists(results_xml):
+                    raise
+            results = get_results(results_xml)
+            failed = [n for n, r in results.items() if not r["passed"]]
+            detail = f"{len(results) - len(failed)}/{len(results)} tests passed"
+            if failed:
+                status = "FAIL"
+                detail += " (failed: " + ", ".join(failed) + ")"
+        else:
+            lint(simulator, tb.timescale, tbpath, params, compile_args=list(LINT_ARGS[kind]), pymodule=pymodule, root=_REPO_ROOT)
+    except BaseException as e:
+        # SystemExit is how cocotb-test reports tool failures.
+        status, detail = "FAIL", f"{type(e).__name__}: {e}"
+    finally:
+        # Workers are reused, and several effects have a test module
+        # with the same name.
+        while tbpath in sys.path:
+            sys.path.remove(tbpath)
+
+    t1 = os.times()
+    cpu = (t1.user - t0.user) + (t1.system - t0.system) \
+        + (t1.children_user - t0.children_user) + (t1.children_system - t0.children_system)
+    return dict(kind=kind, tbpath=tbpath, simulator=simulator, status=status,
+                detail=detail, wall=time.perf_counter() - start, cpu=cpu)
+
+def main():
+    parser = argparse.ArgumentParser(description="Run every effect's compile, lint and simulation jobs in parallel.")
+    parser.add_argument("paths", nargs="*", default=[os.path.join(_REPO_ROOT, "rtl")],
+                        help="Directories to search for filelist.json (default: rtl/)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(),
+                        help="Number of worker processes (default: number of CPUs)")
+    parser.add_argument("--simulators", nargs="+", default=SIMULATORS, choices=SIMULATORS)
+    parser.add_argument("--cache", default=None,
+                        help="Shared compiled model cache directory (sets BUILD_CACHE_DIR)")
+    parser.add_argument("--no-lint", action="store_true", help="Skip the lint and style jobs")
+    parser.add_argument("--profile", default=None, choices=["debug", "fast"],
+                        help="Verilator build profile (sets BUILD_PROFILE, default: debug)")
+    parser.add_argument("--no-history", action="store_true",
+                        help="Neither read nor record the duration history (sets DURATIONS_DB to nothing)")
+    args = parser.parse_args()
+
+    if args.cache is not None:
+        os.environ["BUILD_CACHE_DIR"] = os.path.abspath(args.cache)
+    if args.profile is not None:
+        os.environ["BUILD_PROFILE"] = args.profile
+    if args.no_history:
+        os.environ["DURATIONS_DB"] = durations.DB = ""
+
+    effects = find_effects(args.paths)
+    if not effects:
+        sys.exit("No filelist.json with a test module found.")
+
+    medians = durations.get_job_medians()
+
+    def estimate(kind, tbpath, simulator):
+        # Jobs that have never run may be the longest.
+        t = medians.get((kind, os.path.relpath(tbpath, _REPO_ROOT), simulator), float("inf"))
+        if kind == "compile":
+            t += estimate("sim", tbpath, simulator)
+        return t
+
+    # Jobs ready to start, longest first. Only as many jobs as there are
+    # workers are handed to the pool, so that a long job that becomes
+    # ready late doesn't queue behind short ones.
+    ready = []
+    order = itertools.count()
+    def push(kind, tbpath, simulator):
+        heapq.heappush(ready, (-estimate(kind, tbpath, simulator), next(order), kind, tbpath, simulator))
+
+    for tbpath in effects:
+        for simulator in args.simulators:
+            push("compile", tbpath, simulator)
+        if not args.no_lint:
+            for kind in LINT_ARGS:
+                push(kind, tbpath, "verilator")
+
+    start = time.perf_counter()
+    results = []
+    slow = []
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        running = set()
+        while ready or running:
+            while ready and len(running) < args.jobs:
+                _, _, kind, tbpath, simulator = heapq.heappop(ready)
+                running.add(pool.submit(run_job, kind, tbpath, simulator))
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                results.append(result)
+                print(format_result(result), flush=True)
+                durations.record_job(result)
+                median = medians.get((result["kind"], os.path.relpath(result["tbpath"], _REPO_ROOT), result["simulator"]))
+                if result["status"] == "PASS" and durations.is_slowdown(result["wall"], median):
+                    slow.append((result, median))
+                # Simulation jobs are ready as soon as their model is built.
+                if result["kind"] == "compile" and result["status"] == "PASS":
+                    push("sim", result["tbpath"], result["simulator"])
+
+    wall = time.perf_counter() - start
+    cpu = sum(r["cpu"] for r in results)
+    failed = [r for r in results if r["status"] != "PASS"]
+
+    print()
+    print(f"{len(results)} jobs, {len(failed)} failed, {len(effects)} effects, {args.jobs} workers")
+    print(f"Wall-clock time: {wall:8.1f}s")
+    print(f"CPU time:        {cpu:8.1f}s ({cpu / wall if wall else 0:.1f}x parallel speedup)")
+    for r in failed:
+        print(format_result(r))
+    if slow:
+        print(f"\nSlower than the median of their last {durations.WINDOW} runs:")
+        for r, median in slow:
+            print(f"{format_result(r)} (median {median:.1f}s)")
+
+    sys.exit(1 if failed else 0)
+
+def format_result(r):
+    """ Get a one line summary of a job result. """
+    name = os.path.relpath(r["tbpath"], _REPO_ROOT)
+    return (f"{r['status']:4} {r['kind']:7} {r['simulator']:9} {name:28} "
+            f"wall {r['wall']:7.1f}s cpu {r['cpu']:7.1f}s  {r['detail']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# Compare a captured output stream to a reference stream without
+# assuming how many registers the DUT has. The reference is a golden.py
+# model called with the default latency of 1; the captured stream is
+# out_signal after every rising edge, from the edge that takes the
+# first input (process_samples() with latency 1), with at least
+# latency - 1 extra samples at the end. The two are aligned by the
+# DUT's register latency, either declared (the "latency" localparam of
+# the module, see utilities.get_latency()) or found here:
+#
+#   board = Scoreboard("random_samples", latency=None, tolerance=0)
+#   aligned = board.check(captured, golden.overdrive(x, 24), x)
+#
+# Found latencies are the shift with the most samples within tolerance
+# of the reference, a cross-correlation of the two streams that is
+# not thrown off by clipping or gain the way a product correlation is.
+
+import numpy as np
+
+# Largest latency find_latency() tries, and the number of extra samples
+# to capture for it
+MAX_LATENCY = 16
+
+def find_latency(got, exp, tolerance=0, max_latency=MAX_LATENCY):
+    """ Get (latency, matches): the register latency (at least 1) at
+    which the most samples of got are within tolerance of exp, and how
+    many are. The smallest latency wins a tie.
+
+    Arguments:
+    got -- Captured samples, with at least max_latency - 1 extra samples
+    exp -- Reference samples, for latency 1
+    tolerance -- Largest difference that counts as a match
+    max_latency -- Largest latency to try
+    """
+    got = np.asarray(got, dtype=np.int64)
+    exp = np.asarray(exp, dtype=np.int64)
+    n = min(len(exp), len(got) - max_latency + 1)
+    assert n > 0, f"Need at least {max_latency - 1} more captured samples than reference samples"
+    matches = [np.count_nonzero(np.abs(got[k:k + n] - exp[:n]) <= tolerance) for k in range(max_latency)]
+    best = int(np.argmax(matches))
+    return best + 1, int(matches[best])
+
+def align(got, n, latency):
+    """ Get the n captured samples that line up with a reference for
+    the given latency. """
+    assert len(got) >= n + latency - 1, f"Captured {len(got)} samples, need {n + latency - 1} for latency {latency}"
+    return np.asarray(got[latency - 1:latency - 1 + n], dtype=np.int64)
+
+class Scoreboard:
+    """ Aligns captured output to a reference and reports mismatches.
+
+    Arguments:
+    name -- Name used in the reports, e.g. the test name
+    latency -- Register latency of the DUT, or None to find it
+    tolerance -- Largest allowed absolute difference to the reference
+    max_latency -- Largest latency to try when finding it
+    """
+
+    def __init__(self, name, latency=None, tolerance=0, max_latency=MAX_LATENCY):
+        self.name = name
+        self.latency = latency
+        self.tolerance = tolerance
+        self.max_latency = max_latency
+
+    def compare(self, got, exp):
+        """ Get a dictionary describing how got compares to exp: latency,
+        found (whether it was found rather than declared), aligned (the
+        aligned samples), mismatches (their indices), max_error, and
+        best (the latency that would match the most samples, and how
+        many). """
+        exp = np.asarray(exp, dtype=np.int64)
+        best = None
+        if len(got) >= len(exp) + self.max_latency - 1:
+            best = find_latency(got, exp, self.tolerance, self.max_latency)
+        found = self.latency is None
+        if found:
+            assert best is not None, f"{self.name}: capture {self.max_latency - 1} extra samples to find the latency"
+            latency = best[0]
+        else:
+            latency = self.latency
+
+        aligned = align(got, len(exp), latency)
+        err = np.abs(aligned - exp)
+        return dict(latency=latency, found=found, aligned=aligned,
+                    mismatches=np.flatnonzero(err > self.tolerance),
+                    max_error=int(err.max()) if len(err) else 0, best=best)
+
+    def summary(self, result, exp, inputs=None):
+        """ Get a report of a compare() result, for assertion messages. """
+        bad = result["mismatches"]
+        how = "found" if result["found"] else "declared"
+        s = f"{self.name}: latency {result['latency']} ({how}), "
+        if not len(bad):
+            return s + f"all {len(exp)} samples match"
+        i = bad[0]
+        s += (f"{len(bad)} of {len(exp)} samples differ by more than {self.tolerance} "
+              f"(max {result['max_error']}), first at sample {i}: ")
+        if inputs is not None:
+            s += f"in={int(np.asarray(inputs)[i])}, "
+        s += f"expected={int(exp[i])}, got={int(result['aligned'][i])}"
+        if result["best"] is not None and result["best"][0] != result["latency"]:
+            s += f"; latency {result['best'][0]} would match {result['best'][1]} samples"
+        return s
+
+    def check(self, got, exp, inputs=None):
+        """ Assert that got matches exp once aligned, and return the
+        aligned samples.
+
+        Arguments:
+        got -- Captured samples
+        exp -- Reference samples, for latency 1
+        inputs -- Input samples, shown with the first mismatch
+        """
+        exp = np.asarray(exp, dtype=np.int64)
+        result = self.compare(got, exp)
+        assert not len(result["mismatches"]), self.summary(result, exp, inputs)
+        return result["aligned"]
@@ -0,0 +1,142 @@
+# Size an interpolated soft-clip table (interp_lut.sv): try every table
+# size and slope width, measure the error of the bit-exact model against
+# the floating point curve, and pick the cheapest that meets a budget.
+#
+#   python3 util/softclip_size.py                  # 16-bit accurate tanh
+#   python3 util/softclip_size.py --budget 32 --curve arctan --drive 2
+#
+# The budget is the largest allowed error, in LSBs of the width-bit
+# output (acc is the same error in bits of accuracy). The cost is
+# estimated from the table sizes: SB_RAM40_4K blocks for both tables,
+# plus the one SB_MAC16 every candidate uses. The
+# printed luts.json entry can be pasted into an effect's luts.json; run
+# util/synth.py on the effect for the exact cell counts.
+
+import os
+import sys
+import json
+import math
+import argparse
+
+import numpy as np
+
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+sys.path.append(os.path.join(_REPO_ROOT, "util"))
+
+import golden
+import lut_gen
+
+# Depth x width configurations of an SB_RAM40_4K
+BRAM_SHAPES = [(256, 16), (512, 8), (1024, 4), (2048, 2)]
+
+def get_brams(n, width):
+    """ Get the number of SB_RAM40_4K blocks a table of n entries of
+    width bits needs. """
+    return min(math.ceil(n / d) * math.ceil(width / w) for d, w in BRAM_SHAPES)
+
+def get_inputs(width, points):
+    """ Get points inputs spread evenly over the full width-bit range. """
+    return np.unique(np.linspace(-(1 << (width - 1)), (1 << (width - 1)) - 1, points).astype(np.int64))
+
+def get_reference(x, curve, width, drive):
+    """ Get the floating point curve at inputs x, in output LSBs. """
+    maxi = (1 << (width - 1)) - 1
+    return np.clip(lut_gen.CURVES[curve](x / float(1 << (width - 1)), drive), -1.0, 1.0) * maxi
+
+def evaluate(x, ref, curve, width, drive, n, cbits):
+    """ Get the cost and error of one candidate, as a dictionary. """
+    base, slope, shift = lut_gen.interp_tables(curve, width, n, drive, cbits)
+    err = golden.interp(x, base, slope, shift, width) - ref
+    return dict(n=n, cbits=cbits, shift=shift,
+                bits=n * (width + cbits),
+                brams=get_brams(n, width) + get_brams(n, cbits),
+                dsps=1,
+                max_err=float(np.abs(err).max()),
+                rms_err=float(np.sqrt(np.mean(err ** 2))))
+
+def evaluate_case(x, ref, curve, width, drive, n=256):
+    """ Get the cost and error of the plain case-statement table
+    (softclip_lut.sv), for comparison. """
+    t = lut_gen.table(curve, width, n, drive)
+    abits = n.bit_length() - 1
+    err = t[((x >> (width - abits)) + n // 2) & (n - 1)] - ref
+    return dict(n=n, cbits=0, shift=0, bits=n * width, brams=0, dsps=0,
+                max_err=float(np.abs(err).max()),
+                rms_err=float(np.sqrt(np.mean(err ** 2))))
+
+def search(curve="tanh", width=24, drive=3.0, budget=None, abits=range(4, 12), cbits=range(4, 17), points=1 << 20):
+    """ Evaluate every candidate. Returns (candidates, best), where
+    candidates are sorted cheapest first and best is the cheapest one
+    within budget (or None).
+
+    Arguments:
+    curve -- Name of the curve, one of lut_gen.CURVES
+    width -- Sample width in bits
+    drive -- Curve steepness
+    budget -- Largest allowed error in LSBs, defaults to 16-bit accuracy
+    abits -- Table address widths to try
+    cbits -- Slope widths to try (at most lut_gen.MAC_BITS)
+    points -- Number of inputs to measure the error on
+    """
+    if budget is None:
+        budget = 1 << max(width - 16, 0)
+    x = get_inputs(width, points)
+    ref = get_reference(x, curve, width, drive)
+
+    candidates = []
+    for a in abits:
+        for c in cbits:
+            try:
+                candidates.append(evaluate(x, ref, curve, width, drive, 1 << a, c))
+            except AssertionError:
+                # The slopes don't fit in c bits at this table size.
+                continue
+    candidates.sort(key=lambda r: (r["brams"], r["dsps"], r["bits"], r["max_err"]))
+    best = next((r for r in candidates if r["max_err"] <= budget), None)
+    return candidates, best
+
+def main():
+    parser = argparse.ArgumentParser(description="Find the cheapest interpolated soft-clip table within an error budget.")
+    parser.add_argument("--curve", default="tanh", choices=list(lut_gen.CURVES))
+    parser.add_argument("--width", type=int, default=24)
+    parser.add_argument("--drive", type=float, default=3.0)
+    parser.add_argument("--budget", type=float, default=None,
+                        help="Largest allowed error in output LSBs (default: 16-bit accurate)")
+    parser.add_argument("--points", type=int, default=1 << 20, help="Number of inputs to measure on")
+    parser.add_argument("--module", default="softclip_interp_lut", help="Module name for the luts.json entry")
+    parser.add_argument("-a", "--all", action="store_true", help="Print every candidate, not just the best per size")
+    args = parser.parse_args()
+
+    budget = args.budget if args.budget is not None else 1 << max(args.width - 16, 0)
+    candidates, best = search(args.curve, args.width, args.drive, budget, points=args.points)
+    x = get_inputs(args.width, args.points)
+    case = evaluate_case(x, get_reference(x, args.curve, args.width, args.drive), args.curve, args.width, args.drive)
+
+    print(f"{'table':>6} {'cbits':>5} {'shift':>5} {'ROM bits':>9} {'BRAMs':>5} {'DSPs':>4} "
+          f"{'max err':>10} {'rms err':>10} {'acc':>5}")
+    def row(r, note=""):
+        enob = args.width - 1 - math.log2(max(r["max_err"], 1e-9))
+        print(f"{r['n']:6} {r['cbits']:5} {r['shift']:5} {r['bits']:9} {r['brams']:5} {r['dsps']:4} "
+              f"{r['max_err']:10.1f} {r['rms_err']:10.1f} {enob:5.1f} {note}")
+
+    row(case, "(softclip_lut, no interpolation)")
+    for r in candidates:
+        # By default only show, for each table size, the narrowest slope
+        # that is within budget or else the most accurate one.
+        if not args.all:
+            same = [c for c in candidates if c["n"] == r["n"]]
+            ok = [c for c in same if c["max_err"] <= budget]
+            pick = min(ok, key=lambda c: c["cbits"]) if ok else min(same, key=lambda c: c["max_err"])
+            if r is not pick:
+                continue
+        row(r, "<- best" if r is best else ("" if r["max_err"] <= budget else "(over budget)"))
+
+    if best is None:
+        print(f"No candidate is within {budget} LSBs.")
+        sys.exit(1)
+    entry = dict(module=args.module, kind="interp", curve=args.curve, width=args.width,
+                 n=best["n"], drive=args.drive, cbits=best["cbits"])
+    print(f"\nluts.json entry for a max error of {budget} LSBs:\n    {json.dumps(entry)}")
+
+if __name__ == "__main__":
+    main()
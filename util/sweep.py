@@ -0,0 +1,169 @@
+# Sweep the top level parameters of an effect over a grid, and for every
+# point run its tests, measure its simulated throughput, and synthesize
+# it, all in parallel. Prints a table of the results and picks the
+# largest configuration that passes, fits the UP5K and meets timing:
+#
+#   python3 util/sweep.py rtl/changers/chorus -p width=16,20,24 -p delay=240,480,960 -j 16
+#   python3 util/sweep.py rtl/repeaters/delay -p delay=4800,24000,48000 --no-synth
+#
+# Points are compared in the order of the -p options, so the example
+# above prefers the widest samples, then the longest delay. A point is
+# Pareto optimal if no other point that fits is at least as large in
+# every parameter while using no more LCs and BRAMs.
+#
+# Compiled models go through the same cache as pytest and run_all.py
+# (see --cache), so a point that has already been built isn't rebuilt.
+
+import os
+import sys
+import json
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+sys.path.append(os.path.join(_REPO_ROOT, "util"))
+
+from run_all import SIMULATORS, run_job, load_testbench
+from synth import UP5K, synthesize, parse_param
+
+def parse_axis(s):
+    """ Parse a "name=v1,v2,..." command line grid axis into (name,
+    [values]). """
+    k, values = s.split("=", 1)
+    return k, [parse_param(f"{k}={v}")[k] for v in values.split(",")]
+
+def bench_job(tbpath, simulator, params, samples):
+    """ Get the samples per second process_samples() reaches on one
+    point, in a worker process (see bench_samples.py), or None. """
+    from utilities import runner, get_work_dir, environ
+
+    os.chdir(tbpath)
+    try:
+        tb = load_testbench(tbpath)
+        with environ(BENCH_SAMPLES=str(samples)):
+            runner(simulator, tb.timescale, tbpath, params, testname="throughput",
+                   pymodule="bench_samples", root=_REPO_ROOT, trace="off")
+        with open(os.path.join(get_work_dir(tbpath, "throughput", params, simulator), "bench_samples.json")) as fd:
+            return json.load(fd)["batched"]
+    except BaseException:
+        return None
+    finally:
+        while tbpath in sys.path:
+            sys.path.remove(tbpath)
+
+def synth_job(tbpath, params):
+    """ Synthesize one point in a worker process. Returns the metrics,
+    with the error instead if synthesis failed. """
+    try:
+        return synthesize(tbpath, params)
+    except BaseException as e:
+        return dict(error=f"{type(e).__name__}: {e}")
+
+def fits(r, freq):
+    """ Whether a point passed its tests, fits the UP5K and closes
+    timing at freq MHz. Unknown results (e.g. with --no-synth) don't
+    count against it. """
+    if r["sim"] is not None and r["sim"]["status"] != "PASS":
+        return False
+    s = r["synth"]
+    if s is None:
+        return True
+    if "error" in s:
+        return False
+    if any((s.get(k) or 0) > cap for k, cap in UP5K.items()):
+        return False
+    return s.get("fmax") is None or s["fmax"] >= freq
+
+def pareto(results, names):
+    """ Mark the Pareto optimal points among those that fit. """
+    def key(r):
+        s = r["synth"] or {}
+        return [r["params"][n] for n in names], [s.get("lc") or 0, s.get("bram") or 0]
+
+    def dominates(a, b):
+        (pa, ca), (pb, cb) = key(a), key(b)
+        return (all(x >= y for x, y in zip(pa, pb)) and all(x <= y for x, y in zip(ca, cb))
+                and (pa, ca) != (pb, cb))
+
+    ok = [r for r in results if r["fits"]]
+    for r in results:
+        r["pareto"] = r["fits"] and not any(dominates(o, r) for o in ok)
+
+def format_row(r, names):
+    """ Get one table row of a sweep point. """
+    params = " ".join(f"{r['params'][n]:>8}" for n in names)
+    sim = "-" if r["sim"] is None else r["sim"]["status"]
+    rate = "-" if r["throughput"] is None else f"{r['throughput']:.0f}"
+    s = r["synth"] or {}
+    if "error" in s:
+        cells = f"{'FAIL':>6} {'':>5} {'':>4} {'':>7}"
+    else:
+        fmax = "-" if s.get("fmax") is None else f"{s['fmax']:.1f}"
+        cells = " ".join(f"{'-' if s.get(k) is None else s[k]:>{w}}" for k, w in [("lc", 6), ("bram", 5), ("dsp", 4)])
+        cells += f" {fmax:>7}"
+    flags = ("fits" if r["fits"] else "") + (" pareto" if r["pareto"] else "")
+    return f"{params} {sim:>5} {rate:>10} {cells}  {flags}"
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep an effect's parameters through simulation and synthesis.")
+    parser.add_argument("effect")
+    parser.add_argument("-p", "--param", action="append", type=parse_axis, required=True,
+                        help="Grid axis, e.g. width=16,24 (repeat for more axes)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count())
+    parser.add_argument("--simulator", default="verilator", choices=SIMULATORS)
+    parser.add_argument("--cache", default=None, help="Shared compiled model cache directory (sets BUILD_CACHE_DIR)")
+    parser.add_argument("--samples", type=int, default=20000,
+                        help="Samples for the throughput measurement, 0 to skip it")
+    parser.add_argument("--no-sim", action="store_true", help="Skip the tests")
+    parser.add_argument("--no-synth", action="store_true", help="Skip synthesis")
+    parser.add_argument("--freq", type=float, default=12.0, help="Clock the design must close timing at, in MHz")
+    parser.add_argument("-o", "--output", default=None, help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    if args.cache is not None:
+        os.environ["BUILD_CACHE_DIR"] = os.path.abspath(args.cache)
+
+    tbpath = os.path.realpath(args.effect)
+    names = [k for k, _ in args.param]
+    points = [dict(zip(names, v)) for v in itertools.product(*(values for _, values in args.param))]
+
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        futures = []
+        for params in points:
+            futures.append((
+                None if args.no_sim else pool.submit(run_job, "sim", tbpath, args.simulator, params),
+                None if not args.samples else pool.submit(bench_job, tbpath, args.simulator, params, args.samples),
+                None if args.no_synth else pool.submit(synth_job, tbpath, params)))
+
+        results = []
+        for params, (sim, bench, synth) in zip(points, futures):
+            results.append(dict(params=params,
+                                sim=sim and sim.result(),
+                                throughput=bench and bench.result(),
+                                synth=synth and synth.result()))
+
+    for r in results:
+        r["fits"] = fits(r, args.freq)
+    pareto(results, names)
+
+    print(" ".join(f"{n:>8}" for n in names)
+          + f" {'sim':>5} {'samples/s':>10} {'lc':>6} {'bram':>5} {'dsp':>4} {'fmax':>7}")
+    for r in results:
+        print(format_row(r, names))
+
+    ok = [r for r in results if r["fits"]]
+    if ok:
+        best = max(ok, key=lambda r: [r["params"][n] for n in names])
+        print("\nLargest configuration that fits: " + ", ".join(f"{n}={best['params'][n]}" for n in names))
+    else:
+        print("\nNo configuration fits.")
+
+    if args.output is not None:
+        with open(args.output, "w") as fd:
+            json.dump(results, fd, indent=2)
+
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
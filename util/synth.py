@@ -0,0 +1,231 @@
+# Synthesize an effect for the iCE40 UP5K with yosys, place and route
+# it with nextpnr, and report the cells it uses and its fmax, e.g. to
+# compare two parameterizations of the same effect:
+#
+#   python3 util/synth.py rtl/creators/overdrive -p use_bram=0 -p use_bram=1
+#
+# The effects have more I/O than the sg48 package has pins, so for
+# place and route each one is wrapped in fmax_wrap: a shift register
+# fed from one pin drives every input, and the outputs are registered
+# and then XOR-reduced into one pin by a tree of registers, four bits
+# (one LUT) per stage. The cell counts are for the bare effect; the
+# fmax is for the wrapped one, where the paths the wrapper adds are at
+# most one LUT deep, so the effect's own paths set it.
+#
+# Outputs go to <effect>/synth/<parameters>/.
+
+import os
+import re
+import sys
+import json
+import argparse
+import subprocess
+import collections
+
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+sys.path.append(os.path.join(_REPO_ROOT, "util"))
+
+from utilities import get_sources, get_top, get_param_string
+
+YOSYS = os.environ.get("YOSYS", "yosys")
+NEXTPNR = os.environ.get("NEXTPNR", "nextpnr-ice40")
+ICETIME = os.environ.get("ICETIME", "icetime")
+
+# Resources of the iCE40 UP5K, by nextpnr cell type
+UP5K = {"lc": 5280, "bram": 30, "spram": 4, "dsp": 8}
+
+# Cell types of interest in the mapped netlist
+CELLS = {"lut": ["SB_LUT4"],
+         "carry": ["SB_CARRY"],
+         "ff": ["SB_DFF", "SB_DFFE", "SB_DFFSR", "SB_DFFSS", "SB_DFFESR", "SB_DFFESS",
+                "SB_DFFR", "SB_DFFS", "SB_DFFER", "SB_DFFES"],
+         "bram": ["SB_RAM40_4K"],
+         "spram": ["SB_SPRAM256KA"],
+         "dsp": ["SB_MAC16"]}
+
+def sv_value(v):
+    """ Get the SystemVerilog literal for a parameter value. """
+    if isinstance(v, str):
+        return f'"{v}"'
+    return str(int(v))
+
+def yosys(script, cwd, log):
+    """ Run a yosys script, raising CalledProcessError on failure. """
+    subprocess.run([YOSYS, "-q", "-l", log, "-p", script], cwd=cwd, check=True,
+                   stdout=subprocess.DEVNULL)
+
+def count_cells(netlist, top):
+    """ Count the cells of a yosys json netlist by the groups in CELLS. """
+    types = collections.Counter(c["type"] for c in netlist["modules"][top]["cells"].values())
+    return {k: sum(types[t] for t in v) for k, v in CELLS.items()}
+
+def render_wrapper(top, ports, params):
+    """ Get the source of fmax_wrap for the ports of a yosys json
+    netlist module.
+
+    Arguments:
+    top -- Name of the effect module
+    ports -- The "ports" of the module in the netlist
+    params -- Dictionary of parameters to instantiate it with
+    """
+    clk = next(p for p in ports if p.startswith("clk") and ports[p]["direction"] == "input")
+    ins = [(p, len(v["bits"])) for p, v in ports.items() if v["direction"] == "input" and p != clk]
+    outs = [(p, len(v["bits"])) for p, v in ports.items() if v["direction"] == "output"]
+    nin = sum(w for _, w in ins)
+    nout = sum(w for _, w in outs)
+
+    conns = [f"    .{clk}(clk)"]
+    lo = 0
+    for p, w in ins:
+        conns.append(f"    .{p}(chain[{lo + w - 1}:{lo}])")
+        lo += w
+    lo = 0
+    for p, w in outs:
+        conns.append(f"    .{p}(out[{lo + w - 1}:{lo}])")
+        lo += w
+    overrides = ", ".join(f".{k}({sv_value(v)})" for k, v in params.items())
+
+    # Widths of the reduction stages: the registered outputs, then a
+    # quarter as many bits per stage, down to one.
+    widths = [nout]
+    while widths[-1] > 1:
+        widths.append(-(-widths[-1] // 4))
+    decls = [f"  logic [{w - 1}:0] red{k};" for k, w in enumerate(widths)]
+    reduce = ["    red0 <= out;"]
+    for k in range(1, len(widths)):
+        for i in range(widths[k]):
+            hi = min(4 * i + 3, widths[k - 1] - 1)
+            reduce.append(f"    red{k}[{i}] <= ^red{k - 1}[{hi}:{4 * i}];")
+
+    return "\n".join([
+        "module fmax_wrap (",
+        "  input logic clk,",
+        "  input logic si,",
+        "  output logic so",
+        ");",
+        "",
+        f"  logic [{nin - 1}:0] chain;",
+        f"  logic [{nout - 1}:0] out;",
+        *decls,
+        "",
+        "  always_ff @(posedge clk) begin",
+        f"    chain <= {{chain[{max(nin - 2, 0)}:0], si}};" if nin > 1 else "    chain <= si;",
+        *reduce,
+        "  end",
+        "",
+        f"  assign so = red{len(widths) - 1}[0];",
+        "",
+        f"  {top} #({overrides}) dut (" if overrides else f"  {top} dut (",
+        ",\n".join(conns),
+        "  );",
+        "",
+        "endmodule",
+        ""])
+
+def parse_yosys_log(log):
+    """ Get the cell counts (by the groups in CELLS) from the stat
+    output in a yosys log, e.g. the mapped.yslog of `make synth-mapped`.
+    Yosys prints either "<type> <count>" or "<count> <type>" depending
+    on its version. The last stat in the log is used. """
+    with open(log) as fd:
+        text = fd.read()
+    text = text[text.rfind("Number of cells"):]
+    types = collections.Counter()
+    for a, b in re.findall(r"^\s+(\S+)\s+(\S+)\s*$", text, re.M):
+        if a.startswith("SB_") and b.isdigit():
+            types[a] = int(b)
+        elif b.startswith("SB_") and a.isdigit():
+            types[b] = int(a)
+    return {k: sum(types[t] for t in v) for k, v in CELLS.items()}
+
+def parse_icetime_report(rpt):
+    """ Get the fmax (in MHz) from an icetime report, or None. """
+    with open(rpt) as fd:
+        m = re.search(r"Total path delay:\s+[\d.]+ ns \(([\d.]+) MHz\)", fd.read())
+    return float(m.group(1)) if m else None
+
+def parse_nextpnr_log(log):
+    """ Get the placed cell counts and the fmax (in MHz) from a nextpnr
+    log. nextpnr reports fmax after every timing pass; the last one is
+    the routed design. """
+    with open(log) as fd:
+        text = fd.read()
+    placed = {k.lower(): int(v) for k, v in re.findall(r"(ICESTORM_\w+):\s+(\d+)/", text)}
+    fmax = re.findall(r"Max frequency for clock\s+'[^']*':\s+([\d.]+) MHz", text)
+    return placed, float(fmax[-1]) if fmax else None
+
+def synthesize(tbpath, params, root=_REPO_ROOT):
+    """ Synthesize, place and route one parameterization of an effect.
+    Returns a dictionary of cell counts, and the fmax in MHz.
+
+    Arguments:
+    tbpath -- Absolute path to the effect directory
+    params -- Dictionary of top level parameters
+    root -- Absolute path to the root of the repository
+    """
+    top = get_top(tbpath)
+    sources = get_sources(root, tbpath)
+    outdir = os.path.join(tbpath, "synth", get_param_string(params) or "default")
+    os.makedirs(outdir, exist_ok=True)
+
+    # Run from the effect directory, so $readmemh finds its tables.
+    read = f"read_verilog -sv {' '.join(sources)}; "
+    chparam = "".join(f"chparam -set {k} {sv_value(v)} {top}; " for k, v in params.items())
+    mapped = os.path.join(outdir, "mapped.json")
+    yosys(read + chparam + f"synth_ice40 -dsp -top {top} -json {mapped}", tbpath, os.path.join(outdir, "mapped.yslog"))
+    with open(mapped) as fd:
+        netlist = json.load(fd)
+    result = count_cells(netlist, top)
+
+    wrapper = os.path.join(outdir, "fmax_wrap.sv")
+    with open(wrapper, "w") as fd:
+        fd.write(render_wrapper(top, netlist["modules"][top]["ports"], params))
+    wrapped = os.path.join(outdir, "fmax_wrap.json")
+    yosys(f"read_verilog -sv {' '.join(sources)} {wrapper}; synth_ice40 -dsp -top fmax_wrap -json {wrapped}",
+          tbpath, os.path.join(outdir, "fmax_wrap.yslog"))
+
+    log = os.path.join(outdir, "nextpnr.log")
+    asc = os.path.join(outdir, "fmax_wrap.asc")
+    subprocess.run([NEXTPNR, "-q", "--up5k", "--package", "sg48", "--freq", "12",
+                    "--pcf-allow-unconstrained", "--json", wrapped, "--asc", asc, "-l", log],
+                   cwd=outdir, check=True, stdout=subprocess.DEVNULL)
+    placed, result["fmax"] = parse_nextpnr_log(log)
+    result["lc"] = placed.get("icestorm_lc")
+
+    # icetime's estimate is more pessimistic than nextpnr's, and is the
+    # one `make ice40.rpt` reports.
+    rpt = os.path.join(outdir, "icetime.rpt")
+    subprocess.run([ICETIME, "-d", "up5k", "-c", "12", "-mtr", rpt, asc],
+                   cwd=outdir, check=True, stdout=subprocess.DEVNULL)
+    result["icetime_fmax"] = parse_icetime_report(rpt)
+
+    with open(os.path.join(outdir, "metrics.json"), "w") as fd:
+        json.dump(result, fd, indent=2)
+    return result
+
+def parse_param(s):
+    """ Parse a "name=value,name=value" command line parameter set. """
+    params = {}
+    for kv in filter(None, s.split(",")):
+        k, v = kv.split("=", 1)
+        params[k] = int(v, 0) if re.fullmatch(r"-?(0x[0-9a-fA-F]+|\d+)", v) else v
+    return params
+
+def main():
+    parser = argparse.ArgumentParser(description="Report iCE40 UP5K resources and fmax of an effect.")
+    parser.add_argument("effect")
+    parser.add_argument("-p", "--params", action="append", type=parse_param, default=None,
+                        help="Parameters to synthesize with, e.g. use_bram=1 (repeat to compare several)")
+    args = parser.parse_args()
+
+    tbpath = os.path.realpath(args.effect)
+    columns = ["lc", "lut", "carry", "ff", "bram", "spram", "dsp", "fmax"]
+    print(f"{'parameters':28} " + " ".join(f"{c:>7}" for c in columns))
+    for params in args.params or [{}]:
+        r = synthesize(tbpath, params)
+        cells = " ".join(f"{'-' if r[c] is None else r[c]:>7}" for c in columns[:-1])
+        fmax = "-" if r["fmax"] is None else f"{r['fmax']:.1f}"
+        print(f"{get_param_string(params) or 'default':28} {cells} {fmax:>7}", flush=True)
+
+if __name__ == "__main__":
+    main()
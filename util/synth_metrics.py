@@ -0,0 +1,200 @@
+# Collect the synthesis metrics of every effect (cells, BRAM, SPRAM,
+# DSP, fmax) into one JSON file, and flag regressions against a stored
+# baseline, e.g. in CI or before committing:
+#
+#   python3 util/synth_metrics.py -j 8                    # compare to the baseline
+#   python3 util/synth_metrics.py --update-baseline       # accept the current numbers
+#   python3 util/synth_metrics.py --from-make rtl/creators/overdrive
+#
+# By default each effect is synthesized, placed and routed with
+# util/synth.py. With --from-make the logs that `make synth-mapped`,
+# `make ice40.asc` and `make ice40.rpt` already left in the effect
+# directory (mapped.yslog, ice40.nplog, ice40.rpt) are read instead.
+#
+# A regression is a resource count that grew by more than the
+# tolerance, or an fmax that dropped by more than it. Effects that don't
+# fit the UP5K on their own, and a set of effects that doesn't fit
+# together, are flagged too. The exit status is 1 if anything was.
+
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+sys.path.append(os.path.join(_REPO_ROOT, "util"))
+
+from run_all import find_effects
+from synth import UP5K, synthesize, parse_yosys_log, parse_nextpnr_log, parse_icetime_report
+
+BASELINE = os.path.join(_REPO_ROOT, "util", "synth_baseline.json")
+
+# Metrics where larger is worse, and where smaller is worse
+RESOURCES = ["lc", "lut", "carry", "ff", "bram", "spram", "dsp"]
+SPEEDS = ["fmax", "icetime_fmax"]
+
+def get_commit(root=_REPO_ROOT):
+    """ Get the current commit hash, with "-dirty" appended if the
+    working tree has changes (or None outside a git checkout). """
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=root, check=True,
+                                capture_output=True, text=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=root,
+                               check=True, capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return commit + ("-dirty" if dirty else "")
+
+def harvest(tbpath):
+    """ Get the metrics from the make flow's logs in an effect directory.
+    Metrics whose log is missing are left out. """
+    metrics = {}
+    yslog = os.path.join(tbpath, "mapped.yslog")
+    if os.path.exists(yslog):
+        metrics.update(parse_yosys_log(yslog))
+    nplog = os.path.join(tbpath, "ice40.nplog")
+    if os.path.exists(nplog):
+        placed, metrics["fmax"] = parse_nextpnr_log(nplog)
+        metrics["lc"] = placed.get("icestorm_lc")
+    rpt = os.path.join(tbpath, "ice40.rpt")
+    if os.path.exists(rpt):
+        metrics["icetime_fmax"] = parse_icetime_report(rpt)
+    return metrics
+
+def collect(tbpath, from_make=False):
+    """ Get the metrics of one effect, in a worker process. Returns a
+    dictionary with status ("PASS" or "FAIL"), the metrics, and the
+    error if synthesis failed.
+
+    Arguments:
+    tbpath -- Absolute path to the effect directory
+    from_make -- Read the make flow's logs instead of synthesizing
+    """
+    start = time.perf_counter()
+    try:
+        metrics = harvest(tbpath) if from_make else synthesize(tbpath, {})
+        status, error = "PASS", ""
+    except BaseException as e:
+        metrics, status, error = {}, "FAIL", f"{type(e).__name__}: {e}"
+    return dict(status=status, metrics=metrics, error=error, time=time.perf_counter() - start)
+
+def compare(current, baseline, tolerance):
+    """ Get a list of regression messages, comparing the effects of
+    current to those of baseline.
+
+    Arguments:
+    current -- Dictionary of effect name to collect() result
+    baseline -- The same, from a previous run
+    tolerance -- Dictionary of metric name to the allowed relative change
+    """
+    flags = []
+    for name, r in current.items():
+        if r["status"] != "PASS":
+            if baseline.get(name, {}).get("status") == "PASS":
+                flags.append(f"{name}: synthesis failed ({r['error']})")
+            continue
+        old = baseline.get(name, {}).get("metrics", {})
+        for k, v in r["metrics"].items():
+            was = old.get(k)
+            if v is None or was is None:
+                continue
+            limit = tolerance.get(k, 0.0) * abs(was)
+            if k in RESOURCES and v > was + limit:
+                flags.append(f"{name}: {k} grew from {was} to {v}")
+            elif k in SPEEDS and v < was - limit:
+                flags.append(f"{name}: {k} dropped from {was:.1f} to {v:.1f} MHz")
+    return flags
+
+def is_standalone(name):
+    """ Whether an effect directory is an effect on its own, rather than
+    a component of effects (rtl/components), an axis/ wrapper around
+    one, or rtl/core, which has all of them again.
+
+    Arguments:
+    name -- Effect directory, relative to the repository root
+    """
+    parts = os.path.normpath(name).split(os.sep)
+    return len(parts) == 3 and parts[0] == "rtl" and parts[1] != "components"
+
+def check_budget(current):
+    """ Get a list of messages for effects, and the sum of the standalone
+    effects (see is_standalone()), that don't fit the UP5K. """
+    flags = []
+    total = dict.fromkeys(UP5K, 0)
+    for name, r in current.items():
+        for k, cap in UP5K.items():
+            v = r["metrics"].get(k) or 0
+            if is_standalone(name):
+                total[k] += v
+            if v > cap:
+                flags.append(f"{name}: uses {v} of {cap} {k}")
+    for k, cap in UP5K.items():
+        if total[k] > cap:
+            flags.append(f"all effects together: use {total[k]} of {cap} {k}")
+    return flags
+
+def format_row(name, r):
+    """ Get one table row of a collect() result. """
+    if r["status"] != "PASS":
+        return f"{name:28} FAIL {r['error']}"
+    m = r["metrics"]
+    cells = " ".join(f"{'-' if m.get(c) is None else m[c]:>6}" for c in RESOURCES)
+    speeds = " ".join(f"{'-' if m.get(c) is None else format(m[c], '.1f'):>7}" for c in SPEEDS)
+    return f"{name:28} {cells} {speeds}"
+
+def main():
+    parser = argparse.ArgumentParser(description="Collect synthesis metrics of every effect and flag regressions.")
+    parser.add_argument("paths", nargs="*", default=[os.path.join(_REPO_ROOT, "rtl")],
+                        help="Directories to search for filelist.json (default: rtl/)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count())
+    parser.add_argument("-o", "--output", default=os.path.join(_REPO_ROOT, "synth_metrics.json"),
+                        help="Where to write the metrics (default: synth_metrics.json)")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--update-baseline", action="store_true", help="Write the metrics to the baseline")
+    parser.add_argument("--from-make", action="store_true", help="Read the make flow's logs instead of synthesizing")
+    parser.add_argument("--lc-tolerance", type=float, default=0.02,
+                        help="Allowed relative growth of lc, lut, carry and ff (default: 0.02)")
+    parser.add_argument("--fmax-tolerance", type=float, default=0.05,
+                        help="Allowed relative fmax drop (default: 0.05, place and route is noisy)")
+    args = parser.parse_args()
+
+    effects = find_effects(args.paths)
+    names = [os.path.relpath(p, _REPO_ROOT) for p in effects]
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        results = dict(zip(names, pool.map(collect, effects, [args.from_make] * len(effects))))
+
+    print(f"{'effect':28} " + " ".join(f"{c:>6}" for c in RESOURCES) + f" {'fmax':>7} {'icetime':>7}")
+    for name, r in results.items():
+        print(format_row(name, r))
+
+    record = dict(commit=get_commit(), time=time.strftime("%Y-%m-%dT%H:%M:%S"), effects=results)
+    with open(args.output, "w") as fd:
+        json.dump(record, fd, indent=2)
+
+    regressions = []
+    if os.path.exists(args.baseline) and not args.update_baseline:
+        with open(args.baseline) as fd:
+            baseline = json.load(fd)
+        tolerance = dict.fromkeys(["lc", "lut", "carry", "ff"], args.lc_tolerance)
+        tolerance.update(dict.fromkeys(SPEEDS, args.fmax_tolerance))
+        regressions = compare(results, baseline["effects"], tolerance)
+        print(f"\nCompared to the baseline from commit {baseline.get('commit')}: "
+              f"{len(regressions)} regressions")
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as fd:
+            json.dump(record, fd, indent=2)
+        print(f"\nWrote the baseline for commit {record['commit']}")
+
+    over = check_budget(results)
+    for f in regressions:
+        print("REGRESSION", f)
+    for f in over:
+        print("OVER BUDGET", f)
+    sys.exit(1 if regressions or over else 0)
+
+if __name__ == "__main__":
+    main()
@@ -8,26 +8,116 @@
 #     ]
 # }
 
-# Each file in the filelist is relative to the repository root.
+# Each file in the filelist is relative to the repository root. A
+# filelist can also include others, see filelist.py.
 
 import os
-import git
-
+import re
 import sys
 import json
-import cocotb
+import time
+import fcntl
+import contextlib
+import shutil
+import hashlib
+import functools
+import subprocess
+from xml.etree import ElementTree
+
+from filelist import resolve
+import profiling
+
+# cocotb and cocotb-test are imported by the functions that use them:
+# this module is imported by every test module, in pytest and in every
+# simulator process, and most of those only need a few helpers.
+
+@functools.lru_cache(maxsize=None)
+def get_repo_root():
+    """ Get the absolute path to the root of the repository: the
+    REPO_ROOT environment variable if it is set, or else the parent of
+    the directory this file is in. """
+    root = os.environ.get("REPO_ROOT") or os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+    assert (os.path.exists(root)), "REPO_ROOT path must exist"
+    return root
+
+# When to dump waves:
+#   off        -- never
+#   always     -- on every run
+#   on-failure -- run untraced, then re-run only the failing tests
+#                 with tracing on, using the same random seed.
+TRACE_POLICIES = ["off", "always", "on-failure"]
+
+# What to dump when tracing. Each key can also be set with the
+# environment variable in parentheses.
+#   scopes   -- List of hierarchical scopes to dump, starting with the
+#               top module, e.g. ["chorus.delaymod"]. None dumps the
+#               whole design. (TRACE_SCOPES, comma separated)
+#   memories -- Dump the contents of memory arrays, e.g. mem in
+#               ram_1r1w_sync. (TRACE_MEMORIES=1)
+#   start_ns -- Sim time to start dumping at. (TRACE_START)
+#   stop_ns  -- Sim time to stop dumping at. (TRACE_STOP)
+# The start/stop window is only supported by Icarus; cocotb's
+# Verilator main loop dumps every time step, so runner() refuses it
+# when tracing under Verilator.
+TRACE_DEFAULTS = dict(scopes=None, memories=False, start_ns=None, stop_ns=None)
+
+# How Verilator models are built:
+#   debug -- Verilator's defaults, and a serial make. Quickest to build,
+#            and what the tests use unless told otherwise.
+#   fast  -- Optimized for long runs (e.g. minutes of audio): -O3 for
+#            Verilator and the C++ compiler, X's assigned for speed,
+#            VERILATOR_THREADS model threads (default 1, since the
+#            effects are too small for more to pay off), a parallel
+#            make, and ccache if it is installed.
+# Icarus ignores the profile.
+BUILD_PROFILES = ["debug", "fast"]
+
+def get_profile_args(profile):
+    """ Get the (compile_args, make_args) of a Verilator build profile.
+
+    Arguments:
+    profile -- One of BUILD_PROFILES
+    """
+    assert profile in BUILD_PROFILES, f"profile must be one of {BUILD_PROFILES}, not {profile}"
+    if(profile == "debug"):
+        return [], []
 
-from cocotb_test.simulator import run
-from cocotb.clock import Clock
-from cocotb.regression import TestFactory
-from cocotb.utils import get_sim_time
-from cocotb.triggers import Timer, ClockCycles, RisingEdge, FallingEdge, with_timeout
-from cocotb.types import LogicArray
-from cocotb.utils import get_sim_time
+    threads = int(os.environ.get("VERILATOR_THREADS", 1))
+    compile_args = ["-O3", "--x-assign", "fast", "--x-initial", "fast", "--threads", str(threads)]
+    make_args = ["-j", str(os.cpu_count() or 1), "OPT_FAST=-O3"]
+    if(shutil.which("ccache")):
+        make_args += ["OBJCACHE=ccache"]
+    return compile_args, make_args
 
-def runner(simulator, timescale, tbpath, params, defs=[], testname=None, pymodule=None, jsonpath=None, jsonname="filelist.json", root=None):
+def runner(simulator, timescale, tbpath, params, defs=[], testname=None, pymodule=None, jsonpath=None, jsonname="filelist.json", root=None, compile_only=False, trace=None, seed=None, trace_config=None, profile=None):
     """Run the simulator on test n, with parameters params, and defines
-    defs. If n is none, it will run all tests"""
+    defs. If n is none, it will run all tests. Returns the path of the
+    cocotb results XML file, or None if compile_only is set.
+
+    trace is one of TRACE_POLICIES, and defaults to the TRACE
+    environment variable, or on-failure if that is unset. trace_config
+    is a dictionary with the keys of TRACE_DEFAULTS; its start_ns/stop_ns
+    window only works under Icarus, and asking for it when tracing under
+    Verilator is an error, since cocotb's Verilator main loop dumps every
+    time step. profile is one of
+    BUILD_PROFILES, and defaults to the BUILD_PROFILE environment
+    variable, or debug if that is unset."""
+
+    from cocotb_test.simulator import run
+
+    if(profile is None):
+        profile = os.environ.get("BUILD_PROFILE", "debug")
+
+    if(trace is None):
+        trace = os.environ.get("TRACE", "on-failure")
+    assert trace in TRACE_POLICIES, f"trace must be one of {TRACE_POLICIES}, not {trace}"
+    trace_config = get_trace_config(trace_config)
+    # Checked before any run, rather than when on-failure re-runs with
+    # tracing on.
+    if(trace != "off" and simulator.startswith("verilator")):
+        assert not (trace_config["start_ns"] or trace_config["stop_ns"] is not None), \
+            "The trace start_ns/stop_ns window (TRACE_START/TRACE_STOP) is only supported by Icarus; " \
+            "cocotb's Verilator main loop dumps every time step"
 
     # if json path is none, assume that it is the same as tbpath
     if(jsonpath is None):
@@ -47,49 +137,406 @@ def runner(simulator, timescale, tbpath, params, defs=[], testname=None, pymodul
     
     # Assume all paths in the json file are relative to the repository root.
     if(root is None):
-        root = git.Repo(search_parent_directories=True).working_tree_dir
+        root = get_repo_root()
 
     assert (os.path.exists(root)), "root directory path must exist"
 
-    sources = get_sources(root, tbpath)
+    sources = get_sources(root, jsonpath, jsonname)
     for s in sources:
         assert os.path.isfile(s), f"Error! File {s} does not exist.\
         \n If this error is unexpected, and occurs on Gradescope:\
         \n\t 1. Ensure the file is in Git.\
         \n\t 2. If it is an 'imported' module, put the file in the imports directory."
 
-    work_dir = os.path.join(tbpath, "run", testdir, get_param_string(params), simulator)
-    build_dir = os.path.join(tbpath, "build", get_param_string(params))
-
-    # Icarus doesn't build, it just runs.
-    if simulator.startswith("icarus"):
-        build_dir = work_dir
+    work_dir = get_work_dir(tbpath, testdir, params, simulator)
+    if(not os.path.exists(work_dir)):
+        os.makedirs(work_dir)
 
+    waves = (trace == "always")
     if simulator.startswith("verilator"):
-        compile_args=["-Wno-fatal", "-DVM_TRACE_FST=1", "-DVM_TRACE=1"]
-        plus_args = ["--trace", "--trace-fst"]
-        if(not os.path.exists(work_dir)):
-            os.makedirs(work_dir)
+        profile_args, make_args = get_profile_args(profile)
+        compile_args=["-Wno-fatal"] + profile_args
+        plus_args = []
+        if(waves):
+            compile_args += ["-DVM_TRACE_FST=1", "-DVM_TRACE=1"]
+            plus_args += ["--trace", "--trace-fst"]
     else:
         compile_args=[]
         plus_args = []
+        make_args = []
+
+    # Memory init files ($readmemh) are found relative to the
+    # testbench, not the simulator's working directory.
+    defines = [f'BINPATH="{tbpath}/"'] + list(defs)
+    if(waves):
+        defines += ["VM_TRACE_FST=1", "VM_TRACE=1"]
+        # Verilator gets --trace-max-array instead.
+        if(trace_config["memories"] and not simulator.startswith("verilator")):
+            defines += ["DUMP_MEMORIES"]
+
+    # Every test that resolves to the same sources, defines and flags
+    # shares one compiled model. The key is computed from the file
+    # contents, so editing a source can never reuse a stale model.
+    # Of the make arguments, only the compiler flags change the model.
+    key_args = compile_args + [a for a in make_args if a.startswith("OPT_")] + (["waves", json.dumps(trace_config, sort_keys=True)] if waves else [])
+    key = get_build_key(simulator, timescale, top, sources, params, defines, key_args)
+    build_dir = get_build_dir(tbpath, simulator, key)
+
+    # Build under an exclusive lock, so that concurrent pytest workers
+    # asking for the same key don't write into the same directory at
+    # once, then simulate under a shared one, so that no other worker
+    # evicts or rebuilds the model while it runs (cocotb-test's
+    # Verilator run calls make again). If the model is evicted between
+    # the two, it is built again.
+    held = contextlib.ExitStack()
+    start = time.perf_counter()
+    while True:
+        with profiling.span("build", simulator=simulator, build=os.path.basename(build_dir)):
+            built = time.time()
+            with build_lock(build_dir):
+                os.makedirs(build_dir, exist_ok=True)
+                # The trace configuration lives in the build directory,
+                # and is evicted with it.
+                build_sources, build_args, build_plus = list(sources), list(compile_args), list(plus_args)
+                if(waves and simulator.startswith("verilator")):
+                    build_args += get_verilator_trace_args(build_dir, trace_config)
+                elif(waves):
+                    # Dump with our own module instead of cocotb-test's, so that
+                    # the scopes and the window can be chosen. It goes last,
+                    # so that its `timescale can't apply to the design.
+                    build_sources = build_sources + [write_icarus_dump(build_dir, top, trace_config)]
+                    build_args += ["-s", "fx_dump"]
+                    build_plus += ["-fst"]
+
+                # cocotb-test extends the lists it is handed, so every call gets
+                # its own copy.
+                kwargs = dict(verilog_sources=build_sources,
+                              simulator=simulator,
+                              toplevel=top,
+                              module=pymodule,
+                              sim_build=build_dir,
+                              timescale=timescale,
+                              parameters=params,
+                              work_dir=work_dir,
+                              waves=waves and simulator.startswith("verilator"))
+                run(compile_args=list(build_args), defines=list(defines), make_args=list(make_args), compile_only=True, **kwargs)
+                touch_build(build_dir)
+            add_build_spans(build_dir, top, simulator, built)
+        if(compile_only):
+            break
+        held.enter_context(build_lock(build_dir, shared=True))
+        if(os.path.exists(os.path.join(build_dir, ".stamp"))):
+            break
+        held.close()
+    compile_s = time.perf_counter() - start
+
+    with held:
+        evict_builds(os.path.dirname(build_dir), keep=build_dir)
+
+        if(compile_only):
+            return None
+
+        # Keep the results next to the waves instead of in the shared
+        # build directory. A stale file would hide an abnormal exit.
+        results_xml = os.path.join(work_dir, "results.xml")
+        if(os.path.exists(results_xml)):
+            os.remove(results_xml)
+
+        error = None
+        start = time.perf_counter()
+        env = dict(COCOTB_RESULTS_FILE=results_xml, REPO_ROOT=root,
+                   CHECKPOINT_DIR=os.path.join(build_dir, "checkpoints"))
+        if(profiling.enabled()):
+            # The simulator runs in work_dir.
+            env.update(PROFILE_DIR=os.path.abspath(os.environ["PROFILE_DIR"]))
+            env[profiling.LAUNCH] = str(time.time())
+            os.makedirs(env["PROFILE_DIR"], exist_ok=True)
+        try:
+            # REPO_ROOT spares the test module its own search in the
+            # simulator. Checkpoints (see warm_start()) belong to the build.
+            with environ(**env), profiling.span("simulate", simulator=simulator, test=testname or "all"):
+                run(compile_args=list(build_args),
+                    plus_args=list(build_plus),
+                    defines=list(defines),
+                    make_args=list(make_args),
+                    testcase=testname,
+                    seed=seed,
+                    **kwargs)
+        except SystemExit as e:
+            error = e
+    record_durations(os.path.relpath(tbpath, root), simulator, params, profile, testname,
+                     compile_s, time.perf_counter() - start, results_xml)
+    add_test_spans(results_xml, time.time())
+    profiling.flush("harness")
+
+    if(error is not None):
+        if(trace != "on-failure"):
+            raise error
+        rerun = dict(pymodule=pymodule, jsonpath=jsonpath, jsonname=jsonname, root=root, trace="always", trace_config=trace_config, profile=profile)
+        raise SystemExit(f"{error}\n" + trace_failures(simulator, timescale, tbpath, params, defs, testname, results_xml, rerun))
+
+    return results_xml
+
+def add_build_spans(build_dir, top, simulator, start):
+    """ Record the verilate and C++ compile phases of a Verilator build
+    that started at start (time.time()) as spans, if the model was
+    rebuilt. They are told apart by when the makefile Verilator writes
+    and the model executable were last modified. """
+    if(not profiling.enabled() or not simulator.startswith("verilator")):
+        return
+    try:
+        verilated = os.path.getmtime(os.path.join(build_dir, "Vtop.mk"))
+        compiled = os.path.getmtime(os.path.join(build_dir, top))
+    except OSError:
+        return
+    if(verilated >= start):
+        profiling.add_span("verilate", start, verilated, "build")
+    if(compiled >= max(start, verilated)):
+        profiling.add_span("c++ compile", max(start, verilated), compiled, "build")
+
+def add_test_spans(results_xml, end):
+    """ Record the tests of a simulator launch that ended at end
+    (time.time()) as spans, back to back before it, from their times in
+    the results file. """
+    if(not profiling.enabled() or not os.path.exists(results_xml)):
+        return
+    results = get_results(results_xml)
+    t = end - sum(r["time"] for r in results.values())
+    for n, r in results.items():
+        profiling.add_span(n, t, t + r["time"], "tests", sim_ns=r["sim_time_ns"], passed=r["passed"])
+        t += r["time"]
+
+def record_durations(effect, simulator, params, profile, testname, compile_s, run_s, results_xml):
+    """ Add a simulator launch to the test duration history (see
+    durations.py). The history is only informative, so failing to
+    write it is a warning. """
+    import sqlite3
+    from durations import record_launch
+
+    results = get_results(results_xml) if os.path.exists(results_xml) else None
+    try:
+        record_launch(effect, simulator, get_param_string(params), profile, testname, compile_s, run_s, results)
+    except sqlite3.Error as e:
+        import logging
+        logging.getLogger("cocotb").warning(f"Could not record test durations: {e}")
+
+def get_trace_config(config=None):
+    """ Get a complete tracing configuration: the keys of config, then
+    the environment, then TRACE_DEFAULTS.
+
+    Arguments:
+    config -- Dictionary with some of the keys of TRACE_DEFAULTS
+    """
+    env = {}
+    if(os.environ.get("TRACE_SCOPES")):
+        env["scopes"] = os.environ["TRACE_SCOPES"].split(",")
+    if(os.environ.get("TRACE_MEMORIES")):
+        env["memories"] = os.environ["TRACE_MEMORIES"] != "0"
+    if(os.environ.get("TRACE_START")):
+        env["start_ns"] = float(os.environ["TRACE_START"])
+    if(os.environ.get("TRACE_STOP")):
+        env["stop_ns"] = float(os.environ["TRACE_STOP"])
+
+    result = dict(TRACE_DEFAULTS, **env, **(config or {}))
+    unknown = set(result) - set(TRACE_DEFAULTS)
+    assert not unknown, f"Unknown trace_config keys {unknown}, expected {list(TRACE_DEFAULTS)}"
+    return result
+
+def write_icarus_dump(build_dir, top, config):
+    """ Write the module that dumps waves under Icarus, and return its
+    path.
+
+    Arguments:
+    build_dir -- Directory to write fx_dump.v to
+    top -- Name of the top level module
+    config -- Tracing configuration from get_trace_config()
+    """
+    lines = ["`timescale 1ns/1ps",
+             "module fx_dump();",
+             "initial begin",
+             f'    $dumpfile("{top}.fst");']
+    for scope in (config["scopes"] or [top]):
+        lines += [f"    $dumpvars(0, {scope});"]
+    if(config["start_ns"]):
+        lines += ["    $dumpoff;",
+                  f"    #({config['start_ns']});",
+                  "    $dumpon;"]
+    if(config["stop_ns"] is not None):
+        lines += [f"    #({config['stop_ns'] - (config['start_ns'] or 0)});",
+                  "    $dumpoff;"]
+    # `resetall keeps the `timescale from carrying over into any file
+    # compiled after this one.
+    lines += ["end", "endmodule", "`resetall", ""]
+
+    # The content only depends on the build key, and rewriting it
+    # would make Icarus recompile.
+    path = os.path.join(build_dir, "fx_dump.v")
+    if(not os.path.exists(path)):
+        with open(path, "w") as fd:
+            fd.write("\n".join(lines))
+    return path
 
-    run(verilog_sources=sources,
-        simulator=simulator,
-        toplevel=top,
-        module=pymodule,
-        compile_args=compile_args,
-        plus_args=plus_args,
-        sim_build=build_dir,
-        timescale=timescale,
-        parameters=params,
-        defines=defs + ["VM_TRACE_FST=1", "VM_TRACE=1"],
-        work_dir=work_dir,
-        waves=True,
-        testcase=testname)
+def get_verilator_trace_args(build_dir, config):
+    """ Get the extra Verilator arguments for a tracing configuration.
+
+    Arguments:
+    build_dir -- Directory to write the trace.vlt configuration to
+    config -- Tracing configuration from get_trace_config()
+    """
+    # Memories deeper than --trace-max-array are left out of the trace.
+    args = ["--trace-max-array", str(1 << 20 if config["memories"] else 1)]
+
+    if(config["scopes"]):
+        path = os.path.join(build_dir, "trace.vlt")
+        with open(path, "w") as fd:
+            fd.write("`verilator_config\n")
+            fd.write('tracing_off -scope "*"\n')
+            for scope in config["scopes"]:
+                fd.write(f'tracing_on -scope "*{scope}*"\n')
+        args += [path]
+
+    return args
+
+def trace_failures(simulator, timescale, tbpath, params, defs, testname, results_xml, rerun):
+    """Re-run the failing tests of an untraced run with waves on, using
+    the same seed. Returns a message saying where the waves are.
+
+    Arguments:
+    results_xml -- Results file of the untraced run
+    rerun -- Dictionary of extra keyword arguments for runner()
+    Remaining arguments are those of the untraced runner() call.
+    """
+    seed = None
+    failed = [testname]
+    # If the simulator died there are no per-test results, and the
+    # whole run is repeated.
+    if(os.path.exists(results_xml)):
+        seed = get_seed(results_xml)
+        failed = [n for n, r in get_results(results_xml).items() if not r['passed']]
+
+    dirs = []
+    for n in failed:
+        try:
+            runner(simulator, timescale, tbpath, params, defs=defs, testname=n, seed=seed, **rerun)
+        except SystemExit:
+            pass
+        dirs.append(get_work_dir(tbpath, n if n else "all", params, simulator))
+
+    return "Waves of the failing tests (seed " + str(seed) + ") are in:\n\t" + "\n\t".join(dirs)
+
+def get_seed(results_xml):
+    """ Get the random seed that cocotb used for a run, or None.
+
+    Arguments:
+    results_xml -- Path to the results XML file written by cocotb
+    """
+    for prop in ElementTree.parse(results_xml).iter("property"):
+        if(prop.get("name") == "random_seed"):
+            return int(prop.get("value"))
+    return None
+
+# Results of regression() runs, so that every test in a module can be
+# reported from a single simulator launch.
+_regressions = {}
+
+def regression(simulator, timescale, tbpath, params, defs=[], testname=None, **kwargs):
+    """Run all tests in one simulator launch (once per design,
+    parameters and simulator in this process) and report the result
+    of test testname, or of all tests if testname is None.
+
+    Set ISOLATE_TESTS=1 in the environment to give each test its own
+    simulator launch instead, like runner(..., testname=testname).
+    Remaining keyword arguments are passed to runner()."""
+
+    if(testname is not None and os.environ.get("ISOLATE_TESTS", "0") != "0"):
+        runner(simulator, timescale, tbpath, params, defs=defs, testname=testname, **kwargs)
+        return
+
+    key = (simulator, timescale, tbpath, get_param_string(params), tuple(defs))
+    if(key not in _regressions):
+        error = None
+        try:
+            runner(simulator, timescale, tbpath, params, defs=defs, **kwargs)
+        except SystemExit as e:
+            # cocotb-test exits on any failing test; the results file
+            # still has the per-test outcome.
+            error = str(e)
+
+        results_xml = os.path.join(get_work_dir(tbpath, "all", params, simulator), "results.xml")
+        if(os.path.exists(results_xml)):
+            results = get_results(results_xml)
+        else:
+            results = None
+        _regressions[key] = (results, error)
+
+    results, error = _regressions[key]
+    assert results is not None, f"Simulation terminated abnormally: {error}"
+
+    if(testname is None):
+        names = list(results)
+    else:
+        assert testname in results, f"Test {testname} did not run. Is it decorated with @cocotb.test()?"
+        names = [testname]
+
+    import logging
+    log = logging.getLogger("cocotb")
+
+    summary = []
+    failed = []
+    for n in names:
+        r = results[n]
+        summary.append(f"{n}: {'PASS' if r['passed'] else 'FAIL'} "
+                       f"(real {r['time']:.2f}s, sim {r['sim_time_ns']:.0f}ns)")
+        log.info(summary[-1])
+        if(not r['passed']):
+            failed.append(f"{n}: {r['message']}")
+
+    assert not failed, "\n".join(failed + [""] + summary)
+
+def get_results(results_xml):
+    """ Get a dictionary of per-test results from a cocotb results
+    file, in the order the tests ran. Each entry has the keys passed,
+    skipped, time (seconds), sim_time_ns, and message.
+
+    Arguments:
+    results_xml -- Path to the results XML file written by cocotb
+    """
+    results = {}
+    for tc in ElementTree.parse(results_xml).iter("testcase"):
+        failure = tc.find("failure")
+        if(failure is None):
+            failure = tc.find("error")
+        results[tc.get("name")] = dict(
+            passed=failure is None,
+            skipped=tc.find("skipped") is not None,
+            time=float(tc.get("time", 0)),
+            sim_time_ns=float(tc.get("sim_time_ns", 0)),
+            message=None if failure is None else failure.get("message", ""))
+    return results
+
+# Verilator's message lines, e.g.
+#   %Warning-WIDTHEXPAND: /path/to/file.sv:12:5: Operator ADD expects ...
+#   %Error: /path/to/file.sv:3:1: syntax error, ...
+LINT_MESSAGE = re.compile(r"^%(Warning|Error)(?:-(\w+))?: (?:(.+?):(\d+):(?:(\d+):)? )?(.*)$")
 
 # Function to build (run) the lint and style checks.
 def lint(simulator, timescale, tbpath, params, defs=[], compile_args=[], pymodule=None, jsonpath=None, jsonname="filelist.json", root=None):
+    """ Lint the sources of a filelist with Verilator, and assert that
+    there are no warnings or errors. Returns the result of
+    get_lint_result(). pymodule is unused, and kept for compatibility. """
+    result = get_lint_result(simulator, timescale, tbpath, params, defs, compile_args, jsonpath, jsonname, root)
+    assert result["returncode"] == 0 and not result["messages"], \
+        "Lint failed:\n" + "\n".join(format_lint_message(m) for m in result["messages"])
+    return result
+
+def get_lint_result(simulator, timescale, tbpath, params, defs=[], compile_args=[], jsonpath=None, jsonname="filelist.json", root=None):
+    """ Lint the sources of a filelist with Verilator. Returns a
+    dictionary with the returncode, the messages (see
+    parse_lint_messages()) and whether it came from the cache.
+
+    Results are cached in tbpath/lint/ on the contents of the sources
+    and on the flags, so linting unchanged code doesn't run Verilator.
+    """
 
     # if json path is none, assume that it is the same as tbpath
     if(jsonpath is None):
@@ -101,59 +548,90 @@ def lint(simulator, timescale, tbpath, params, defs=[], compile_args=[], pymodul
 
     # Assume all paths in the json file are relative to the repository root.
     if(root is None):
-        root = git.Repo(search_parent_directories=True).working_tree_dir
+        root = get_repo_root()
 
     assert (os.path.exists(root)), "root directory path must exist"
-    sources = get_sources(root, tbpath)
+    sources = get_sources(root, jsonpath, jsonname)
 
-    # if pymodule is none, assume that the python module name is test+<name of the top module>.
-    if(pymodule is None):
-        pymodule = "test_" + top
+    compile_args = [a for a in compile_args if a != "--lint-only"]
+    key = get_build_key(simulator, timescale, top, sources, params, list(defs), ["--lint-only"] + compile_args)
+    cache = os.path.join(tbpath, "lint", key + ".json")
 
-    # Create the expected makefile so cocotb-test won't complain.
-    sim_build = "lint"
-    if(not os.path.exists("lint")):
-       os.mkdir("lint")
+    if(os.path.exists(cache)):
+        with open(cache) as fd:
+            result = dict(json.load(fd), cached=True)
+    else:
+        cmd = (["verilator", "--lint-only", "--top-module", top, "-DCOCOTB_SIM=1", "--timescale", timescale]
+               + compile_args
+               + [f"-D{d}" for d in defs]
+               + [f"-G{k}={v}" if isinstance(v, int) else f'-G{k}="{v}"' for k, v in params.items()]
+               + sources)
+        p = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+        result = dict(returncode=p.returncode, messages=parse_lint_messages(p.stdout, root))
+        os.makedirs(os.path.dirname(cache), exist_ok=True)
+        # Write atomically, since other workers may read it.
+        tmp = f"{cache}.{os.getpid()}.tmp"
+        with open(tmp, "w") as fd:
+            json.dump(result, fd, indent=2)
+        os.replace(tmp, cache)
+        result["cached"] = False
 
-    with open("lint/Vtop.mk", 'w') as fd:
-        fd.write("all:")
+    return result
 
-    make_args = ["-n"]
-    compile_args += ["--lint-only"]
- 
-    run(verilog_sources=sources,
-        simulator=simulator,
-        toplevel=top,
-        module=pymodule,
-        compile_args=compile_args,
-        sim_build=sim_build,
-        timescale=timescale,
-        parameters=params,
-        defines=defs,
-        make_args=make_args,
-        compile_only=True)
+def parse_lint_messages(output, root=None):
+    """ Get a list of the warnings and errors in Verilator's output, as
+    dictionaries with severity, code, file (relative to root), line,
+    column and message. Continuation lines are appended to the
+    message.
 
+    Arguments:
+    output -- Verilator's stdout and stderr
+    root -- Absolute path to the root of the repository
+    """
+    messages = []
+    for line in output.splitlines():
+        m = LINT_MESSAGE.match(line)
+        if(m):
+            severity, code, path, lineno, column, text = m.groups()
+            if(path is not None and root is not None and os.path.isabs(path)):
+                path = os.path.relpath(path, root)
+            # "Exiting due to N warning(s)" only repeats the count.
+            if(path is None and text.startswith("Exiting due to")):
+                continue
+            messages.append(dict(severity=severity.lower(), code=code, file=path,
+                                 line=int(lineno) if lineno else None,
+                                 column=int(column) if column else None,
+                                 message=text))
+        elif(messages and line.startswith(" ")):
+            messages[-1]["message"] += "\n" + line
+    return messages
+
+def format_lint_message(m):
+    """ Format a message from parse_lint_messages() like a compiler. """
+    where = ":".join(str(x) for x in (m["file"], m["line"], m["column"]) if x is not None)
+    code = f"-{m['code']}" if m["code"] else ""
+    return f"{where}: {m['severity']}{code}: {m['message']}" if where else f"{m['severity']}{code}: {m['message']}"
 
-def get_files_from_filelist(p, n):
-    """ Get a list of files from a json filelist.
+def get_files_from_filelist(p, n, r=None):
+    """ Get a list of files from a json filelist, including the files of
+    the filelists it includes (see filelist.py).
 
     Arguments:
     p -- Path to the directory that contains the .json file
     n -- name of the .json file to read.
+    r -- Absolute path to the root of the repository.
     """
-    n = os.path.join(p, n)
-    with open(n) as filelist:
-        files = json.load(filelist)["files"]
-    return files
+    return resolve(p, n, r)["files"]
 
-def get_sources(r, p):
+def get_sources(r, p, n="filelist.json"):
     """ Get a list of source file paths from a json filelist.
 
     Arguments:
     r -- Absolute path to the root of the repository.
     p -- Absolute path to the directory containing filelist.json
+    n -- Name of the json filelist, defaults to filelist.json
     """
-    sources = get_files_from_filelist(p, "filelist.json")
+    sources = get_files_from_filelist(p, n, r)
     sources = [os.path.join(r, f) for f in sources]
     return sources
 
@@ -164,7 +642,7 @@ def get_top(p, n="filelist.json"):
     p -- Absolute path to the directory containing json filelist
     n -- Name of the json filelist, defaults to filelist.json
     """
-    return get_top_from_filelist(p, "filelist.json")
+    return get_top_from_filelist(p, n)
 
 def get_top_from_filelist(p, n):
     """ Get the name of the top level module a json filelist.
@@ -173,10 +651,170 @@ def get_top_from_filelist(p, n):
     p -- Absolute path to the directory containing filelist.json
     n -- name of the .json file to read.
     """
-    n = os.path.join(p, n)
-    with open(n) as filelist:
-        top = json.load(filelist)["top"]
-        return top
+    top = resolve(p, n)["top"]
+    assert top is not None, f"{os.path.join(p, n)} has no top"
+    return top
+
+# Upper bound on the size of each simulator's build cache. The least
+# recently used models are evicted once it is exceeded.
+BUILD_CACHE_MAX_BYTES = int(os.environ.get("BUILD_CACHE_MAX_BYTES", 2 * 1024 ** 3))
+
+@functools.lru_cache(maxsize=None)
+def get_simulator_version(simulator):
+    """ Get the version string reported by a simulator executable, or
+    "unknown" if it can't be run.
+
+    Arguments:
+    simulator -- Name of the simulator (verilator or icarus)
+    """
+    if simulator.startswith("verilator"):
+        cmd = ["verilator", "--version"]
+    else:
+        cmd = ["iverilog", "-V"]
+
+    try:
+        out = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True).stdout
+    except OSError:
+        return "unknown"
+
+    # iverilog -V keeps going with usage text after the first line.
+    return out.splitlines()[0].strip() if out else "unknown"
+
+def get_build_key(simulator, timescale, top, sources, params, defs, compile_args):
+    """ Get a content hash identifying one compiled model.
+
+    Arguments:
+    simulator -- Name of the simulator
+    timescale -- Timescale string passed to the simulator
+    top -- Name of the top level module
+    sources -- List of absolute source paths, in compile order
+    params -- Dictionary of top level parameters
+    defs -- List of defines
+    compile_args -- List of extra compiler arguments
+    """
+    h = hashlib.sha256()
+    for s in sources:
+        h.update(s.encode())
+        with open(s, "rb") as fd:
+            h.update(hashlib.sha256(fd.read()).digest())
+
+    config = [get_simulator_version(simulator), simulator, timescale, top,
+              sorted((k, str(v)) for k, v in params.items()), defs, compile_args]
+    h.update(json.dumps(config).encode())
+    return h.hexdigest()[:16]
+
+def get_build_dir(tbpath, simulator, key):
+    """ Get the build directory for a build key.
+
+    Arguments:
+    tbpath -- Absolute path to the testbench directory
+    simulator -- Name of the simulator
+    key -- Build key from get_build_key()
+    """
+    # Defaults to <tbpath>/build so that `make clean` still removes
+    # it, but can be pointed somewhere shared (e.g. by a CI job) with
+    # the BUILD_CACHE_DIR environment variable.
+    cache = os.environ.get("BUILD_CACHE_DIR", os.path.join(tbpath, "build"))
+    return os.path.join(cache, simulator, key)
+
+@contextlib.contextmanager
+def build_lock(build_dir, shared=False, blocking=True):
+    """ Hold a lock on a build directory, across processes: exclusive
+    to build or remove it, or shared to run the model in it. Yields
+    whether the lock was taken, which is always True when blocking.
+
+    Arguments:
+    build_dir -- Build directory to lock
+    shared -- Take a shared lock instead of an exclusive one
+    blocking -- Wait for the lock, instead of yielding False if another
+                process holds it
+    """
+    os.makedirs(os.path.dirname(build_dir), exist_ok=True)
+    with open(build_dir + ".lock", "a") as fd:
+        flags = fcntl.LOCK_SH if shared else fcntl.LOCK_EX
+        try:
+            fcntl.flock(fd, flags if blocking else flags | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+
+def touch_build(build_dir):
+    """ Mark a build directory as recently used. """
+    with open(os.path.join(build_dir, ".stamp"), "w"):
+        pass
+
+def get_dir_size(path):
+    """ Get the total size in bytes of all files below path. """
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for f in filenames:
+            fp = os.path.join(dirpath, f)
+            if not os.path.islink(fp):
+                total += os.path.getsize(fp)
+    return total
+
+def evict_builds(cache, keep=None, max_bytes=None):
+    """ Remove the least recently used builds from a cache directory
+    until it is smaller than max_bytes.
+
+    Arguments:
+    cache -- Directory containing one subdirectory per build key
+    keep -- Build directory that must not be evicted
+    max_bytes -- Size limit, defaults to BUILD_CACHE_MAX_BYTES
+    """
+    if(max_bytes is None):
+        max_bytes = BUILD_CACHE_MAX_BYTES
+
+    builds = []
+    for d in os.listdir(cache):
+        path = os.path.join(cache, d)
+        stamp = os.path.join(path, ".stamp")
+        # Builds without a stamp are in progress, or were interrupted.
+        if os.path.isdir(path) and os.path.exists(stamp):
+            builds.append((os.path.getmtime(stamp), get_dir_size(path), path))
+
+    total = sum(b[1] for b in builds)
+    for _, size, path in sorted(builds):
+        if total <= max_bytes:
+            break
+        if path == keep:
+            continue
+        # Builds that another worker is building or running are
+        # skipped, rather than waited for.
+        with build_lock(path, blocking=False) as locked:
+            if not locked:
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+        total -= size
+
+def get_work_dir(tbpath, testdir, params, simulator):
+    """ Get the directory a simulation runs in (and writes waves to).
+
+    Arguments:
+    tbpath -- Absolute path to the testbench directory
+    testdir -- Name of the test, or "all"
+    params -- Dictionary of top level parameters
+    simulator -- Name of the simulator
+    """
+    return os.path.join(tbpath, "run", testdir, get_param_string(params), simulator)
+
+@contextlib.contextmanager
+def environ(**env):
+    """ Temporarily set environment variables. """
+    old = {k: os.environ.get(k) for k in env}
+    os.environ.update(env)
+    try:
+        yield
+    finally:
+        for k, v in old.items():
+            if(v is None):
+                del os.environ[k]
+            else:
+                os.environ[k] = v
 
 def get_param_string(parameters):
     """ Get a string of all the parameters concatenated together.
@@ -188,9 +826,16 @@ def get_param_string(parameters):
 
 
 def assert_resolvable(s):
+    from cocotb.utils import get_sim_time
     assert s.value.is_resolvable, f"Unresolvable value in {s._path} (x or z in some or all bits) at Time {get_sim_time(units='ns')}ns."
 
+@profiling.spanned
 async def clock_start_sequence(clk_i, period=1, unit='ns'):
+    import cocotb
+    from cocotb.clock import Clock
+    from cocotb.triggers import Timer
+    from cocotb.types import LogicArray
+
     # Set the clock to Z for 10 ns. This helps separate tests.
     clk_i.value = LogicArray(['z'])
     await Timer(10, 'ns')
@@ -201,7 +846,10 @@ async def clock_start_sequence(clk_i, period=1, unit='ns'):
     # Start the clock (soon). Start it low to avoid issues on the first RisingEdge
     cocotb.start_soon(c.start(start_high=False))
 
+@profiling.spanned
 async def reset_sequence(clk_i, reset_i, cycles, FinishClkFalling=True, active_level=True):
+    from cocotb.triggers import ClockCycles, RisingEdge, FallingEdge
+
     reset_i.setimmediatevalue(not active_level)
 
     # Always assign inputs on the falling edge
@@ -220,3 +868,195 @@ async def reset_sequence(clk_i, reset_i, cycles, FinishClkFalling=True, active_l
     if (not FinishClkFalling):
         await RisingEdge(clk_i)
 
+
+@profiling.spanned
+async def drive_samples(clk_i, in_i, out_o, x, latency=1):
+    """ Drive one sample of x into in_i per clock cycle and return an
+    array of the samples on out_o, aligned like the models in golden.py
+    (y[n] is out_o just after the rising edge n + latency - 1). The
+    clock must be running.
+
+    This resumes Python once per cycle, on the falling edge: it reads
+    the output of the previous rising edge and assigns the next input
+    for the coming one. Values bypass cocotb's BinaryValue objects, so
+    X or Z outputs read as 0; use assert_resolvable() if that matters.
+
+    Arguments:
+    clk_i -- Clock
+    in_i -- Input sample signal
+    out_o -- Output sample signal (signed)
+    x -- Array of input samples
+    latency -- Register latency from in_i to out_o
+    """
+    from cocotb.triggers import FallingEdge
+    from golden import wrap
+
+    xs = wrap(x, len(in_i)).tolist()
+    n = len(xs)
+
+    if len(in_i) <= 32:
+        # 0 is a deposit, the same action a plain .value write uses.
+        write = functools.partial(in_i._handle.set_signal_val_int, 0)
+    else:
+        write = in_i.setimmediatevalue
+    read = out_o._handle.get_signal_val_long
+
+    # Sample i is assigned on falling edge i and read back on falling
+    # edge i + latency.
+    y = [0] * (n + latency)
+    edge = FallingEdge(clk_i)
+    for i in range(n + latency):
+        await edge
+        y[i] = read()
+        if i < n:
+            write(xs[i])
+
+    return wrap(y[latency:], len(out_o))
+
+async def process_samples(dut, x, latency=1):
+    """ drive_samples() for the clk/in_signal/out_signal interface that
+    the effects share. Effects with an en input (a sample every cycle it
+    is high) get it held high. """
+    if(hasattr(dut, "en")):
+        dut.en.value = 1
+    return await drive_samples(dut.clk, dut.in_signal, dut.out_signal, x, latency)
+
+# Checkpoints saved by warm_start() during this simulator run, by path
+_checkpoints = {}
+
+def get_state_handles(handle, skip=()):
+    """ Get every signal, variable and memory word below handle that
+    holds state, as a list of handles. Parameters are left out.
+
+    Arguments:
+    handle -- Handle of a scope, e.g. the dut
+    skip -- Names of signals to leave out, e.g. the clock
+    """
+    from cocotb.handle import RegionObject, NonHierarchyIndexableObject, ModifiableObject, StringObject
+
+    handles = []
+    for h in handle:
+        if(h._name in skip or isinstance(h, StringObject)):
+            continue
+        # Packed vectors are indexable too, so check for them first.
+        if(isinstance(h, ModifiableObject)):
+            handles.append(h)
+        elif(isinstance(h, (RegionObject, NonHierarchyIndexableObject))):
+            handles += get_state_handles(h, skip)
+    return handles
+
+def save_state(dut, skip=("clk",)):
+    """ Get the values of every state handle of dut (see
+    get_state_handles()) as a JSON serializable dictionary, by path. """
+    from cocotb.binary import BinaryValue
+
+    state = {}
+    for h in get_state_handles(dut, skip):
+        v = h.value
+        state[h._path] = v.binstr if isinstance(v, BinaryValue) else v
+    return state
+
+def load_state(dut, state, skip=("clk",)):
+    """ Write the values of a save_state() dictionary back into dut,
+    immediately. Returns False, and writes nothing, if the handles of dut
+    don't match those of the dictionary (e.g. a different build). """
+    from cocotb.binary import BinaryValue
+
+    handles = get_state_handles(dut, skip)
+    if(sorted(h._path for h in handles) != sorted(state)):
+        return False
+    for h in handles:
+        v = state[h._path]
+        h.setimmediatevalue(BinaryValue(v, n_bits=len(v)) if isinstance(v, str) else v)
+    return True
+
+@profiling.spanned
+async def warm_start(dut, name, warmup, skip=("clk",)):
+    """ Bring dut to the state warmup(dut) leaves it in, e.g. after
+    reset and filling a delay buffer, and return what warmup returned.
+
+    The first call on a build runs warmup and saves a checkpoint of
+    every register and memory in dut; later calls, in this test or
+    any other test on the same build, restore it in a few VPI writes
+    instead of simulating the warm-up again. Checkpoints live in the
+    build directory (CHECKPOINT_DIR, set by runner()) and are keyed on
+    name and the source of warmup, which must be deterministic (seed
+    its random numbers) and return something JSON serializable. Set
+    CHECKPOINT=0 to always run warmup.
+
+    The clock must be running. Either way, this returns just after a
+    falling edge of dut.clk, and the simulation time is not restored.
+
+    Arguments:
+    dut -- The dut
+    name -- Name of the warm-up, unique within the test module
+    warmup -- Async function of dut that does the warm-up
+    skip -- Names of signals the checkpoint leaves alone
+    """
+    import inspect
+    from cocotb.triggers import FallingEdge
+
+    enabled = os.environ.get("CHECKPOINT", "1") != "0"
+    digest = hashlib.sha256(inspect.getsource(warmup).encode()).hexdigest()[:16]
+    path = os.path.join(os.environ.get("CHECKPOINT_DIR", "checkpoints"), f"{name}-{digest}.json")
+
+    checkpoint = _checkpoints.get(path)
+    if(enabled and checkpoint is None and os.path.exists(path)):
+        with open(path) as fd:
+            checkpoint = json.load(fd)
+
+    await FallingEdge(dut.clk)
+    if(enabled and checkpoint is not None and load_state(dut, checkpoint["state"], skip)):
+        dut._log.debug(f"Restored checkpoint {path}")
+        _checkpoints[path] = checkpoint
+        return checkpoint["result"]
+
+    result = await warmup(dut)
+    await FallingEdge(dut.clk)
+    if(enabled):
+        checkpoint = dict(result=result, state=save_state(dut, skip))
+        _checkpoints[path] = checkpoint
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # Write atomically, since tests on other workers may read it.
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as fd:
+            json.dump(checkpoint, fd)
+        os.replace(tmp, path)
+    return result
+
+def get_latency(dut):
+    """ Get the register latency the dut declares in its "latency"
+    localparam, or None if it has none (or Verilator can't see it: mark
+    it /*verilator public*/). """
+    try:
+        return int(dut.latency.value)
+    except AttributeError:
+        return None
+
+@profiling.spanned
+async def check_samples(dut, x, reference, name, tolerance=0, latency=None):
+    """ Drive x through dut with process_samples() and assert that the
+    output matches reference, a golden model output for latency 1,
+    however many registers dut has (see scoreboard.py). Returns the
+    aligned output.
+
+    Arguments:
+    dut -- The dut, with the clk/in_signal/out_signal interface
+    x -- Array of input samples
+    reference -- Array of expected output samples
+    name -- Name used in the report, e.g. the test name
+    tolerance -- Largest allowed absolute difference to the reference
+    latency -- Register latency, defaults to get_latency(dut), and is
+               found from the output if that is None too
+    """
+    import numpy as np
+    from scoreboard import Scoreboard, MAX_LATENCY
+
+    if(latency is None):
+        latency = get_latency(dut)
+    # Hold the last input while the pipeline drains. A declared latency
+    # is checked against the best one too, for the report.
+    x = np.asarray(x, dtype=np.int64)
+    flush = max(MAX_LATENCY, latency or 0) - 1
+    got = await process_samples(dut, np.concatenate((x, np.full(flush, x[-1] if len(x) else 0))))
+    return Scoreboard(name, latency, tolerance).check(got, reference, x)